@@ -1,164 +1,39 @@
 import streamlit as st
-import requests
 from pathlib import Path
+import os
 import sys
-import time
 
 sys.path.insert(0, str(Path(__file__).parent / "src" / "agent"))
-from agent import TravelAgent, UserPreferences
+from agent import UserPreferences
+from agent_cache import get_agent, agent_cache_metrics
+from instrumentation import AgentMetrics
+from destinations import PRESET_CITIES, PRESET_INDEX, ALL_ACTIVITIES, calculate_activities_match
+from src.geo import GeoCache, GeoClient
 
-PRESET_CITIES = {
-    "Paris": {
-        "total": 232,
-        "quality": 5,
-        "offers": ["culture", "food", "romance", "shopping", "history"]
-    },
-    "London": {
-        "total": 215,
-        "quality": 5,
-        "offers": ["culture", "shopping", "nightlife", "history", "music"]
-    },
-    "Rome": {
-        "total": 198,
-        "quality": 4,
-        "offers": ["culture", "history", "food", "romance"]
-    },
-    "Barcelona": {
-        "total": 187,
-        "quality": 4,
-        "offers": ["culture", "beach", "nightlife", "food", "sport"]
-    },
-    "Amsterdam": {
-        "total": 165,
-        "quality": 4,
-        "offers": ["culture", "nightlife", "family", "history"]
-    },
-    "Prague": {
-        "total": 142,
-        "quality": 4,
-        "offers": ["culture", "romance", "history", "nightlife"]
-    },
-    "Vienna": {
-        "total": 138,
-        "quality": 4,
-        "offers": ["culture", "history", "music", "food"]
-    },
-    "Berlin": {
-        "total": 125,
-        "quality": 4,
-        "offers": ["culture", "nightlife", "history", "shopping"]
-    },
-    "Warsaw": {
-        "total": 82,
-        "quality": 3,
-        "offers": ["culture", "history", "family", "food"]
-    },
-    "Lisbon": {
-        "total": 95,
-        "quality": 3,
-        "offers": ["culture", "beach", "food", "nightlife"]
-    },
-    "Budapest": {
-        "total": 88,
-        "quality": 3,
-        "offers": ["culture", "history", "spa", "nightlife"]
-    },
-    "Copenhagen": {
-        "total": 76,
-        "quality": 3,
-        "offers": ["culture", "family", "design", "food"]
-    },
-    "Dublin": {
-        "total": 65,
-        "quality": 3,
-        "offers": ["culture", "nightlife", "nature", "music"]
-    },
-    "Krakow": {
-        "total": 45,
-        "quality": 2,
-        "offers": ["culture", "history", "food", "nightlife"]
-    },
-    "Porto": {
-        "total": 38,
-        "quality": 2,
-        "offers": ["culture", "food", "beach", "history"]
-    }
-}
+MODEL_PATH = Path(__file__).parent / "models" / "model_tree.pkl"
+GEO_CACHE_PATH = Path(__file__).parent / "data" / "cache" / "geo.sqlite"
+# Pomiar etapow decide() wlaczany zmienna srodowiskowa (TRAVEL_AGENT_METRICS=1)
+METRICS_ENABLED = os.environ.get("TRAVEL_AGENT_METRICS", "0") == "1"
 
-ALL_ACTIVITIES = [
-    "culture", "history", "food", "beach", "nightlife", 
-    "shopping", "nature", "family", "romance", "sport", 
-    "music", "design", "spa"
-]
+@st.cache_resource
+def get_agent_metrics():
+    return AgentMetrics()
+
+def load_agent():
+    # Rekomendacje z silnika kontrfaktycznego - kazda prowadzi do akceptacji oferty.
+    # Hook pomiarowy przekazany przy budowie (czesc klucza cache), wspolny agent pozostaje niezmienny
+    instrumentation = get_agent_metrics() if METRICS_ENABLED else None
+    return get_agent(MODEL_PATH, counterfactuals=True, instrumentation=instrumentation)
+
+@st.cache_resource
+def get_geo_client():
+    return GeoClient(cache=GeoCache(GEO_CACHE_PATH))
 
 def get_city_coordinates(city_name):
-    try:
-        url = f"https://nominatim.openstreetmap.org/search?q={city_name}&format=json&limit=1"
-        response = requests.get(url, headers={'User-Agent': 'TravelAgent/1.0'}, timeout=10)
-        data = response.json()
-        
-        if not data:
-            return None
-        
-        return {
-            'name': data[0].get('name', city_name),
-            'lat': float(data[0]['lat']),
-            'lon': float(data[0]['lon'])
-        }
-    except:
-        return None
+    return get_geo_client().city_coordinates(city_name)
 
 def get_attractions_overpass(lat, lon):
-    try:
-        query = f"""
-        [out:json][timeout:25];
-        (
-          node["tourism"](around:5000,{lat},{lon});
-          way["tourism"](around:5000,{lat},{lon});
-        );
-        out count;
-        """
-        
-        url = "https://overpass-api.de/api/interpreter"
-        response = requests.post(url, data={'data': query}, timeout=30)
-        
-        if response.status_code != 200:
-            return None
-            
-        data = response.json()
-        
-        if 'elements' in data and data['elements']:
-            tags = data['elements'][0].get('tags', {})
-            total = int(tags.get('total', 0))
-            
-            if total >= 200:
-                quality = 5
-            elif total >= 100:
-                quality = 4
-            elif total >= 50:
-                quality = 3
-            elif total >= 20:
-                quality = 2
-            else:
-                quality = 1
-            
-            return {'total': total, 'quality': quality}
-        return None
-    except:
-        return None
-
-def calculate_activities_match(city_offers, user_interests):
-    if not user_interests:
-        return 1
-    
-    common = set(city_offers) & set(user_interests)
-    
-    if len(common) >= 2:
-        return 2
-    elif len(common) >= 1:
-        return 1
-    else:
-        return 0
+    return get_geo_client().attractions(lat, lon)
 
 st.set_page_config(page_title="Agent Turystyczny", layout="wide")
 st.title("Agent Decyzyjny - Rekomendacja Podrozy")
@@ -185,13 +60,48 @@ st.sidebar.header("KROK 2: Wybierz miasto")
 
 use_preset = st.sidebar.checkbox("Uzyj gotowej listy (polecane)", value=True)
 
+multi_city = False
 if use_preset:
     city = st.sidebar.selectbox("Miasto", list(PRESET_CITIES.keys()))
     st.sidebar.info("Dane z cache - natychmiastowe wyniki")
 else:
-    city = st.sidebar.text_input("Wpisz nazwe miasta (po angielsku)", "Paris")
+    multi_city = st.sidebar.checkbox("Kilka miast naraz", value=False)
+    if multi_city:
+        city = st.sidebar.text_area("Nazwy miast (po angielsku, jedna na linie)", "Paris\nRome\nVienna")
+    else:
+        city = st.sidebar.text_input("Wpisz nazwe miasta (po angielsku)", "Paris")
     st.sidebar.warning("Pobieranie z Overpass API - moze nie dzialac (rate limit)")
 
+st.sidebar.markdown("---")
+top_k = st.sidebar.slider("Ile miast w rankingu", 3, len(PRESET_CITIES), 5)
+
+if st.sidebar.button("NAJLEPSZE MIASTA DLA MNIE"):
+    
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    
+    base_prefs = UserPreferences(
+        travel_comfort=comfort,
+        attractions_quality=1,
+        activities_match=1,
+        season_match=season_value,
+        user_budget=budget,
+        trip_cost=cost
+    )
+    ranking = load_agent().rank_destinations(base_prefs, interests, PRESET_INDEX, k=top_k)
+    
+    st.session_state["ranking"] = [
+        {
+            "Miasto": item.name,
+            "Pewnosc": f"{item.probability:.1%}",
+            "Decyzja": "ZAAKCEPTOWANA" if item.accepted else "ODRZUCONA",
+            "Jakosc": f"{item.quality}/5",
+            "Dopasowanie": f"{item.match}/2",
+            "Wspolne": ", ".join(item.common),
+        }
+        for item in ranking
+    ]
+
 if st.sidebar.button("SPRAWDZ MIASTO", type="primary"):
     
     for key in list(st.session_state.keys()):
@@ -216,6 +126,36 @@ if st.sidebar.button("SPRAWDZ MIASTO", type="primary"):
             "source": "preset"
         }
         st.success(f"Zaladowano: {city}")
+    elif multi_city:
+        # Klient asynchroniczny (tornado) ladowany dopiero przy sprawdzaniu wielu miast
+        from src.geo.async_client import decide_cities, resolve_cities
+        names = list(dict.fromkeys(name.strip() for name in city.splitlines() if name.strip()))
+        with st.spinner(f"Pobieram dane dla {len(names)} miast..."):
+            resolved = resolve_cities(names, cache=get_geo_client().cache)
+        
+        base_prefs = UserPreferences(
+            travel_comfort=comfort,
+            attractions_quality=1,
+            activities_match=1,
+            season_match=season_value,
+            user_budget=budget,
+            trip_cost=cost
+        )
+        decided = decide_cities(load_agent(), resolved, base_prefs)
+        
+        st.session_state["multi_result"] = {
+            "rows": [
+                {
+                    "Miasto": info['name'],
+                    "Atrakcje": info['total'],
+                    "Jakosc": info['quality'],
+                    "Pewnosc": f"{decision.probability:.1%}",
+                    "Decyzja": "ZAAKCEPTOWANA" if decision.accepted else "ODRZUCONA",
+                }
+                for info, decision in decided
+            ],
+            "failed": [info['query'] for info in resolved if info['error'] is not None],
+        }
     else:
         with st.spinner("Szukam miasta..."):
             coords = get_city_coordinates(city)
@@ -224,7 +164,6 @@ if st.sidebar.button("SPRAWDZ MIASTO", type="primary"):
                 st.error(f"Nie znaleziono: {city}")
             else:
                 with st.spinner("Pobieram atrakcje (30 sek)..."):
-                    time.sleep(2)
                     attractions = get_attractions_overpass(coords['lat'], coords['lon'])
                 
                 if not attractions:
@@ -248,7 +187,20 @@ if st.sidebar.button("SPRAWDZ MIASTO", type="primary"):
                     }
                     st.success(f"Pobrano: {coords['name']}")
 
-if "result" in st.session_state:
+if "ranking" in st.session_state:
+    st.subheader("Najlepsze miasta dla Ciebie")
+    st.table(st.session_state["ranking"])
+
+elif "multi_result" in st.session_state:
+    m = st.session_state["multi_result"]
+    
+    st.subheader("Porownanie miast")
+    if m["rows"]:
+        st.table(m["rows"])
+    if m["failed"]:
+        st.warning(f"Nie udalo sie pobrac: {', '.join(m['failed'])}")
+
+elif "result" in st.session_state:
     r = st.session_state["result"]
     
     st.subheader(f"Analiza: {r['city']}")
@@ -272,8 +224,7 @@ if "result" in st.session_state:
     st.markdown("---")
     
     try:
-        model_path = Path(__file__).parent / "models" / "model_tree.pkl"
-        agent = TravelAgent(str(model_path))
+        agent = load_agent()
         
         prefs = UserPreferences(
             travel_comfort=r['comfort'],
@@ -306,6 +257,8 @@ if "result" in st.session_state:
             st.subheader("Rekomendacje")
             for rec in decision.recommended_changes:
                 st.write(f"- {rec}")
+            if decision.counterfactual is not None:
+                st.caption(f"Po tych zmianach szansa akceptacji: {decision.counterfactual.probability:.0%}")
         
         with st.expander("Sciezka decyzyjna"):
             if decision.decision_path:
@@ -320,5 +273,24 @@ if "result" in st.session_state:
 else:
     st.info("Ustaw preferencje, wybierz miasto i kliknij SPRAWDZ MIASTO")
 
+with st.sidebar.expander("Statystyki agenta"):
+    metrics = agent_cache_metrics()
+    st.write(f"Trafienia cache: {metrics['hits']} ({metrics['hit_rate']:.0%})")
+    st.write(f"Ladowania modelu: {metrics['loads']} (przeladowania: {metrics['reloads']})")
+    st.write(f"Ostatnie ladowanie: {metrics['load_time_last'] * 1000:.1f} ms")
+
+    if METRICS_ENABLED:
+        agent_metrics = get_agent_metrics()
+        summary = agent_metrics.summary()
+        if summary:
+            st.dataframe({
+                "etap": list(summary),
+                "n": [s["count"] for s in summary.values()],
+                "srednio [us]": [s["mean"] * 1e6 for s in summary.values()],
+                "p99 [us]": [s["p99"] * 1e6 for s in summary.values()],
+            })
+        st.download_button("Metryki (Prometheus)", agent_metrics.to_prometheus(), "agent_metrics.prom", "text/plain")
+        st.download_button("Metryki (JSON)", agent_metrics.to_json(), "agent_metrics.json", "application/json")
+
 st.markdown("---")
 st.caption("System rekomendacyjny | 15 miast preset + Overpass API | Praca inzynierska 2025")
\ No newline at end of file
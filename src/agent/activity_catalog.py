@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+WORD_BITS = 64
+
+
+class ActivityCatalog:
+    def __init__(self, activities: Iterable[str]):
+        self.activities = list(dict.fromkeys(activities))
+        self.bit_index = {activity: i for i, activity in enumerate(self.activities)}
+        self.n_words = max(1, -(-len(self.activities) // WORD_BITS))
+
+    def __len__(self) -> int:
+        return len(self.activities)
+
+    def mask(self, activities: Iterable[str]) -> np.ndarray:
+        mask = np.zeros(self.n_words, dtype=np.uint64)
+        for activity in activities:
+            bit = self.bit_index.get(activity)
+            if bit is not None:
+                mask[bit // WORD_BITS] |= np.uint64(1 << (bit % WORD_BITS))
+        return mask
+
+    def pack(self, offers_list: List[Iterable[str]]) -> np.ndarray:
+        rows, bits = [], []
+        for row, offers in enumerate(offers_list):
+            for activity in offers:
+                bit = self.bit_index.get(activity)
+                if bit is not None:
+                    rows.append(row)
+                    bits.append(bit)
+
+        masks = np.zeros((len(offers_list), self.n_words), dtype=np.uint64)
+        rows = np.asarray(rows, dtype=np.intp)
+        bits = np.asarray(bits, dtype=np.uint64)
+        np.bitwise_or.at(masks, (rows, (bits // WORD_BITS).astype(np.intp)), np.uint64(1) << (bits % WORD_BITS))
+        return masks
+
+    def unpack(self, masks: np.ndarray) -> np.ndarray:
+        # Widok bajtowy little-endian: bit i aktywnosci to bit i w kolejnosci 'little'
+        masks = np.ascontiguousarray(masks, dtype='<u8').reshape(-1, self.n_words)
+        bits = np.unpackbits(masks.view(np.uint8), axis=1, bitorder='little')
+        return bits[:, :len(self.activities)].astype(bool)
+
+    def decode(self, mask: np.ndarray) -> List[str]:
+        return [self.activities[i] for i in np.flatnonzero(self.unpack(mask)[0])]
+
+    def count_common(self, masks: np.ndarray, activities: Iterable[str]) -> np.ndarray:
+        user = self.mask(activities)
+        return np.bitwise_count(masks & user).sum(axis=-1, dtype=np.int64)
+
+    def match(self, masks: np.ndarray, user_interests) -> np.ndarray:
+        if not user_interests:
+            return np.ones(len(masks), dtype=np.int8)
+        return np.minimum(self.count_common(masks, user_interests), 2).astype(np.int8)
+
+    def inverted_index(self, masks: np.ndarray) -> "InvertedIndex":
+        return InvertedIndex(self, masks)
+
+
+class InvertedIndex:
+    def __init__(self, catalog: ActivityCatalog, masks: np.ndarray):
+        self.catalog = catalog
+        # Postingi w formacie CSR: miasta dla aktywnosci j to cities[offsets[j]:offsets[j + 1]]
+        cities, activities = np.nonzero(catalog.unpack(masks))
+        order = np.argsort(activities, kind='stable')
+        self.cities = cities[order].astype(np.int64)
+        self.offsets = np.zeros(len(catalog) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(activities, minlength=len(catalog)), out=self.offsets[1:])
+        self.n_cities = len(masks)
+
+    def postings(self, activity: str) -> np.ndarray:
+        bit = self.catalog.bit_index.get(activity)
+        if bit is None:
+            return self.cities[:0]
+        return self.cities[self.offsets[bit]:self.offsets[bit + 1]]
+
+    def as_dict(self) -> Dict[str, np.ndarray]:
+        return {activity: self.postings(activity) for activity in self.catalog.activities}
+
+    def candidates(self, activities: Iterable[str], min_common: int = 1) -> Optional[np.ndarray]:
+        postings = [self.postings(activity) for activity in dict.fromkeys(activities)]
+        if min_common <= 0 or not postings:
+            return None
+        counts = np.bincount(np.concatenate(postings), minlength=self.n_cities)
+        return np.flatnonzero(counts >= min_common)
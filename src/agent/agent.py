@@ -1,8 +1,16 @@
-import joblib
-import pandas as pd
+import numpy as np
 from pathlib import Path
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Sequence
+
+try:
+    from .encoding import FeatureEncoder, SCORE_INPUTS
+    from .tree_engine import RIGHT
+    from .model_artifact import load_model
+except ImportError:
+    from encoding import FeatureEncoder, SCORE_INPUTS
+    from tree_engine import RIGHT
+    from model_artifact import load_model
 
 
 @dataclass
@@ -41,43 +49,161 @@ class Decision:
     explanation: str
     recommended_changes: Optional[List[str]] = None
     decision_path: Optional[List[dict]] = None
+    counterfactual: Optional["Counterfactual"] = None
+    # Wyniki modeli w trybie shadow: prawdopodobienstwa kazdego modelu oraz srednia i glosowanie
+    shadow: Optional[dict] = None
 
 
 class TravelAgent:
-    def __init__(self, model_path: str):
-        self.model = joblib.load(model_path)
-        self.feature_names = list(self.model.feature_names_in_)
-        self.tree = self.model.tree_
+    def __init__(self, model_path: str, use_table: bool = False, save_table: bool = True,
+                 instrumentation=None, counterfactuals: bool = False, shadow_models: Sequence = ()):
+        self.model_path = model_path
+        # Hook pomiarowy (patrz instrumentation.Instrumentation); None = brak narzutu poza jednym porownaniem
+        self.instrumentation = instrumentation
+        # Plik .tree: tablice mapowane z dysku, bez sklearn; joblib (i sklearn przy unpickle) tylko dla .pkl
+        self.engine, self.feature_names, self.model = load_model(model_path)
+        self.tree = self.model.tree_ if self.model is not None else None
+        self.encoder = FeatureEncoder.from_feature_names(self.feature_names)
+        
+        # Modele shadow/kandydaci liczeni razem z glownym w jednym przebiegu po zlaczonych tablicach wezlow.
+        # Wspolny uklad kolumn zaczyna sie od kolumn modelu glownego, wiec wejscie kodowane jest raz,
+        # a silnik glowny czyta te sama macierz
+        self.ensemble = None
+        if shadow_models:
+            try:
+                from .ensemble import TreeEnsemble
+            except ImportError:
+                from ensemble import TreeEnsemble
+            loaded = [load_model(path) for path in shadow_models]
+            self.ensemble = TreeEnsemble(
+                [self.engine] + [tree for tree, _, _ in loaded],
+                [self.feature_names] + [names for _, names, _ in loaded],
+                names=[str(model_path)] + [str(path) for path in shadow_models],
+            )
+            self.encoder = self.ensemble.encoder
+        
+        # Silnik kontrfaktyczny: rekomendacje z najtanszej zmiany, ktora faktycznie zmienia decyzje
+        self.counterfactuals = None
+        if counterfactuals:
+            try:
+                from .counterfactuals import CounterfactualEngine
+            except ImportError:
+                from counterfactuals import CounterfactualEngine
+            self.counterfactuals = CounterfactualEngine(self)
+        
+        self.table = None
+        if use_table:
+            try:
+                from .decision_table import DecisionTable
+            except ImportError:
+                from decision_table import DecisionTable
+            self.table = DecisionTable.load_or_build(self, model_path, save=save_table)
     
     def decide(self, prefs: UserPreferences) -> Decision:
-        score = prefs.compute_score()
+        probe = self.instrumentation
+        if self.table is not None:
+            if probe is not None:
+                start = probe.clock()
+            decision = self.table.lookup(prefs)
+            if probe is not None:
+                probe.lap('table_lookup', start)
+                probe.inc('table_hits' if decision is not None else 'table_misses')
+            if decision is not None:
+                if probe is not None:
+                    probe.inc('decisions')
+                return decision
+        
+        return self.decide_batch([prefs])[0]
+    
+    def decide_batch(self, prefs_list: List[UserPreferences], include_paths: bool = True) -> List[Decision]:
+        if not prefs_list:
+            return []
+        
+        probe = self.instrumentation
+        if probe is not None:
+            start = mark = probe.clock()
+        
+        scores = [prefs.compute_score() for prefs in prefs_list]
+        if probe is not None:
+            mark = probe.lap('score', mark)
         
-        input_dict = {
-            'travel_comfort': prefs.travel_comfort,
-            'attractions_quality': prefs.attractions_quality,
-            'activities_match': prefs.activities_match,
-            'season_match': prefs.season_match,
-            'score': score,
-            'user_budget': prefs.user_budget,
-            'trip_cost': prefs.trip_cost
-        }
+        X = self.encode_batch(prefs_list, scores)
+        if probe is not None:
+            mark = probe.lap('encode', mark)
         
-        df = pd.DataFrame([input_dict])
-        df = pd.get_dummies(df, columns=['user_budget', 'trip_cost'])
+        paths = self.engine.decision_paths(X)
+        if probe is not None:
+            mark = probe.lap('traverse', mark)
         
-        for col in self.feature_names:
-            if col not in df.columns:
-                df[col] = 0
+        proba = self.engine.proba[paths.leaves]
+        predictions = self.engine.classes[proba.argmax(axis=1)]
+        if probe is not None:
+            mark = probe.lap('predict', mark)
+        
+        n = len(prefs_list)
+        if include_paths:
+            decision_paths = [self._path_to_dicts(X[i], *paths.row(i)) for i in range(n)]
+            if probe is not None:
+                mark = probe.lap('paths', mark)
+        else:
+            decision_paths = [None] * n
         
-        df = df[self.feature_names]
+        decisions = [
+            self._build_decision(
+                scores[i], predictions[i], proba[i, 1], decision_paths[i],
+                left_features=self._left_features(*paths.row(i))
+            )
+            for i in range(n)
+        ]
+        if probe is not None:
+            mark = probe.lap('build', mark)
         
-        prediction = self.model.predict(df)[0]
-        probability = self.model.predict_proba(df)[0][1]
+        if self.ensemble is not None:
+            self._attach_shadow(decisions, X)
+            if probe is not None:
+                mark = probe.lap('shadow', mark)
         
-        decision_path = self._extract_decision_path(df)
+        if self.counterfactuals is not None:
+            self._attach_counterfactuals(decisions, prefs_list)
+            if probe is not None:
+                probe.lap('counterfactuals', mark)
         
+        if probe is not None:
+            probe.lap('total', start)
+            probe.inc('batches')
+            probe.inc('decisions', n)
+        return decisions
+    
+    def rank_destinations(self, preferences: UserPreferences, interests: List[str], cities, k: Optional[int] = 10,
+                          min_match: int = 0):
+        try:
+            from .destinations import rank_destinations
+        except ImportError:
+            from destinations import rank_destinations
+        return rank_destinations(self, preferences, interests, cities, k, min_match)
+    
+    def extract_decision_paths(self, X: np.ndarray, as_dicts: bool = False):
+        paths = self.engine.decision_paths(X)
+        if not as_dicts:
+            return paths
+        return [self._path_to_dicts(X[i], *paths.row(i)) for i in range(len(paths))]
+    
+    def encode_batch(self, prefs_list: List[UserPreferences], scores: Optional[List[int]] = None) -> np.ndarray:
+        columns = {name: [getattr(prefs, name) for prefs in prefs_list] for name in SCORE_INPUTS}
+        if scores is not None:
+            columns['score'] = scores
+        return self.encoder.transform(columns)
+    
+    def encode_columns(self, columns: dict) -> np.ndarray:
+        # Kolumny moga byc skalarami (wspolne dla calej paczki) albo tablicami tej samej dlugosci
+        return self.encoder.transform(columns)
+    
+    def _build_decision(self, score: int, prediction, probability, decision_path: Optional[List[dict]],
+                        left_features: Optional[List[str]] = None) -> Decision:
         if prediction == 0:
-            recommendations = self._generate_recommendations(decision_path)
+            if left_features is None:
+                left_features = [step["feature"] for step in decision_path if step["direction"] == "left"]
+            recommendations = self._recommendations_for(left_features)
             explanation = f"Oferta odrzucona przez model (score: {score})"
         else:
             recommendations = None
@@ -91,54 +217,60 @@ class TravelAgent:
             decision_path=decision_path
         )
     
-    def _extract_decision_path(self, X: pd.DataFrame) -> List[dict]:
-        node_id = 0
+    def _attach_shadow(self, decisions: List[Decision], X: np.ndarray):
+        result = self.ensemble.evaluate(X)
+        names = self.ensemble.names
+        for i, decision in enumerate(decisions):
+            decision.shadow = {
+                'probabilities': dict(zip(names, result.probabilities[i].tolist())),
+                'mean': float(result.mean[i]),
+                'votes': int(result.votes[i]),
+                'n_models': result.n_models,
+                'agreement': float(result.agreement[i]),
+            }
+    
+    def _attach_counterfactuals(self, decisions: List[Decision], prefs_list: List[UserPreferences]):
+        for decision, counterfactual in zip(decisions, self.counterfactuals.query_batch(prefs_list)):
+            if counterfactual is not None and not decision.accepted:
+                decision.counterfactual = counterfactual
+                decision.recommended_changes = counterfactual.recommendations()
+    
+    def _path_to_dicts(self, x: np.ndarray, nodes: np.ndarray, directions: np.ndarray) -> List[dict]:
         path = []
         
-        while self.tree.children_left[node_id] != -1:
-            feature_index = self.tree.feature[node_id]
-            threshold = self.tree.threshold[node_id]
-            feature_name = self.feature_names[feature_index]
-            value = X.iloc[0, feature_index]
-            
-            if value <= threshold:
-                direction = "left"
-                next_node = self.tree.children_left[node_id]
-            else:
-                direction = "right"
-                next_node = self.tree.children_right[node_id]
+        for node_id, side in zip(nodes, directions):
+            feature_index = self.engine.feature[node_id]
+            passed = bool(side == RIGHT)
             
             path.append({
-                "feature": feature_name,
-                "value": float(value),
-                "threshold": float(threshold),
-                "direction": direction,
-                "passed": direction == "right"
+                "feature": self.feature_names[feature_index],
+                "value": float(x[feature_index]),
+                "threshold": float(self.engine.threshold[node_id]),
+                "direction": "right" if passed else "left",
+                "passed": passed
             })
-            
-            node_id = next_node
         
         return path
     
-    def _generate_recommendations(self, decision_path: List[dict]) -> List[str]:
+    def _left_features(self, nodes: np.ndarray, directions: np.ndarray) -> List[str]:
+        return [self.feature_names[i] for i in self.engine.feature[nodes[directions != RIGHT]]]
+    
+    def _recommendations_for(self, left_features: List[str]) -> List[str]:
         recommendations = []
         
-        for step in decision_path:
-            if step["direction"] == "left":
-                feature = step["feature"]
-                
-                if "user_budget_low" in feature:
-                    recommendations.append("Zwieksz budzet lub wybierz tansza oferte")
-                elif "trip_cost_high" in feature:
-                    recommendations.append("Wybierz tanszy kierunek lub krotszy pobyt")
-                elif "activities_match" in feature:
-                    recommendations.append("Wybierz oferte lepiej dopasowana do twoich zainteresowan")
-                elif "season_match" in feature:
-                    recommendations.append("Rozwaz inny termin wyjazdu")
-                elif "attractions_quality" in feature:
-                    recommendations.append("Wybierz miejsce z lepszymi atrakcjami")
-                elif "travel_comfort" in feature:
-                    recommendations.append("Rozwaz oferte z lepszym komfortem podrozy")
+        for feature in left_features:
+            if "user_budget_low" in feature:
+                recommendations.append("Zwieksz budzet lub wybierz tansza oferte")
+            elif "trip_cost_high" in feature:
+                recommendations.append("Wybierz tanszy kierunek lub krotszy pobyt")
+            elif "activities_match" in feature:
+                recommendations.append("Wybierz oferte lepiej dopasowana do twoich zainteresowan")
+            elif "season_match" in feature:
+                recommendations.append("Rozwaz inny termin wyjazdu")
+            elif "attractions_quality" in feature:
+                recommendations.append("Wybierz miejsce z lepszymi atrakcjami")
+            elif "travel_comfort" in feature:
+                recommendations.append("Rozwaz oferte z lepszym komfortem podrozy")
         
         return list(dict.fromkeys(recommendations))
     
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    from .agent import TravelAgent
+except ImportError:
+    from agent import TravelAgent
+
+
+@dataclass
+class CacheEntry:
+    agent: TravelAgent
+    mtime_ns: int
+    load_time: float
+    hits: int = 0
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    loads: int = 0
+    reloads: int = 0
+    load_time_total: float = 0.0
+    load_time_last: float = 0.0
+
+
+def _hashable(value):
+    # Listy w opcjach (np. shadow_models) jako krotki - klucz cache musi byc hashowalny
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+
+class AgentCache:
+    def __init__(self, factory=TravelAgent):
+        self.factory = factory
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def get(self, model_path, **options) -> TravelAgent:
+        path = str(Path(model_path).resolve())
+        key = (path, tuple(sorted((name, _hashable(value)) for name, value in options.items())))
+        mtime_ns = os.stat(path).st_mtime_ns
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.mtime_ns == mtime_ns:
+            with self._lock:
+                entry.hits += 1
+                self._stats.hits += 1
+            return entry.agent
+
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+
+        # Jeden watek laduje model, pozostale czekaja i dostaja gotowa instancje
+        with key_lock:
+            entry = self._entries.get(key)
+            mtime_ns = os.stat(path).st_mtime_ns
+            if entry is not None and entry.mtime_ns == mtime_ns:
+                with self._lock:
+                    entry.hits += 1
+                    self._stats.hits += 1
+                return entry.agent
+
+            start = time.perf_counter()
+            agent = self.factory(path, **options)
+            load_time = time.perf_counter() - start
+
+            with self._lock:
+                if entry is not None:
+                    self._stats.reloads += 1
+                self._stats.loads += 1
+                self._stats.load_time_total += load_time
+                self._stats.load_time_last = load_time
+                self._entries[key] = CacheEntry(agent, mtime_ns, load_time)
+            return agent
+
+    def metrics(self) -> dict:
+        with self._lock:
+            requests = self._stats.hits + self._stats.loads
+            return {
+                "hits": self._stats.hits,
+                "loads": self._stats.loads,
+                "reloads": self._stats.reloads,
+                "hit_rate": self._stats.hits / requests if requests else 0.0,
+                "load_time_total": self._stats.load_time_total,
+                "load_time_last": self._stats.load_time_last,
+                "models": [
+                    {
+                        "path": path,
+                        "options": dict(options),
+                        "hits": entry.hits,
+                        "load_time": entry.load_time,
+                        "mtime_ns": entry.mtime_ns,
+                    }
+                    for (path, options), entry in self._entries.items()
+                ],
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._locks.clear()
+            self._stats = CacheStats()
+
+
+_default_cache = AgentCache()
+
+
+def get_agent(model_path, **options) -> TravelAgent:
+    return _default_cache.get(model_path, **options)
+
+
+def agent_cache_metrics() -> dict:
+    return _default_cache.metrics()
@@ -0,0 +1,310 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+try:
+    from ..data.dataset import count_rows, is_parquet
+    from .agent import TravelAgent
+    from .encoding import SCORE_INPUTS
+    from .hashing import file_hash
+    from .model_artifact import artifact_path_for
+    from .tree_engine import RIGHT, TREE_LEAF
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "data"))
+    from dataset import count_rows, is_parquet
+    from agent import TravelAgent
+    from encoding import SCORE_INPUTS
+    from hashing import file_hash
+    from model_artifact import artifact_path_for
+    from tree_engine import RIGHT, TREE_LEAF
+
+PICKLE_PATH = Path(__file__).resolve().parents[2] / "models" / "model_tree.pkl"
+MODEL_PATH = artifact_path_for(PICKLE_PATH) if artifact_path_for(PICKLE_PATH).exists() else PICKLE_PATH
+CHUNK_SIZE = 250_000
+CHECKPOINT_FILE = '_checkpoint.json'
+FORMATS = ('parquet', 'csv')
+OUTPUT_COLUMNS = ('accepted', 'probability', 'leaf', 'path')
+
+
+class CheckpointMismatch(RuntimeError):
+    pass
+
+
+def iter_chunks(path, chunk_size: int = CHUNK_SIZE) -> Iterator[pa.Table]:
+    # Paczki o stalej liczbie wierszy niezaleznie od formatu - numer paczki jednoznacznie wskazuje wiersze,
+    # co pozwala wznowic przerwany przebieg
+    if is_parquet(path):
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size)
+    else:
+        batches = pacsv.open_csv(path, read_options=pacsv.ReadOptions(block_size=1 << 24))
+
+    pending, size = [], 0
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+        pending.append(batch)
+        size += batch.num_rows
+        while size >= chunk_size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_size)
+            rest = table.slice(chunk_size)
+            pending, size = rest.to_batches(), rest.num_rows
+    if size:
+        yield pa.Table.from_batches(pending)
+
+
+class ChunkScorer:
+    def __init__(self, model_path, output_dir, fmt: str = 'parquet', paths: bool = False):
+        self.agent = TravelAgent(model_path)
+        self.output_dir = Path(output_dir)
+        self.fmt = fmt
+        self.paths = pa.array(self._leaf_paths(), pa.string()) if paths else None
+
+    def _leaf_paths(self):
+        # Sciezka zalezy tylko od liscia: napisy liczone raz na lisc, wiersze dostaja indeks do slownika
+        engine, names = self.agent.engine, self.agent.feature_names
+        labels = [''] * engine.node_count
+        for leaf in np.flatnonzero(engine.children_left == TREE_LEAF):
+            depth = engine.node_depth[leaf]
+            labels[leaf] = '|'.join(
+                f"{names[engine.feature[node]]}{'>' if direction == RIGHT else '<='}{engine.threshold[node]:g}"
+                for node, direction in zip(engine.path_nodes[leaf, :depth], engine.path_directions[leaf, :depth])
+            )
+        return labels
+
+    def score(self, table: pa.Table) -> pa.Table:
+        missing = [name for name in SCORE_INPUTS if name not in table.column_names]
+        if missing:
+            raise ValueError(f"Brak kolumn wejsciowych: {missing}")
+
+        # Wynik (score) liczony z cech jak w TravelAgent.decide, nie brany z pliku
+        X = self.agent.encode_columns(table.select(SCORE_INPUTS).to_pandas())
+        engine = self.agent.engine
+        leaves = engine.apply(X)
+        proba = engine.proba[leaves]
+
+        kept = [name for name in table.column_names if name not in SCORE_INPUTS and name not in OUTPUT_COLUMNS]
+        output = table.select(kept)
+        output = output.append_column('accepted', pa.array(engine.classes[proba.argmax(axis=1)] == 1))
+        output = output.append_column('probability', pa.array(proba[:, 1]))
+        output = output.append_column('leaf', pa.array(leaves.astype(np.int32)))
+        if self.paths is not None:
+            path = pa.DictionaryArray.from_arrays(pa.array(leaves.astype(np.int32)), self.paths)
+            output = output.append_column('path', path if self.fmt == 'parquet' else path.cast(pa.string()))
+        return output
+
+    def part_path(self, index: int) -> Path:
+        return self.output_dir / f"part-{index:05d}.{self.fmt}"
+
+    def write(self, index: int, table: pa.Table) -> Path:
+        path = self.part_path(index)
+        tmp_path = path.with_name(path.name + '.tmp')
+        if self.fmt == 'parquet':
+            pq.write_table(table, tmp_path, compression='zstd')
+        else:
+            pacsv.write_csv(table, tmp_path)
+        tmp_path.replace(path)
+        return path
+
+    def run(self, index: int, table: pa.Table) -> dict:
+        start = time.perf_counter()
+        self.write(index, self.score(table))
+        return {'index': index, 'rows': table.num_rows, 'seconds': time.perf_counter() - start, 'pid': os.getpid()}
+
+
+_SCORER: Optional[ChunkScorer] = None
+
+
+def _init_worker(model_path, output_dir, fmt, paths):
+    global _SCORER
+    _SCORER = ChunkScorer(model_path, output_dir, fmt, paths)
+
+
+def _run_chunk(index, table):
+    return _SCORER.run(index, table)
+
+
+class Checkpoint:
+    # Stan przebiegu w katalogu wyjsciowym: parametry wejscia/modelu i lista gotowych paczek.
+    # Paczka jest gotowa dopiero po atomowym zapisie pliku czesci, wiec przerwanie w dowolnym
+    # momencie konczy sie co najwyzej ponownym policzeniem paczek w toku.
+    def __init__(self, output_dir, params: dict):
+        self.path = Path(output_dir) / CHECKPOINT_FILE
+        self.params = params
+        self.completed = set()
+        self.rows = 0
+
+    def load(self, resume: bool):
+        if not resume or not self.path.exists():
+            return
+        state = json.loads(self.path.read_text())
+        if state['params'] != self.params:
+            changed = sorted(k for k in self.params if state['params'].get(k) != self.params[k])
+            raise CheckpointMismatch(f"Punkt kontrolny z innymi parametrami ({', '.join(changed)}); uzyj --restart")
+        self.completed = set(state['completed'])
+        self.rows = state['rows']
+
+    def done(self, index: int, rows: int):
+        self.completed.add(index)
+        self.rows += rows
+
+    def save(self, complete: bool = False):
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        tmp_path.write_text(json.dumps({
+            'params': self.params,
+            'completed': sorted(self.completed),
+            'rows': self.rows,
+            'complete': complete,
+        }))
+        tmp_path.replace(self.path)
+
+
+class Progress:
+    def __init__(self, total: Optional[int], stream=None, enabled: bool = True):
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.rows = 0
+        self.scored = 0
+
+    def update(self, rows: int, skipped: bool = False):
+        # Przepustowosc i czas do konca tylko z wierszy faktycznie liczonych w tym przebiegu
+        self.rows += rows
+        if not skipped:
+            self.scored += rows
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter() - self.start
+        rate = self.scored / elapsed if elapsed > 0 else 0.0
+        line = f"{self.rows:,} wierszy"
+        if self.total:
+            line += f" / {self.total:,} ({self.rows / self.total:.0%})"
+        line += f", {rate:,.0f} wierszy/s, {elapsed:.1f} s"
+        if self.total and rate > 0:
+            line += f", pozostalo ~{(self.total - self.rows) / rate:.0f} s"
+        if skipped:
+            line += " (z punktu kontrolnego)"
+        print(line, file=self.stream, flush=True)
+
+
+def score_file(input_path, output_dir, model_path=MODEL_PATH, chunk_size: int = CHUNK_SIZE, n_jobs: int = -1,
+               fmt: str = 'parquet', paths: bool = False, resume: bool = True, progress: bool = True) -> dict:
+    input_path, output_dir = Path(input_path), Path(output_dir)
+    if fmt not in FORMATS:
+        raise ValueError(f"Nieznany format {fmt}, dostepne: {FORMATS}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    stat = input_path.stat()
+    checkpoint = Checkpoint(output_dir, {
+        'input': str(input_path.resolve()),
+        'input_size': stat.st_size,
+        'input_mtime': stat.st_mtime_ns,
+        'model_sha256': file_hash(model_path),
+        'chunk_size': chunk_size,
+        'format': fmt,
+        'paths': paths,
+    })
+    checkpoint.load(resume)
+    if not checkpoint.completed:
+        # Nowy przebieg: stare czesci (np. z innym rozmiarem paczki) nie moga zostac w wyniku
+        for part in output_dir.glob('part-*'):
+            part.unlink()
+    checkpoint.save()
+
+    if n_jobs in (None, -1):
+        n_jobs = os.cpu_count() or 1
+    # Parquet zna liczbe wierszy z metadanych; CSV trzeba by przeczytac dodatkowy raz, wiec bez sumy
+    tracker = Progress(count_rows(input_path) if is_parquet(input_path) else None, enabled=progress)
+    start = time.perf_counter()
+    scored = skipped = 0
+
+    def finished(result):
+        nonlocal scored
+        checkpoint.done(result['index'], result['rows'])
+        checkpoint.save()
+        scored += result['rows']
+        tracker.update(result['rows'])
+
+    chunks = enumerate(iter_chunks(input_path, chunk_size))
+    if n_jobs <= 1:
+        scorer = ChunkScorer(model_path, output_dir, fmt, paths)
+        for index, table in chunks:
+            if index in checkpoint.completed:
+                skipped += table.num_rows
+                tracker.update(table.num_rows, skipped=True)
+                continue
+            finished(scorer.run(index, table))
+    else:
+        # Co najwyzej 2 paczki na proces w locie: pamiec ograniczona niezaleznie od rozmiaru pliku,
+        # a czytanie wejscia naklada sie z liczeniem w workerach
+        with ProcessPoolExecutor(n_jobs, initializer=_init_worker,
+                                 initargs=(model_path, output_dir, fmt, paths)) as pool:
+            in_flight = set()
+            for index, table in chunks:
+                if index in checkpoint.completed:
+                    skipped += table.num_rows
+                    tracker.update(table.num_rows, skipped=True)
+                    continue
+                if len(in_flight) >= 2 * n_jobs:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finished(future.result())
+                in_flight.add(pool.submit(_run_chunk, index, table))
+            for future in in_flight:
+                finished(future.result())
+
+    checkpoint.save(complete=True)
+    wall_time = time.perf_counter() - start
+    return {
+        'output': str(output_dir),
+        'rows': checkpoint.rows,
+        'scored': scored,
+        'skipped': skipped,
+        'parts': len(checkpoint.completed),
+        'wall_time': wall_time,
+        'rows_per_s': scored / wall_time if wall_time > 0 else 0.0,
+        'n_jobs': n_jobs,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Wsadowa ocena ofert z pliku CSV/Parquet")
+    parser.add_argument('input', type=Path, help="plik CSV/Parquet z kolumnami preferencji")
+    parser.add_argument('output', type=Path, help="katalog na czesci wyniku i punkt kontrolny")
+    parser.add_argument('--model', type=Path, default=MODEL_PATH)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="liczba wierszy w paczce")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="liczba procesow (-1 = liczba rdzeni)")
+    parser.add_argument('--format', choices=FORMATS, default='parquet')
+    parser.add_argument('--paths', action='store_true', help="dolacz zwarta sciezke decyzji (kolumna path)")
+    parser.add_argument('--restart', action='store_true', help="ignoruj punkt kontrolny i licz od poczatku")
+    parser.add_argument('--quiet', action='store_true', help="bez raportu postepu")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        summary = score_file(args.input, args.output, args.model, args.chunk_size, args.n_jobs, args.format,
+                             args.paths, resume=not args.restart, progress=not args.quiet)
+    except CheckpointMismatch as error:
+        print(error, file=sys.stderr)
+        return 2
+    print(f"Ocenione: {summary['scored']:,} wierszy, pominiete (punkt kontrolny): {summary['skipped']:,}, "
+          f"czesci: {summary['parts']}, {summary['rows_per_s']:,.0f} wierszy/s, {summary['wall_time']:.1f} s "
+          f"-> {summary['output']}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,287 @@
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from .agent import TravelAgent, UserPreferences
+    from .decision_table import LEVELS
+    from .hashing import file_hash
+except ImportError:
+    from agent import TravelAgent, UserPreferences
+    from decision_table import LEVELS
+    from hashing import file_hash
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+AGENT_DIR = Path(__file__).resolve().parent
+MODEL_PATH = BASE_DIR / "models" / "model_tree.pkl"
+RESULTS_DIR = BASE_DIR / "benchmarks"
+BASELINE_PATH = RESULTS_DIR / "baseline.json"
+
+SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+# Sciezki jako listy slownikow sa drogie w pamieci - powyzej tego rozmiaru mierzymy tylko tablice
+MAX_DICT_PATHS = 100_000
+MEMORY_SIZE = 10_000
+THRESHOLD = 0.2
+
+IMPORT_STATEMENT = 'from agent import TravelAgent'
+# Ciezkie zaleznosci, ktore nie powinny byc ladowane przy samym imporcie agenta
+HEAVY_MODULES = ('joblib', 'sklearn', 'pandas', 'scipy', 'requests', 'tornado', 'matplotlib', 'pyarrow')
+
+# Kierunek metryki wynika z jednostki w nazwie
+HIGHER_IS_BETTER = ('_per_s',)
+
+
+def random_preferences(n: int, seed: int = 0) -> List[UserPreferences]:
+    rng = np.random.default_rng(seed)
+    columns = zip(
+        rng.integers(1, 6, n).tolist(),
+        rng.integers(1, 6, n).tolist(),
+        rng.integers(0, 3, n).tolist(),
+        rng.integers(0, 2, n).tolist(),
+        np.array(LEVELS)[rng.integers(0, 3, n)].tolist(),
+        np.array(LEVELS)[rng.integers(0, 3, n)].tolist(),
+    )
+    return [UserPreferences(*values) for values in columns]
+
+
+def measure(fn: Callable[[], object], min_time: float = 0.1, repeat: int = 5) -> float:
+    # Jak timeit.autorange: tyle petli, zeby pomiar trwal min_time, potem mediana z powtorzen
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+
+    times = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        times.append((time.perf_counter() - start) / loops)
+    return float(np.median(times))
+
+
+def latencies(fn: Callable[[object], object], inputs: list) -> Dict[str, float]:
+    samples = np.empty(len(inputs))
+    for i, item in enumerate(inputs):
+        start = time.perf_counter_ns()
+        fn(item)
+        samples[i] = time.perf_counter_ns() - start
+    samples /= 1000.0
+    return {
+        'p50_us': float(np.percentile(samples, 50)),
+        'p99_us': float(np.percentile(samples, 99)),
+        'mean_us': float(samples.mean()),
+    }
+
+
+def peak_bytes(fn: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def import_profile(statement: str = IMPORT_STATEMENT, cwd=AGENT_DIR) -> Dict[str, dict]:
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            cwd=cwd, capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = {'self_us': int(self_us), 'cumulative_us': int(cumulative_us)}
+    return profile
+
+
+def import_times(statement: str = IMPORT_STATEMENT, runs: int = 5, cwd=AGENT_DIR) -> dict:
+    # Moduly ladowane przy starcie samego interpretera nie obciazaja importu agenta
+    startup = set(import_profile('pass', cwd))
+    measured = []
+    for _ in range(runs):
+        profile = {name: times for name, times in import_profile(statement, cwd).items() if name not in startup}
+        measured.append((sum(times['self_us'] for times in profile.values()), profile))
+
+    total_us, profile = sorted(measured, key=lambda item: item[0])[len(measured) // 2]
+    return {
+        'total_us': total_us,
+        'modules': len(profile),
+        'heavy': [name for name in HEAVY_MODULES if name in profile],
+        'top': sorted(profile.items(), key=lambda item: -item[1]['self_us'])[:10],
+    }
+
+
+def run_benchmarks(model_path=MODEL_PATH, sizes: Optional[List[int]] = None, n_single: int = 2000,
+                   min_time: float = 0.1, repeat: int = 5, memory_size: int = MEMORY_SIZE,
+                   import_runs: int = 5, log=print) -> Dict[str, float]:
+    sizes = SIZES if sizes is None else sizes
+    results = {}
+
+    # IMPORT (python -X importtime w osobnym procesie)
+    if import_runs:
+        imports = import_times(runs=import_runs)
+        results['import.agent_us'] = imports['total_us']
+        results['import.modules_count'] = imports['modules']
+        results['import.heavy_modules_count'] = len(imports['heavy'])
+        log(f"import: {imports['total_us'] / 1000:.1f} ms, {imports['modules']} modulow, "
+            f"ciezkie: {', '.join(imports['heavy']) or 'brak'}")
+        for name, times in imports['top'][:5]:
+            log(f"  {name:<40} {times['self_us'] / 1000:.1f} ms")
+
+    # LADOWANIE - pierwsze wywolanie rozgrzewa leniwe importy (joblib/sklearn dla .pkl)
+    TravelAgent(model_path)
+    results['load.agent_s'] = measure(lambda: TravelAgent(model_path), min_time, repeat)
+    results['load.agent_table_s'] = measure(lambda: TravelAgent(model_path, use_table=True, save_table=False),
+                                            min_time, repeat)
+    log(f"load: {results['load.agent_s'] * 1000:.2f} ms (z tabela {results['load.agent_table_s'] * 1000:.2f} ms)")
+
+    agent = TravelAgent(model_path)
+    table_agent = TravelAgent(model_path, use_table=True, save_table=False)
+
+    # POJEDYNCZE DECYZJE
+    inputs = random_preferences(n_single, seed=1)
+    agent.decide(inputs[0])
+    for name, target in (('decide', agent), ('decide_table', table_agent)):
+        for key, value in latencies(target.decide, inputs).items():
+            results[f'{name}.{key}'] = value
+        log(f"{name}: p50 {results[f'{name}.p50_us']:.1f} us, p99 {results[f'{name}.p99_us']:.1f} us")
+
+    # PACZKI I SCIEZKI
+    prefs = random_preferences(max(sizes), seed=2)
+    for n in sizes:
+        batch = prefs[:n]
+        X = agent.encode_batch(batch)
+        timings = {
+            'encode': measure(lambda: agent.encode_batch(batch), min_time, repeat),
+            'batch': measure(lambda: agent.decide_batch(batch, include_paths=False), min_time, repeat),
+            'paths': measure(lambda: agent.extract_decision_paths(X), min_time, repeat),
+        }
+        if n <= MAX_DICT_PATHS:
+            timings['batch_paths'] = measure(lambda: agent.decide_batch(batch), min_time, repeat)
+            timings['path_dicts'] = measure(lambda: agent.extract_decision_paths(X, as_dicts=True), min_time, repeat)
+
+        for name, seconds in timings.items():
+            results[f'{name}.n={n}.us_per_row'] = seconds / n * 1e6
+            results[f'{name}.n={n}.rows_per_s'] = n / seconds
+        log(f"n={n}: batch {n / timings['batch']:,.0f} wierszy/s, sciezki {timings['paths'] / n * 1e6:.2f} us/wiersz")
+
+    # PAMIEC NA DECYZJE
+    batch = prefs[:memory_size] if len(prefs) >= memory_size else random_preferences(memory_size, seed=2)
+    results['memory.batch.bytes_per_decision'] = peak_bytes(
+        lambda: agent.decide_batch(batch, include_paths=False)) / len(batch)
+    results['memory.batch_paths.bytes_per_decision'] = peak_bytes(lambda: agent.decide_batch(batch)) / len(batch)
+    log(f"pamiec: {results['memory.batch.bytes_per_decision']:.0f} B/decyzje "
+        f"(ze sciezkami {results['memory.batch_paths.bytes_per_decision']:.0f} B)")
+
+    return results
+
+
+def environment(model_path) -> dict:
+    import sklearn
+
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'model_hash': file_hash(model_path),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float = THRESHOLD) -> List[dict]:
+    rows = []
+    for name in sorted(set(results) & set(baseline)):
+        old, new = baseline[name], results[name]
+        higher_is_better = name.endswith(HIGHER_IS_BETTER)
+        # change > 0 oznacza pogorszenie niezaleznie od kierunku metryki
+        delta = old - new if higher_is_better else new - old
+        if old == 0:
+            # Zerowa baza (np. import.heavy_modules_count): kazde pogorszenie jest regresja
+            change = 0.0 if delta == 0 else float('inf') if delta > 0 else float('-inf')
+        else:
+            change = delta / old
+        rows.append({'metric': name, 'baseline': old, 'current': new, 'change': change,
+                     'regression': change > threshold})
+    return rows
+
+
+def load_report(path) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def save_report(report: dict, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(json.dumps(report, indent=2))
+    tmp_path.replace(path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark TravelAgent")
+    parser.add_argument('--model', type=Path, default=MODEL_PATH)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="rozmiary paczek")
+    parser.add_argument('--max-size', type=int, default=None, help="pomin rozmiary wieksze niz ten")
+    parser.add_argument('--single', type=int, default=2000, help="liczba pojedynczych wywolan decide")
+    parser.add_argument('--min-time', type=float, default=0.1, help="minimalny czas jednego pomiaru [s]")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--import-runs', type=int, default=5, help="powtorzenia pomiaru importu (0 = pomin)")
+    parser.add_argument('--output', '-o', type=Path, default=None, help="plik JSON z wynikami")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help="wyniki odniesienia do porownania")
+    parser.add_argument('--save-baseline', action='store_true', help="zapisz wyniki jako nowy baseline")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help="dopuszczalne pogorszenie (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    sizes = [n for n in args.sizes if args.max_size is None or n <= args.max_size]
+
+    results = run_benchmarks(args.model, sizes, args.single, args.min_time, args.repeat,
+                             import_runs=args.import_runs)
+    report = {'environment': environment(args.model), 'results': results}
+
+    if args.output is not None:
+        save_report(report, args.output)
+        print(f"Wyniki zapisane do {args.output}")
+    if args.save_baseline:
+        save_report(report, args.baseline)
+        print(f"Nowy baseline: {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"Brak baseline ({args.baseline}) - uruchom z --save-baseline")
+        return 0
+
+    rows = compare(results, load_report(args.baseline)['results'], args.threshold)
+    regressions = [row for row in rows if row['regression']]
+    print(f"\nPorownanie z {args.baseline} (prog {args.threshold:.0%}):")
+    for row in rows:
+        marker = "REGRESJA" if row['regression'] else ""
+        print(f"  {row['metric']:<40} {row['baseline']:>14.3f} -> {row['current']:>14.3f} "
+              f"({row['change']:+.1%}) {marker}")
+    print(f"Regresje: {len(regressions)}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
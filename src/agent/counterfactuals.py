@@ -0,0 +1,120 @@
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+try:
+    from .agent import UserPreferences
+    from .decision_table import SPACE, all_preferences, preference_index
+except ImportError:
+    from agent import UserPreferences
+    from decision_table import SPACE, all_preferences, preference_index
+
+FEATURES = [name for name, _ in SPACE]
+
+# Koszt zmiany cechy o jeden poziom; budzet uzytkownika trudniej zmienic niz wybrac inna oferte
+DEFAULT_WEIGHTS = {
+    'travel_comfort': 1.0,
+    'attractions_quality': 1.0,
+    'activities_match': 1.0,
+    'season_match': 1.0,
+    'user_budget': 2.0,
+    'trip_cost': 1.0,
+}
+
+MESSAGES = {
+    'travel_comfort': "Wybierz oferte z komfortem podrozy {target} (obecnie {current})",
+    'attractions_quality': "Wybierz miejsce z atrakcjami na poziomie {target} (obecnie {current})",
+    'activities_match': "Wybierz oferte lepiej dopasowana do zainteresowan (dopasowanie {current} -> {target})",
+    'season_match': "Rozwaz inny termin wyjazdu",
+    'user_budget': "Zmien budzet: {current} -> {target}",
+    'trip_cost': "Wybierz oferte o koszcie {target} (obecnie {current})",
+}
+
+
+@dataclass
+class Change:
+    feature: str
+    current: object
+    target: object
+
+
+@dataclass
+class Counterfactual:
+    changes: List[Change]
+    cost: float
+    probability: float
+    target: UserPreferences
+
+    def recommendations(self) -> List[str]:
+        return [MESSAGES[c.feature].format(current=c.current, target=c.target) for c in self.changes]
+
+
+def grid_positions() -> np.ndarray:
+    # Pozycja porzadkowa kazdej cechy w przestrzeni wejsc (kolejnosc jak w DecisionTable)
+    positions = np.indices([len(values) for _, values in SPACE]).reshape(len(SPACE), -1).T
+    return positions.astype(np.int16)
+
+
+class CounterfactualEngine:
+    def __init__(self, agent, weights: Optional[Dict[str, float]] = None, immutable: Iterable[str] = ()):
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.immutable = tuple(immutable)
+        unknown = set(self.weights) | set(self.immutable)
+        unknown -= set(FEATURES)
+        if unknown:
+            raise ValueError(f"Nieznane cechy: {sorted(unknown)}")
+
+        self.preferences = all_preferences()
+        decisions = agent.decide_batch(self.preferences, include_paths=False)
+        self.accepted = np.array([bool(d.accepted) for d in decisions])
+        self.probability = np.array([d.probability for d in decisions], dtype=np.float64)
+        self.positions = grid_positions()
+        self.target, self.cost = self._solve()
+        # Zbior zmienianych cech dla kazdego punktu liczony raz, zapytanie to tylko odczyt
+        self.changed = self.positions != self.positions[np.maximum(self.target, 0)]
+
+    def _solve(self):
+        # Koszt przejscia z kazdego punktu do kazdego akceptowanego punktu przestrzeni (1350 x k)
+        targets = np.flatnonzero(self.accepted)
+        n = len(self.positions)
+        if not len(targets):
+            return np.full(n, -1, dtype=np.int32), np.full(n, np.inf)
+
+        cost = np.zeros((n, len(targets)))
+        for f, name in enumerate(FEATURES):
+            delta = np.abs(self.positions[:, f, np.newaxis] - self.positions[np.newaxis, targets, f])
+            if name in self.immutable:
+                cost[delta != 0] = np.inf
+            else:
+                cost += self.weights[name] * delta
+
+        # Najtanszy cel; przy rownym koszcie wygrywa wyzsze prawdopodobienstwo akceptacji
+        best_cost = cost.min(axis=1)
+        tie_break = np.where(cost == best_cost[:, np.newaxis], self.probability[targets], -1.0)
+        best = targets[tie_break.argmax(axis=1)]
+        best[~np.isfinite(best_cost)] = -1
+        return best.astype(np.int32), best_cost
+
+    def query_index(self, indices: np.ndarray) -> List[Optional[Counterfactual]]:
+        results = []
+        for index in np.asarray(indices):
+            if index < 0 or self.accepted[index] or self.target[index] < 0:
+                results.append(None)
+                continue
+            target = int(self.target[index])
+            current = self.preferences[index]
+            goal = self.preferences[target]
+            changes = [
+                Change(FEATURES[f], getattr(current, FEATURES[f]), getattr(goal, FEATURES[f]))
+                for f in np.flatnonzero(self.changed[index])
+            ]
+            results.append(Counterfactual(changes, float(self.cost[index]), float(self.probability[target]),
+                                          replace(goal)))
+        return results
+
+    def query_batch(self, prefs_list: List[UserPreferences]) -> List[Optional[Counterfactual]]:
+        return self.query_index(np.array([preference_index(prefs) for prefs in prefs_list], dtype=np.int64))
+
+    def query(self, prefs: UserPreferences) -> Optional[Counterfactual]:
+        return self.query_batch([prefs])[0]
@@ -0,0 +1,156 @@
+from itertools import product
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    from .agent import Decision, UserPreferences
+    from .hashing import file_hash
+except ImportError:
+    from agent import Decision, UserPreferences
+    from hashing import file_hash
+
+TABLE_VERSION = 1
+LEVELS = ['low', 'medium', 'high']
+LEVEL_INDEX = {level: i for i, level in enumerate(LEVELS)}
+
+# Kolejnosc pol wyznacza uklad tabeli (indeks mieszany, ostatnie pole najszybsze)
+SPACE = [
+    ('travel_comfort', range(1, 6)),
+    ('attractions_quality', range(1, 6)),
+    ('activities_match', range(0, 3)),
+    ('season_match', range(0, 2)),
+    ('user_budget', LEVELS),
+    ('trip_cost', LEVELS),
+]
+TABLE_SIZE = int(np.prod([len(values) for _, values in SPACE]))
+
+
+def all_preferences() -> List[UserPreferences]:
+    return [UserPreferences(*values) for values in product(*(values for _, values in SPACE))]
+
+
+def preference_index(prefs: UserPreferences) -> int:
+    index = 0
+    for name, values in SPACE:
+        value = getattr(prefs, name)
+        if values is LEVELS:
+            position = LEVEL_INDEX.get(value, -1)
+        elif value in values:
+            position = int(value) - values.start
+        else:
+            position = -1
+        if position < 0:
+            return -1
+        index = index * len(values) + position
+    return index
+
+
+def table_path_for(model_path) -> Path:
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.stem + '.table.npz')
+
+
+class DecisionTable:
+    def __init__(self, agent, model_hash: str, accepted: np.ndarray, probability: np.ndarray,
+                 leaves: np.ndarray, scores: np.ndarray, X: np.ndarray):
+        self.model_hash = model_hash
+        self.accepted = accepted
+        self.probability = probability
+        self.leaves = leaves
+        self.scores = scores
+        self.X = X
+        self._decisions = self._materialize(agent)
+
+    @classmethod
+    def build(cls, agent, model_hash: str) -> "DecisionTable":
+        prefs_list = all_preferences()
+        scores = np.array([prefs.compute_score() for prefs in prefs_list], dtype=np.int8)
+        # Tabela w ukladzie kolumn modelu glownego (przy modelach shadow koder ma dodatkowe kolumny)
+        X = agent.encode_batch(prefs_list, scores)[:, :len(agent.feature_names)]
+
+        leaves = agent.engine.apply(X)
+        probability = agent.engine.proba[leaves, 1]
+        accepted = agent.engine.classes[agent.engine.proba[leaves].argmax(axis=1)] == 1
+
+        return cls(agent, model_hash, accepted, probability, leaves.astype(np.int32), scores, X)
+
+    @classmethod
+    def load(cls, agent, path, model_hash: str) -> Optional["DecisionTable"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != TABLE_VERSION or str(data['model_hash']) != model_hash:
+                return None
+            if data['X'].shape != (TABLE_SIZE, len(agent.feature_names)):
+                return None
+            return cls(agent, model_hash, data['accepted'], data['probability'],
+                       data['leaves'], data['scores'], data['X'])
+
+    @classmethod
+    def load_or_build(cls, agent, model_path, save: bool = True) -> "DecisionTable":
+        model_hash = file_hash(model_path)
+        path = table_path_for(model_path)
+
+        table = cls.load(agent, path, model_hash)
+        if table is None:
+            table = cls.build(agent, model_hash)
+            if save:
+                try:
+                    table.save(path)
+                except OSError:
+                    pass
+        return table
+
+    def save(self, path):
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                version=np.array(TABLE_VERSION),
+                model_hash=np.array(self.model_hash),
+                accepted=self.accepted,
+                probability=self.probability,
+                leaves=self.leaves,
+                scores=self.scores,
+                X=self.X
+            )
+        tmp_path.replace(path)
+
+    def _materialize(self, agent) -> List[Decision]:
+        paths = agent.engine.decision_paths(leaves=self.leaves.astype(np.intp))
+        decisions = []
+        for i in range(TABLE_SIZE):
+            nodes, directions = paths.row(i)
+            decisions.append(agent._build_decision(
+                int(self.scores[i]),
+                1 if self.accepted[i] else 0,
+                self.probability[i],
+                agent._path_to_dicts(self.X[i], nodes, directions),
+                left_features=agent._left_features(nodes, directions)
+            ))
+        if agent.ensemble is not None:
+            agent._attach_shadow(decisions, agent.encode_batch(all_preferences(), self.scores))
+        if agent.counterfactuals is not None:
+            agent._attach_counterfactuals(decisions, all_preferences())
+        return decisions
+
+    def lookup(self, prefs: UserPreferences) -> Optional[Decision]:
+        index = preference_index(prefs)
+        if index < 0:
+            return None
+
+        decision = self._decisions[index]
+        return Decision(
+            accepted=decision.accepted,
+            probability=decision.probability,
+            explanation=decision.explanation,
+            recommended_changes=list(decision.recommended_changes) if decision.recommended_changes is not None else None,
+            decision_path=[dict(step) for step in decision.decision_path],
+            counterfactual=decision.counterfactual,
+            shadow={**decision.shadow, 'probabilities': dict(decision.shadow['probabilities'])} if decision.shadow is not None else None
+        )
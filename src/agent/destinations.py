@@ -0,0 +1,211 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    from .activity_catalog import ActivityCatalog
+except ImportError:
+    from activity_catalog import ActivityCatalog
+
+PRESET_CITIES = {
+    "Paris": {
+        "total": 232,
+        "quality": 5,
+        "offers": ["culture", "food", "romance", "shopping", "history"]
+    },
+    "London": {
+        "total": 215,
+        "quality": 5,
+        "offers": ["culture", "shopping", "nightlife", "history", "music"]
+    },
+    "Rome": {
+        "total": 198,
+        "quality": 4,
+        "offers": ["culture", "history", "food", "romance"]
+    },
+    "Barcelona": {
+        "total": 187,
+        "quality": 4,
+        "offers": ["culture", "beach", "nightlife", "food", "sport"]
+    },
+    "Amsterdam": {
+        "total": 165,
+        "quality": 4,
+        "offers": ["culture", "nightlife", "family", "history"]
+    },
+    "Prague": {
+        "total": 142,
+        "quality": 4,
+        "offers": ["culture", "romance", "history", "nightlife"]
+    },
+    "Vienna": {
+        "total": 138,
+        "quality": 4,
+        "offers": ["culture", "history", "music", "food"]
+    },
+    "Berlin": {
+        "total": 125,
+        "quality": 4,
+        "offers": ["culture", "nightlife", "history", "shopping"]
+    },
+    "Warsaw": {
+        "total": 82,
+        "quality": 3,
+        "offers": ["culture", "history", "family", "food"]
+    },
+    "Lisbon": {
+        "total": 95,
+        "quality": 3,
+        "offers": ["culture", "beach", "food", "nightlife"]
+    },
+    "Budapest": {
+        "total": 88,
+        "quality": 3,
+        "offers": ["culture", "history", "spa", "nightlife"]
+    },
+    "Copenhagen": {
+        "total": 76,
+        "quality": 3,
+        "offers": ["culture", "family", "design", "food"]
+    },
+    "Dublin": {
+        "total": 65,
+        "quality": 3,
+        "offers": ["culture", "nightlife", "nature", "music"]
+    },
+    "Krakow": {
+        "total": 45,
+        "quality": 2,
+        "offers": ["culture", "history", "food", "nightlife"]
+    },
+    "Porto": {
+        "total": 38,
+        "quality": 2,
+        "offers": ["culture", "food", "beach", "history"]
+    }
+}
+
+ALL_ACTIVITIES = [
+    "culture", "history", "food", "beach", "nightlife", 
+    "shopping", "nature", "family", "romance", "sport", 
+    "music", "design", "spa"
+]
+
+ACTIVITY_CATALOG = ActivityCatalog(ALL_ACTIVITIES)
+
+
+def calculate_activities_match(city_offers, user_interests, catalog: ActivityCatalog = ACTIVITY_CATALOG):
+    return int(catalog.match(catalog.mask(city_offers)[np.newaxis, :], user_interests)[0])
+
+
+@dataclass
+class RankedDestination:
+    name: str
+    probability: float
+    accepted: bool
+    total: int
+    quality: int
+    match: int
+    common: List[str]
+
+
+class DestinationIndex:
+    def __init__(self, names, totals, qualities, offer_masks, catalog: ActivityCatalog = ACTIVITY_CATALOG):
+        self.catalog = catalog
+        self.names = np.asarray(names, dtype=object)
+        self.totals = np.asarray(totals, dtype=np.int64)
+        self.qualities = np.asarray(qualities, dtype=np.int8)
+        self.offer_masks = np.asarray(offer_masks, dtype=np.uint64).reshape(len(self.names), catalog.n_words)
+        self._inverted = None
+    
+    @classmethod
+    def from_cities(cls, cities: dict, catalog: ActivityCatalog = ACTIVITY_CATALOG) -> "DestinationIndex":
+        return cls(
+            list(cities),
+            [city["total"] for city in cities.values()],
+            [city["quality"] for city in cities.values()],
+            catalog.pack([city["offers"] for city in cities.values()]),
+            catalog
+        )
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    @property
+    def inverted(self):
+        if self._inverted is None:
+            self._inverted = self.catalog.inverted_index(self.offer_masks)
+        return self._inverted
+    
+    def offers(self, i: int) -> List[str]:
+        return self.catalog.decode(self.offer_masks[i])
+    
+    def matches(self, user_interests, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        masks = self.offer_masks if rows is None else self.offer_masks[rows]
+        return self.catalog.match(masks, user_interests)
+
+
+def _top_k(k: int, *keys: np.ndarray) -> np.ndarray:
+    # Te same k wierszy co stabilne sortowanie malejaco po kolejnych kluczach, bez sortowania calosci:
+    # prog k-tej wartosci pierwszego klucza, remisy na progu rozstrzyga nastepny klucz, a na koncu pozycja
+    selected = np.arange(len(keys[0]))
+    chosen = []
+    for key in keys:
+        values = key[selected]
+        threshold = np.partition(values, len(values) - k)[len(values) - k]
+        chosen.append(selected[values > threshold])
+        selected = selected[values == threshold]
+        k -= len(chosen[-1])
+    chosen.append(selected[:k])
+    return np.sort(np.concatenate(chosen))
+
+
+def rank_destinations(agent, preferences, interests, cities, k: Optional[int] = 10,
+                      min_match: int = 0) -> List[RankedDestination]:
+    index = cities if isinstance(cities, DestinationIndex) else DestinationIndex.from_cities(cities)
+    
+    # Przy duzych katalogach indeks odwrotny odrzuca miasta bez wspolnych zainteresowan przed ocena modelu
+    rows = index.inverted.candidates(interests, min_match) if interests else None
+    if rows is None:
+        rows = np.arange(len(index))
+    if len(rows) == 0:
+        return []
+    
+    # Pola zwiazane z miastem (jakosc atrakcji, dopasowanie) pochodza z indeksu, reszta z preferencji
+    matches = index.matches(interests, rows)
+    X = agent.encode_columns({
+        'travel_comfort': preferences.travel_comfort,
+        'attractions_quality': index.qualities[rows],
+        'activities_match': matches,
+        'season_match': preferences.season_match,
+        'user_budget': preferences.user_budget,
+        'trip_cost': preferences.trip_cost,
+    })
+    proba = agent.engine.predict_proba(X)
+    probability = proba[:, 1]
+    accepted = agent.engine.classes[proba.argmax(axis=1)] == 1
+    
+    totals = index.totals[rows]
+    if k is not None and k < len(rows):
+        candidates = _top_k(k, probability, totals)
+    else:
+        candidates = np.arange(len(rows))
+    order = candidates[np.lexsort((-totals[candidates], -probability[candidates]))]
+    
+    user_set = set(interests)
+    return [
+        RankedDestination(
+            name=index.names[rows[i]],
+            probability=float(probability[i]),
+            accepted=bool(accepted[i]),
+            total=int(totals[i]),
+            quality=int(index.qualities[rows[i]]),
+            match=int(matches[i]),
+            common=[activity for activity in index.offers(rows[i]) if activity in user_set]
+        )
+        for i in order
+    ]
+
+
+PRESET_INDEX = DestinationIndex.from_cities(PRESET_CITIES)
@@ -0,0 +1,173 @@
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+NUMERIC_FEATURES = ['travel_comfort', 'attractions_quality', 'activities_match', 'season_match', 'score']
+CATEGORIES = {
+    'user_budget': ['high', 'low', 'medium'],
+    'trip_cost': ['high', 'low', 'medium'],
+}
+SCORE_INPUTS = ['travel_comfort', 'attractions_quality', 'activities_match', 'season_match', 'user_budget', 'trip_cost']
+
+
+def compute_scores(travel_comfort, attractions_quality, activities_match, season_match,
+                   user_budget, trip_cost) -> np.ndarray:
+    comfort = np.asarray(travel_comfort)
+    quality = np.asarray(attractions_quality)
+    budget = np.asarray(user_budget)
+    cost = np.asarray(trip_cost)
+
+    score = np.where(comfort >= 4, 2, np.where(comfort >= 3, 1, 0))
+    score = score + np.where(quality >= 4, 2, np.where(quality >= 3, 1, 0))
+    score = score + np.asarray(activities_match)
+    score = score + (np.asarray(season_match) == 1)
+    score = score + np.where(budget == cost, 2, np.where((budget == "high") & (cost != "high"), 1, 0))
+    return score
+
+
+class FeatureEncoder:
+    def __init__(self, numeric: Optional[List[str]] = None, categories: Optional[dict] = None,
+                 feature_order: Optional[List[str]] = None, dtype: str = 'float32'):
+        # Parametry zostaja bez zmian (wymog sklearn.clone), uklad kolumn liczymy osobno
+        self.numeric = numeric
+        self.categories = categories
+        self.feature_order = feature_order
+        self.dtype = dtype
+        self._build_layout()
+
+    def _build_layout(self):
+        numeric = NUMERIC_FEATURES if self.numeric is None else self.numeric
+        categories = CATEGORIES if self.categories is None else self.categories
+
+        default_order = list(numeric) + [f"{name}_{level}" for name, levels in categories.items() for level in levels]
+        self.feature_names_ = list(self.feature_order) if self.feature_order is not None else default_order
+        index = {name: i for i, name in enumerate(self.feature_names_)}
+
+        unknown = set(self.feature_names_) - set(default_order)
+        if unknown:
+            raise ValueError(f"Nieznane cechy w feature_order: {sorted(unknown)}")
+
+        self._numeric_columns = [(name, index[name]) for name in numeric if name in index]
+        self._categorical_columns = [
+            (name, [(level, index.get(f"{name}_{level}")) for level in levels])
+            for name, levels in categories.items()
+        ]
+        self.n_features_out_ = len(self.feature_names_)
+
+    @classmethod
+    def from_feature_names(cls, feature_names: List[str]) -> "FeatureEncoder":
+        feature_names = list(feature_names)
+        categories = {
+            name: [f[len(name) + 1:] for f in feature_names if f.startswith(name + '_')]
+            for name in CATEGORIES
+        }
+        numeric = [name for name in feature_names if not any(name.startswith(c + '_') for c in CATEGORIES)]
+        return cls(numeric=numeric, categories=categories, feature_order=feature_names)
+
+    def get_params(self, deep: bool = True) -> dict:
+        return {
+            'numeric': self.numeric,
+            'categories': self.categories,
+            'feature_order': self.feature_order,
+            'dtype': self.dtype,
+        }
+
+    def set_params(self, **params) -> "FeatureEncoder":
+        for key, value in params.items():
+            setattr(self, key, value)
+        self._build_layout()
+        return self
+
+    def fit(self, X=None, y=None) -> "FeatureEncoder":
+        # Slowniki kategorii sa stale, wiec fit niczego nie uczy - jest dla zgodnosci z Pipeline
+        return self
+
+    def fit_transform(self, X, y=None, out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self.fit(X, y).transform(X, out=out)
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        return np.asarray(self.feature_names_, dtype=object)
+
+    def transform(self, X, out: Optional[np.ndarray] = None) -> np.ndarray:
+        columns = self._columns(X)
+        n = len(columns[next(iter(columns))]) if columns else 0
+
+        if out is None:
+            out = np.empty((n, self.n_features_out_), dtype=self.dtype)
+        elif out.shape != (n, self.n_features_out_):
+            raise ValueError(f"Bufor ma ksztalt {out.shape}, oczekiwano {(n, self.n_features_out_)}")
+
+        for name, col in self._numeric_columns:
+            if name == 'score' and name not in columns:
+                out[:, col] = compute_scores(*(columns[field] for field in SCORE_INPUTS))
+            else:
+                out[:, col] = columns[name]
+
+        for name, levels in self._categorical_columns:
+            values = columns[name]
+            codes = getattr(values, 'codes', None)
+            if codes is not None:
+                # Kolumna kategoryczna pandas: porownujemy kody zamiast tekstow
+                lookup = {level: i for i, level in enumerate(values.categories)}
+                for level, col in levels:
+                    if col is not None:
+                        out[:, col] = codes == lookup.get(level, -2)
+            else:
+                for level, col in levels:
+                    if col is not None:
+                        out[:, col] = values == level
+
+        return out
+
+    def _columns(self, X) -> dict:
+        names = [name for name, _ in self._numeric_columns] + [name for name, _ in self._categorical_columns]
+        names += [name for name in SCORE_INPUTS if name not in names]
+
+        if hasattr(X, 'columns'):
+            columns = {name: self._column_values(X[name]) for name in names if name in X.columns}
+        elif isinstance(X, dict):
+            present = [name for name in names if name in X]
+            arrays = np.broadcast_arrays(*(np.atleast_1d(np.asarray(X[name])) for name in present))
+            columns = dict(zip(present, arrays))
+        else:
+            X = list(X)
+            columns = {
+                name: np.array([getattr(row, name) for row in X])
+                for name in names if name != 'score' or (X and hasattr(X[0], 'score'))
+            }
+
+        missing = [name for name, _ in self._numeric_columns if name not in columns and name != 'score']
+        missing += [name for name, _ in self._categorical_columns if name not in columns]
+        if missing:
+            raise KeyError(f"Brak kolumn wejsciowych: {missing}")
+        return columns
+
+    @staticmethod
+    def _column_values(series):
+        if hasattr(series, 'cat'):
+            return series.array
+        return series.to_numpy()
+
+    def to_dict(self) -> dict:
+        return {
+            'numeric': [name for name, _ in self._numeric_columns],
+            'categories': {name: [level for level, _ in levels] for name, levels in self._categorical_columns},
+            'feature_order': self.feature_names_,
+            'dtype': self.dtype,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeatureEncoder":
+        return cls(**data)
+
+    def save(self, path):
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(json.dumps(self.to_dict(), indent=2))
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path) -> "FeatureEncoder":
+        return cls.from_dict(json.loads(Path(path).read_text()))
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .agent import UserPreferences
+    from .encoding import FeatureEncoder, SCORE_INPUTS
+    from .model_artifact import load_model
+    from .tree_engine import TREE_LEAF, CompiledTree
+except ImportError:
+    from agent import UserPreferences
+    from encoding import FeatureEncoder, SCORE_INPUTS
+    from model_artifact import load_model
+    from tree_engine import TREE_LEAF, CompiledTree
+
+
+@dataclass
+class EnsembleResult:
+    # probabilities: (n_wierszy, n_modeli) - prawdopodobienstwo akceptacji z kazdego modelu
+    probabilities: np.ndarray
+    leaves: np.ndarray
+    mean: np.ndarray
+    votes: np.ndarray
+    n_models: int
+
+    @property
+    def accepted_mean(self) -> np.ndarray:
+        return self.mean > 0.5
+
+    @property
+    def accepted_vote(self) -> np.ndarray:
+        return self.votes * 2 > self.n_models
+
+    @property
+    def agreement(self) -> np.ndarray:
+        # Udzial modeli zgodnych z wiekszoscia
+        return np.maximum(self.votes, self.n_models - self.votes) / self.n_models
+
+
+class TreeEnsemble:
+    def __init__(self, trees: Sequence[CompiledTree], feature_names: Sequence[Sequence[str]],
+                 names: Optional[Sequence[str]] = None):
+        if not trees:
+            raise ValueError("Zespol wymaga co najmniej jednego drzewa")
+        classes = trees[0].classes
+        if any(not np.array_equal(tree.classes, classes) for tree in trees):
+            raise ValueError("Wszystkie modele musza miec te same klasy")
+
+        # Wspolny uklad kolumn: kazde wejscie kodowane raz, cechy drzew mapowane na te kolumny
+        self.feature_names = list(dict.fromkeys(name for names_ in feature_names for name in names_))
+        column = {name: i for i, name in enumerate(self.feature_names)}
+        self.encoder = FeatureEncoder.from_feature_names(self.feature_names)
+        self.classes = classes
+        self.names = list(names) if names is not None else [f"model_{i}" for i in range(len(trees))]
+        self.n_models = len(trees)
+        self.positive = int(np.flatnonzero(classes == 1)[0]) if np.any(classes == 1) else len(classes) - 1
+
+        # Wezly wszystkich drzew w jednej tablicy; lisc wskazuje sam na siebie, wiec po max_depth krokach
+        # kazdy wiersz stoi w lisciu niezaleznie od glebokosci drzewa
+        lefts, rights, features, thresholds, probas, roots = [], [], [], [], [], []
+        offset = 0
+        for tree, names_ in zip(trees, feature_names):
+            index = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left == TREE_LEAF
+            lefts.append(np.where(is_leaf, index, tree.children_left + offset))
+            rights.append(np.where(is_leaf, index, tree.children_right + offset))
+            features.append(np.array([column[name] for name in names_], dtype=np.intp)[tree.feature])
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            probas.append(tree.proba)
+            roots.append(offset)
+            offset += tree.node_count
+
+        self.children_left = np.concatenate(lefts).astype(np.intp)
+        self.children_right = np.concatenate(rights).astype(np.intp)
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.proba = np.concatenate(probas)
+        self.roots = np.array(roots, dtype=np.intp)
+        self.max_depth = max(tree.max_depth for tree in trees)
+
+    @classmethod
+    def from_paths(cls, paths: Sequence) -> "TreeEnsemble":
+        loaded = [load_model(path) for path in paths]
+        return cls([tree for tree, _, _ in loaded], [names for _, names, _ in loaded],
+                   names=[str(path) for path in paths])
+
+    def encode_batch(self, prefs_list: List[UserPreferences]) -> np.ndarray:
+        return self.encoder.transform({name: [getattr(p, name) for p in prefs_list] for name in SCORE_INPUTS})
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (len(X), self.n_models)).copy()
+        for _ in range(self.max_depth):
+            go_right = X[rows, self.feature[node]] > self.threshold[node]
+            node = np.where(go_right, self.children_right[node], self.children_left[node])
+        return node
+
+    def evaluate(self, X: np.ndarray) -> EnsembleResult:
+        leaves = self.apply(X)
+        probabilities = self.proba[leaves, self.positive]
+        accepted = self.classes[self.proba[leaves].argmax(axis=2)] == self.classes[self.positive]
+        return EnsembleResult(
+            probabilities=probabilities,
+            leaves=leaves - self.roots,
+            mean=probabilities.mean(axis=1),
+            votes=accepted.sum(axis=1),
+            n_models=self.n_models,
+        )
+
+    def evaluate_batch(self, prefs_list: List[UserPreferences]) -> EnsembleResult:
+        return self.evaluate(self.encode_batch(prefs_list))
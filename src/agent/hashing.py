@@ -0,0 +1,10 @@
+import hashlib
+
+
+def file_hash(path) -> str:
+    # SHA-256 pliku czytanego blokami po 1 MB
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Sequence
+
+# Granice kubelkow w sekundach: od 1 us do 1 s
+DEFAULT_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+class Instrumentation:
+    # Interfejs hooka: TravelAgent woła clock(), observe() i inc(); implementacje mogą np. przekazywać
+    # pomiary do prometheus_client albo StatsD
+    clock = staticmethod(time.perf_counter)
+
+    def observe(self, stage: str, seconds: float):
+        pass
+
+    def inc(self, counter: str, value: float = 1):
+        pass
+
+    def lap(self, stage: str, start: float) -> float:
+        now = self.clock()
+        self.observe(stage, now - start)
+        return now
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        # Górna granica kubełka, w którym leży kwantyl (jak histogram_quantile bez interpolacji)
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': {str(bound): count for bound, count in zip(self.buckets + ('+Inf',), self.counts)},
+        }
+
+
+class AgentMetrics(Instrumentation):
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, clock=time.perf_counter):
+        self.buckets = tuple(buckets)
+        self.clock = clock
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def inc(self, counter: str, value: float = 1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                stage: {
+                    'count': h.count,
+                    'mean': h.sum / h.count if h.count else 0.0,
+                    'p50': h.quantile(0.5),
+                    'p99': h.quantile(0.99),
+                }
+                for stage, h in self.histograms.items()
+            }
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'stages': {stage: h.to_dict() for stage, h in self.histograms.items()},
+                'counters': dict(self.counters),
+            }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self, prefix: str = 'travel_agent') -> str:
+        lines = [
+            f'# HELP {prefix}_stage_seconds Czas etapow TravelAgent.decide',
+            f'# TYPE {prefix}_stage_seconds histogram',
+        ]
+        with self._lock:
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets + (float('inf'),), h.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {h.sum!r}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {h.count}')
+
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'# TYPE {prefix}_{name}_total counter')
+                lines.append(f'{prefix}_{name}_total {value}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,150 @@
+import argparse
+import json
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+try:
+    from .tree_engine import CompiledTree
+except ImportError:
+    from tree_engine import CompiledTree
+
+# Format pliku: MAGIC | dlugosc naglowka (uint64 LE) | naglowek JSON | tablice wyrownane do 64 bajtow
+MAGIC = b'TAGTREE\x00'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+ARTIFACT_SUFFIX = '.tree'
+PREFIX = struct.Struct('<8sQ')
+
+
+@dataclass
+class ModelArtifact:
+    tree: CompiledTree
+    feature_names: List[str]
+    metadata: dict
+
+
+def artifact_path_for(model_path) -> Path:
+    return Path(model_path).with_suffix(ARTIFACT_SUFFIX)
+
+
+def is_artifact(path) -> bool:
+    path = Path(path)
+    if path.suffix == ARTIFACT_SUFFIX:
+        return True
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_artifact(tree: CompiledTree, feature_names, path, metadata=None) -> Path:
+    path = Path(path)
+    # Typy z jawna kolejnoscia bajtow, zeby plik byl przenosny miedzy maszynami
+    arrays = {name: np.ascontiguousarray(value, dtype=np.asarray(value).dtype.newbyteorder('<'))
+              for name, value in tree.to_arrays().items()}
+
+    descriptors = {}
+    offset = 0
+    for name, array in arrays.items():
+        descriptors[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = _align(offset + array.nbytes)
+
+    header = json.dumps({
+        'version': FORMAT_VERSION,
+        'feature_names': list(feature_names),
+        'arrays': descriptors,
+        'metadata': metadata or {},
+    }).encode('utf-8')
+    data_start = _align(PREFIX.size + len(header))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(PREFIX.pack(MAGIC, data_start - PREFIX.size))
+        f.write(header.ljust(data_start - PREFIX.size, b' '))
+        for name, array in arrays.items():
+            f.seek(data_start + descriptors[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    tmp_path.replace(path)
+    return path
+
+
+def read_header(path) -> dict:
+    with open(path, 'rb') as f:
+        magic, header_size = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} nie jest artefaktem modelu")
+        header = json.loads(f.read(header_size))
+    if header['version'] != FORMAT_VERSION:
+        raise ValueError(f"Nieobslugiwana wersja artefaktu: {header['version']}")
+    header['data_start'] = PREFIX.size + header_size
+    return header
+
+
+def load_artifact(path, mmap: bool = True) -> ModelArtifact:
+    header = read_header(path)
+    # Jedno mapowanie calego pliku; procesy mapujace ten sam plik dziela strony w cache systemu
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        buffer = np.fromfile(path, dtype=np.uint8)
+        buffer.flags.writeable = False
+
+    arrays = {}
+    for name, desc in header['arrays'].items():
+        dtype = np.dtype(desc['dtype'])
+        start = header['data_start'] + desc['offset']
+        count = int(np.prod(desc['shape'], dtype=np.int64))
+        array = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(desc['shape'])
+        arrays[name] = array
+
+    return ModelArtifact(CompiledTree.from_arrays(arrays), header['feature_names'], header['metadata'])
+
+
+def load_model(path):
+    # Wspolne ladowanie dla .tree (memmap, bez sklearn) i .pkl (joblib); zwraca (drzewo, cechy, estymator)
+    if is_artifact(path):
+        artifact = load_artifact(path)
+        return artifact.tree, artifact.feature_names, None
+
+    import joblib
+
+    model = joblib.load(path)
+    return CompiledTree.from_sklearn(model), list(model.feature_names_in_), model
+
+
+def export_model(model_path, artifact_path=None) -> Path:
+    import joblib
+
+    model = joblib.load(model_path)
+    metadata = {
+        'source': Path(model_path).name,
+        'params': {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str, type(None)))},
+    }
+    return save_artifact(CompiledTree.from_sklearn(model), model.feature_names_in_,
+                         artifact_path or artifact_path_for(model_path), metadata)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Eksport drzewa do pliku mapowanego w pamieci")
+    parser.add_argument('model', type=Path, nargs='?',
+                        default=Path(__file__).resolve().parents[2] / 'models' / 'model_tree.pkl')
+    parser.add_argument('output', type=Path, nargs='?', default=None)
+    args = parser.parse_args(argv)
+
+    path = export_model(args.model, args.output)
+    print(f"Zapisano {path} ({path.stat().st_size} B)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from .agent import TravelAgent
+    from .hashing import file_hash
+except ImportError:
+    from agent import TravelAgent
+    from hashing import file_hash
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[2] / "models" / "registry"
+METADATA_FILE = 'metadata.json'
+CURRENT_FILE = 'CURRENT'
+# Kolejnosc wyboru pliku modelu dla agenta: artefakt mapowany w pamieci, potem pickle
+MODEL_FILES = ('model_tree.tree', 'model_tree.pkl')
+
+logger = logging.getLogger(__name__)
+
+
+class RegistryError(RuntimeError):
+    pass
+
+
+def _write_atomic(path: Path, text: str):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp_path.replace(path)
+
+
+class ModelRegistry:
+    # Katalog wersji: <root>/<nr>-<hash>/ z plikami modelu i metadata.json; CURRENT wskazuje aktywna wersje.
+    # Wersja jest budowana w katalogu tymczasowym i pojawia sie jednym rename - czytelnik nigdy
+    # nie widzi polowicznie zapisanych plikow.
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = Path(root)
+
+    def versions(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and (p / METADATA_FILE).exists())
+
+    def current(self) -> Optional[str]:
+        try:
+            version = (self.root / CURRENT_FILE).read_text().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def path(self, version: Optional[str] = None) -> Path:
+        version = version or self.current()
+        if version is None:
+            raise RegistryError(f"Rejestr {self.root} nie ma aktywnej wersji")
+        path = self.root / version
+        if not (path / METADATA_FILE).exists():
+            raise RegistryError(f"Brak wersji {version} w {self.root}")
+        return path
+
+    def metadata(self, version: Optional[str] = None) -> dict:
+        return json.loads((self.path(version) / METADATA_FILE).read_text())
+
+    def model_path(self, version: Optional[str] = None) -> Path:
+        path = self.path(version)
+        for name in MODEL_FILES:
+            if (path / name).exists():
+                return path / name
+        raise RegistryError(f"Wersja {path.name} nie zawiera pliku modelu")
+
+    def verify(self, version: Optional[str] = None) -> bool:
+        path = self.path(version)
+        hashes = self.metadata(version)['files']
+        return all(file_hash(path / name) == digest for name, digest in hashes.items())
+
+    def publish(self, files: Dict[str, Path], metadata: Optional[dict] = None, activate: bool = True) -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=self.root))
+        try:
+            hashes = {}
+            for name, source in files.items():
+                shutil.copyfile(source, staging / name)
+                hashes[name] = file_hash(staging / name)
+
+            # Hash wersji z zawartosci plikow - ta sama zawartosc daje ten sam sufiks
+            content_hash = hashlib.sha256(json.dumps(hashes, sort_keys=True).encode()).hexdigest()
+            number, marker = self._reserve_number()
+            try:
+                version = f"{number:04d}-{content_hash[:12]}"
+                _write_atomic(staging / METADATA_FILE, json.dumps({
+                    'version': version,
+                    'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                    'content_hash': content_hash,
+                    'files': hashes,
+                    **(metadata or {}),
+                }, indent=2, default=str))
+                os.rename(staging, self.root / version)
+            finally:
+                # Znacznik zdejmowany dopiero po rename - numer jest zawsze zajety przez znacznik albo wersje
+                os.rmdir(marker)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def _reserve_number(self):
+        # Numer wersji rezerwowany przez os.mkdir znacznika (atomowe takze miedzy procesami):
+        # rownolegle publish dostaja rozne numery zamiast nadpisywac sobie kolejnosc
+        existing = self.versions()
+        number = int(existing[-1].split('-')[0]) + 1 if existing else 1
+        while True:
+            marker = self.root / f".reserved-{number:04d}"
+            try:
+                os.mkdir(marker)
+            except FileExistsError:
+                number += 1
+                continue
+            # Znacznik mogl zostac zdjety po opublikowaniu wersji o tym numerze po naszym odczycie listy
+            if any(version.startswith(f"{number:04d}-") for version in self.versions()):
+                os.rmdir(marker)
+                number += 1
+                continue
+            return number, marker
+
+    def activate(self, version: str):
+        self.path(version)
+        _write_atomic(self.root / CURRENT_FILE, version + '\n')
+
+
+class HotSwapAgent:
+    # Agent przelaczany na nowa wersje z rejestru. Nowy TravelAgent jest budowany w watku w tle,
+    # a podmiana to jedno przypisanie referencji: wywolania w toku koncza sie na starym modelu,
+    # kolejne trafiaja juz do nowego - bez blokad na sciezce decide.
+    def __init__(self, registry: ModelRegistry, poll_interval: float = 5.0, **agent_kwargs):
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self.agent_kwargs = agent_kwargs
+        self.version = registry.current()
+        self.agent = TravelAgent(registry.model_path(self.version), **agent_kwargs)
+        self.swaps = 0
+        self.last_error: Optional[str] = None
+        self._failed_version: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __getattr__(self, name):
+        # Atrybuty agenta (model_path, instrumentation, engine, ...) z aktualnej wersji
+        agent = self.__dict__.get('agent')
+        if agent is None:
+            raise AttributeError(name)
+        return getattr(agent, name)
+
+    def decide(self, prefs):
+        return self.agent.decide(prefs)
+
+    def decide_batch(self, prefs_list, include_paths: bool = True):
+        return self.agent.decide_batch(prefs_list, include_paths=include_paths)
+
+    def reload(self) -> bool:
+        with self._reload_lock:
+            version = self.registry.current()
+            if version is None or version in (self.version, self._failed_version):
+                return False
+            try:
+                agent = TravelAgent(self.registry.model_path(version), **self.agent_kwargs)
+            except Exception as error:
+                # Uszkodzona wersja nie wylacza serwowania - zostaje poprzedni model
+                self.last_error = f"{version}: {error}"
+                self._failed_version = version
+                logger.exception("Nie udalo sie zaladowac wersji %s", version)
+                return False
+            self.agent, self.version = agent, version
+            self.swaps += 1
+            self.last_error = self._failed_version = None
+            logger.info("Przelaczono model na wersje %s", version)
+            return True
+
+    def start(self) -> "HotSwapAgent":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='model-registry-watch', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.reload()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rejestr wersji modelu")
+    parser.add_argument('--root', type=Path, default=DEFAULT_ROOT)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="lista wersji")
+    show = commands.add_parser('show', help="metadane wersji")
+    show.add_argument('version', nargs='?')
+    activate = commands.add_parser('activate', help="ustaw aktywna wersje (np. wycofanie)")
+    activate.add_argument('version')
+    verify = commands.add_parser('verify', help="sprawdz hashe plikow")
+    verify.add_argument('version', nargs='?')
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'list':
+        current = registry.current()
+        for version in registry.versions():
+            print(f"{'*' if version == current else ' '} {version}")
+    elif args.command == 'show':
+        print(json.dumps(registry.metadata(args.version), indent=2))
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f"Aktywna wersja: {args.version}")
+    elif args.command == 'verify':
+        ok = registry.verify(args.version)
+        print("OK" if ok else "Niezgodne hashe plikow")
+        return 0 if ok else 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
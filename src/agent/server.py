@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import asdict, fields
+from functools import partial
+from pathlib import Path
+from typing import List, Optional
+
+import tornado.httpserver
+import tornado.netutil
+import tornado.process
+import tornado.web
+
+try:
+    from .agent import Decision, TravelAgent, UserPreferences
+    from .decision_table import LEVELS, SPACE
+    from .model_artifact import artifact_path_for
+except ImportError:
+    from agent import Decision, TravelAgent, UserPreferences
+    from decision_table import LEVELS, SPACE
+    from model_artifact import artifact_path_for
+
+PICKLE_PATH = Path(__file__).resolve().parents[2] / "models" / "model_tree.pkl"
+# Artefakt mapowany w pamieci: szybki start i jedna fizyczna kopia modelu dla wszystkich procesow
+MODEL_PATH = artifact_path_for(PICKLE_PATH) if artifact_path_for(PICKLE_PATH).exists() else PICKLE_PATH
+DEFAULT_PORT = 8888
+DEFAULT_WINDOW = 0.002
+DEFAULT_MAX_BATCH = 512
+MAX_REQUEST_ITEMS = 10_000
+
+PREFERENCE_FIELDS = [field.name for field in fields(UserPreferences)]
+# Dozwolone wartosci pol liczbowych - ta sama dziedzina co w tabeli decyzji i danych treningowych
+INT_FIELDS = {name: values for name, values in SPACE if values is not LEVELS}
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidRequest(ValueError):
+    pass
+
+
+def parse_preferences(item) -> UserPreferences:
+    if not isinstance(item, dict):
+        raise InvalidRequest("Oczekiwano obiektu JSON z preferencjami")
+    missing = [name for name in PREFERENCE_FIELDS if name not in item]
+    if missing:
+        raise InvalidRequest(f"Brak pol: {missing}")
+
+    for name in PREFERENCE_FIELDS:
+        value = item[name]
+        if name in INT_FIELDS:
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise InvalidRequest(f"Pole {name} musi byc liczba calkowita")
+            allowed = INT_FIELDS[name]
+            if value not in allowed:
+                raise InvalidRequest(f"Pole {name} musi byc z zakresu {allowed.start}-{allowed.stop - 1}")
+        elif value not in LEVELS:
+            raise InvalidRequest(f"Pole {name} musi byc jednym z {LEVELS}")
+    return UserPreferences(**{name: item[name] for name in PREFERENCE_FIELDS})
+
+
+def decision_to_json(decision: Decision) -> dict:
+    data = asdict(decision)
+    # Wartosci z numpy (np.bool_, np.float64) zamieniamy na typy JSON
+    data['accepted'] = bool(data['accepted'])
+    data['probability'] = float(data['probability'])
+    return data
+
+
+class MicroBatcher:
+    def __init__(self, agent: TravelAgent, window: float = DEFAULT_WINDOW, max_batch: int = DEFAULT_MAX_BATCH,
+                 executor: Optional[Executor] = None):
+        self.agent = agent
+        self.window = window
+        self.max_batch = max_batch
+        # Liczenie paczki poza petla zdarzen: duze zapytanie nie blokuje innych polaczen procesu.
+        # Jeden watek - wywolania decide_batch nadal ida po kolei, jak wczesniej w petli
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='decide')
+        self._pending = []
+        self._size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, prefs_list: List[UserPreferences], include_paths: bool = True) -> List[Decision]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((prefs_list, include_paths, future))
+        self._size += len(prefs_list)
+
+        # Pierwsze zadanie w oknie uruchamia licznik; pelna paczka idzie od razu
+        if self._size >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._size = self._pending, [], 0
+        if not pending:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._score(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, pending):
+        batch = [prefs for prefs_list, _, _ in pending for prefs in prefs_list]
+        include_paths = any(paths for _, paths, _ in pending)
+        try:
+            decisions = await asyncio.get_running_loop().run_in_executor(
+                self.executor, partial(self.agent.decide_batch, batch, include_paths=include_paths)
+            )
+        except Exception as error:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        start = 0
+        for prefs_list, paths, future in pending:
+            part = decisions[start:start + len(prefs_list)]
+            start += len(prefs_list)
+            if not paths:
+                for decision in part:
+                    decision.decision_path = None
+            if not future.done():
+                future.set_result(part)
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, batcher: MicroBatcher):
+        self.batcher = batcher
+
+    def set_default_headers(self):
+        self.set_header('Content-Type', 'application/json; charset=utf-8')
+
+    def write_error(self, status_code, **kwargs):
+        error = kwargs.get('exc_info', (None, None, None))[1]
+        message = error.log_message if isinstance(error, tornado.web.HTTPError) and error.log_message else self._reason
+        self.finish(json.dumps({'error': message}))
+
+    def json_body(self):
+        try:
+            return json.loads(self.request.body or b'null')
+        except ValueError:
+            raise tornado.web.HTTPError(400, 'Niepoprawny JSON')
+
+    def include_paths(self, body) -> bool:
+        return bool(body.get('include_paths', True)) if isinstance(body, dict) else True
+
+
+class DecideHandler(BaseHandler):
+    async def post(self):
+        body = self.json_body()
+        try:
+            prefs = parse_preferences(body)
+        except InvalidRequest as error:
+            raise tornado.web.HTTPError(400, str(error))
+
+        decision, = await self.batcher.submit([prefs], self.include_paths(body))
+        self.finish(json.dumps(decision_to_json(decision)))
+
+
+class DecideBatchHandler(BaseHandler):
+    async def post(self):
+        body = self.json_body()
+        items = body.get('items') if isinstance(body, dict) else None
+        if not isinstance(items, list):
+            raise tornado.web.HTTPError(400, "Oczekiwano pola 'items' z lista preferencji")
+        if len(items) > MAX_REQUEST_ITEMS:
+            raise tornado.web.HTTPError(413, f"Maksymalnie {MAX_REQUEST_ITEMS} elementow w zapytaniu")
+
+        try:
+            prefs_list = [parse_preferences(item) for item in items]
+        except InvalidRequest as error:
+            raise tornado.web.HTTPError(400, str(error))
+
+        decisions = await self.batcher.submit(prefs_list, self.include_paths(body)) if prefs_list else []
+        self.finish(json.dumps({'decisions': [decision_to_json(d) for d in decisions]}))
+
+
+class HealthHandler(BaseHandler):
+    def get(self):
+        self.finish(json.dumps({
+            'status': 'ok',
+            'pid': os.getpid(),
+            'model': str(self.batcher.agent.model_path),
+            'version': getattr(self.batcher.agent, 'version', None),
+            'batches': self.batcher.batches,
+            'items': self.batcher.items,
+        }))
+
+
+class MetricsHandler(BaseHandler):
+    def get(self):
+        metrics = self.batcher.agent.instrumentation
+        if metrics is None or not hasattr(metrics, 'to_prometheus'):
+            raise tornado.web.HTTPError(404, 'Instrumentacja wylaczona')
+        self.set_header('Content-Type', 'text/plain; version=0.0.4')
+        self.finish(metrics.to_prometheus())
+
+
+def make_app(agent: TravelAgent, window: float = DEFAULT_WINDOW, max_batch: int = DEFAULT_MAX_BATCH):
+    batcher = MicroBatcher(agent, window, max_batch)
+    app = tornado.web.Application([
+        (r'/decide', DecideHandler, {'batcher': batcher}),
+        (r'/decide_batch', DecideBatchHandler, {'batcher': batcher}),
+        (r'/health', HealthHandler, {'batcher': batcher}),
+        (r'/metrics', MetricsHandler, {'batcher': batcher}),
+    ])
+    app.batcher = batcher
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serwer HTTP TravelAgent z mikro-paczkowaniem")
+    parser.add_argument('--model', type=Path, default=MODEL_PATH)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=1, help="liczba procesow (0 = liczba rdzeni)")
+    parser.add_argument('--window-ms', type=float, default=DEFAULT_WINDOW * 1000, help="okno zbierania paczki [ms]")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument('--registry', type=Path, default=None,
+                        help="katalog rejestru wersji; aktywna wersja przelaczana w tle zamiast --model")
+    parser.add_argument('--poll', type=float, default=5.0, help="co ile sekund sprawdzac rejestr")
+    parser.add_argument('--metrics', action='store_true', help="instrumentacja etapow i endpoint /metrics")
+    parser.add_argument('--shadow', type=Path, nargs='+', default=(), metavar='MODEL',
+                        help="modele kandydaci liczeni obok glownego (pole shadow w odpowiedzi)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(process)d %(levelname)s %(message)s')
+
+    # Model ladowany raz, przed fork: procesy robocze dziela strony pamieci (copy-on-write,
+    # a w przypadku artefaktu .tree - wspolne mapowanie pliku)
+    start = time.perf_counter()
+    instrumentation = None
+    if args.metrics:
+        try:
+            from .instrumentation import AgentMetrics
+        except ImportError:
+            from instrumentation import AgentMetrics
+        instrumentation = AgentMetrics()
+    if args.registry is not None:
+        try:
+            from .model_registry import HotSwapAgent, ModelRegistry
+        except ImportError:
+            from model_registry import HotSwapAgent, ModelRegistry
+        agent = HotSwapAgent(ModelRegistry(args.registry), args.poll, instrumentation=instrumentation,
+                             shadow_models=args.shadow)
+    else:
+        agent = TravelAgent(args.model, instrumentation=instrumentation, shadow_models=args.shadow)
+    logger.info("Model %s zaladowany w %.1f ms", agent.model_path, (time.perf_counter() - start) * 1000)
+
+    sockets = tornado.netutil.bind_sockets(args.port, address=args.host)
+    if args.workers != 1:
+        tornado.process.fork_processes(args.workers)
+
+    async def serve():
+        server = tornado.httpserver.HTTPServer(make_app(agent, args.window_ms / 1000, args.max_batch))
+        server.add_sockets(sockets)
+        # Watek obserwujacy rejestr startuje po fork - kazdy proces przelacza sie sam
+        if hasattr(agent, 'start'):
+            agent.start()
+        logger.info("Nasluchiwanie na %s:%d", args.host, args.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+if __name__ == '__main__':
+    main()
@@ -3,8 +3,74 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+from itertools import product
+
 from agent import TravelAgent, UserPreferences
 
+MODEL_PATH = Path(__file__).parent.parent.parent / "models" / "model_tree.pkl"
+LEVELS = ["low", "medium", "high"]
+
+
+def all_preferences():
+    return [
+        UserPreferences(*values)
+        for values in product(range(1, 6), range(1, 6), range(3), range(2), LEVELS, LEVELS)
+    ]
+
+
+def test_decide_batch_matches_decide():
+    agent = TravelAgent(str(MODEL_PATH))
+    prefs_list = all_preferences()
+    
+    batch = agent.decide_batch(prefs_list)
+    
+    assert len(batch) == len(prefs_list)
+    for prefs, decision in zip(prefs_list, batch):
+        assert decision == agent.decide(prefs)
+    assert agent.decide_batch([]) == []
+
+
+def test_decide_batch_without_paths():
+    agent = TravelAgent(str(MODEL_PATH))
+    prefs_list = all_preferences()
+    
+    full = agent.decide_batch(prefs_list)
+    compact = agent.decide_batch(prefs_list, include_paths=False)
+    
+    for a, b in zip(full, compact):
+        assert b.decision_path is None
+        assert (a.accepted, a.probability, a.recommended_changes) == (b.accepted, b.probability, b.recommended_changes)
+    
+    X = agent.encode_batch(prefs_list)
+    assert agent.extract_decision_paths(X, as_dicts=True) == [d.decision_path for d in full]
+
+
+def test_decision_table_matches_model(tmp_path):
+    model_path = tmp_path / "model_tree.pkl"
+    model_path.write_bytes(MODEL_PATH.read_bytes())
+    
+    agent = TravelAgent(str(model_path))
+    table_agent = TravelAgent(str(model_path), use_table=True)
+    assert (tmp_path / "model_tree.table.npz").exists()
+    
+    for prefs in all_preferences():
+        assert table_agent.decide(prefs) == agent.decide(prefs)
+    
+    reloaded = TravelAgent(str(model_path), use_table=True)
+    assert reloaded.decide(UserPreferences(5, 5, 2, 1, "high", "high")) == agent.decide(UserPreferences(5, 5, 2, 1, "high", "high"))
+    assert reloaded.decide(UserPreferences(7, 5, 2, 1, "high", "high")) == agent.decide(UserPreferences(7, 5, 2, 1, "high", "high"))
+
+
+def test_decision_table_invalidated_on_model_change(tmp_path):
+    model_path = tmp_path / "model_tree.pkl"
+    model_path.write_bytes(MODEL_PATH.read_bytes())
+    first = TravelAgent(str(model_path), use_table=True).table.model_hash
+    
+    model_path.write_bytes(MODEL_PATH.read_bytes() + b"\0")
+    second = TravelAgent(str(model_path), use_table=True).table.model_hash
+    
+    assert first != second
+
 
 def run_test():
     print("TEST AGENTA TURYSTYCZNEGO")
@@ -0,0 +1,51 @@
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agent_cache import AgentCache
+
+MODEL_PATH = Path(__file__).parent.parent.parent / "models" / "model_tree.pkl"
+
+
+def test_agent_cache_shares_and_reloads(tmp_path):
+    model_path = tmp_path / "model_tree.pkl"
+    model_path.write_bytes(MODEL_PATH.read_bytes())
+    cache = AgentCache()
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        agents = list(pool.map(lambda _: cache.get(model_path), range(32)))
+    
+    assert all(agent is agents[0] for agent in agents)
+    metrics = cache.metrics()
+    assert (metrics["loads"], metrics["hits"], metrics["reloads"]) == (1, 31, 0)
+    
+    stat = os.stat(model_path)
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    
+    assert cache.get(model_path) is not agents[0]
+    assert cache.metrics()["reloads"] == 1
+
+
+def test_instrumentation_is_part_of_the_cache_key():
+    from instrumentation import AgentMetrics
+
+    cache = AgentCache()
+    metrics = AgentMetrics()
+    plain = cache.get(MODEL_PATH)
+    measured = cache.get(MODEL_PATH, instrumentation=metrics)
+
+    assert measured is not plain and cache.get(MODEL_PATH, instrumentation=metrics) is measured
+    assert plain.instrumentation is None and measured.instrumentation is metrics
+
+
+def test_list_options_are_part_of_the_cache_key():
+    cache = AgentCache()
+    shadow = cache.get(MODEL_PATH, shadow_models=[MODEL_PATH])
+    
+    assert cache.get(MODEL_PATH, shadow_models=[MODEL_PATH]) is shadow
+    assert cache.get(MODEL_PATH, shadow_models=(MODEL_PATH,)) is shadow
+    assert cache.get(MODEL_PATH) is not shadow
+    assert shadow.ensemble is not None and cache.metrics()["loads"] == 2
@@ -0,0 +1,104 @@
+from pathlib import Path
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(BASE_DIR / "src" / "data"))
+
+from agent import TravelAgent, UserPreferences
+from batch_score import CHECKPOINT_FILE, CheckpointMismatch, iter_chunks, main, score_file
+from encoding import SCORE_INPUTS
+from generate import generate_dataset
+
+MODEL_PATH = BASE_DIR / "models" / "model_tree.pkl"
+
+
+@pytest.fixture(scope="module")
+def offers(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("offers")
+    df = generate_dataset(1000, seed=11).drop(columns=["score", "satisfied"])
+    df.insert(0, "offer_id", np.arange(len(df)) * 7)
+    df[SCORE_INPUTS[4:]] = df[SCORE_INPUTS[4:]].astype(str)
+    csv_path = tmp_path / "offers.csv"
+    parquet_path = tmp_path / "offers.parquet"
+    df.to_csv(csv_path, index=False)
+    df.to_parquet(parquet_path, index=False, row_group_size=128)
+    return df, csv_path, parquet_path
+
+
+def expected_decisions(df):
+    prefs = [UserPreferences(**row) for row in df[SCORE_INPUTS].to_dict(orient="records")]
+    return TravelAgent(MODEL_PATH).decide_batch(prefs)
+
+
+def read_output(path):
+    return pq.read_table(path).to_pandas()
+
+
+def test_chunks_have_fixed_size(offers):
+    df, csv_path, parquet_path = offers
+    for path in (csv_path, parquet_path):
+        sizes = [len(chunk) for chunk in iter_chunks(path, 300)]
+        assert sizes == [300, 300, 300, 100]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_scores_match_agent(offers, tmp_path, n_jobs):
+    df, csv_path, parquet_path = offers
+    decisions = expected_decisions(df)
+
+    for path in (csv_path, parquet_path):
+        output = tmp_path / path.suffix[1:]
+        summary = score_file(path, output, MODEL_PATH, chunk_size=256, n_jobs=n_jobs, paths=True, progress=False)
+        assert summary["rows"] == summary["scored"] == len(df) and summary["parts"] == 4
+
+        result = read_output(output)
+        np.testing.assert_array_equal(result["offer_id"], df["offer_id"])
+        np.testing.assert_array_equal(result["accepted"], [bool(d.accepted) for d in decisions])
+        np.testing.assert_array_equal(result["probability"], [d.probability for d in decisions])
+        for path_label, decision in zip(result["path"].astype(str)[:50], decisions):
+            steps = path_label.split("|")
+            assert [step.split(">")[0].split("<=")[0] for step in steps] == [s["feature"] for s in decision.decision_path]
+        assert json.loads((output / CHECKPOINT_FILE).read_text())["complete"]
+
+
+def test_resume_scores_only_missing_chunks(offers, tmp_path):
+    df, csv_path, _ = offers
+    output = tmp_path / "out"
+    score_file(csv_path, output, MODEL_PATH, chunk_size=300, n_jobs=1, progress=False)
+    full = read_output(output)
+
+    # Przerwany przebieg: gotowe tylko dwie pierwsze paczki
+    checkpoint = json.loads((output / CHECKPOINT_FILE).read_text())
+    checkpoint.update(completed=[0, 1], rows=600, complete=False)
+    (output / CHECKPOINT_FILE).write_text(json.dumps(checkpoint))
+    for part in sorted(output.glob("part-*"))[2:]:
+        part.unlink()
+
+    summary = score_file(csv_path, output, MODEL_PATH, chunk_size=300, n_jobs=1, progress=False)
+    assert summary["skipped"] == 600 and summary["scored"] == 400 and summary["rows"] == 1000
+    pd.testing.assert_frame_equal(read_output(output), full)
+
+    with pytest.raises(CheckpointMismatch):
+        score_file(csv_path, output, MODEL_PATH, chunk_size=200, n_jobs=1, progress=False)
+    summary = score_file(csv_path, output, MODEL_PATH, chunk_size=200, n_jobs=1, resume=False, progress=False)
+    assert summary["parts"] == 5 and len(list(output.glob("part-*"))) == 5
+    pd.testing.assert_frame_equal(read_output(output), full)
+
+
+def test_cli_csv_output(offers, tmp_path, capsys):
+    df, _, parquet_path = offers
+    assert main([str(parquet_path), str(tmp_path), "--format", "csv", "--chunk-size", "400", "--n-jobs", "1",
+                 "--paths", "--model", str(MODEL_PATH)]) == 0
+    parts = sorted(tmp_path.glob("part-*.csv"))
+    result = pd.concat([pd.read_csv(part) for part in parts], ignore_index=True)
+    assert len(parts) == 3 and len(result) == len(df)
+    assert list(result.columns) == ["offer_id", "accepted", "probability", "leaf", "path"]
+    captured = capsys.readouterr()
+    assert "wierszy/s" in captured.out and "100%" in captured.err
@@ -0,0 +1,66 @@
+from pathlib import Path
+import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmark import compare, import_times, main, random_preferences, run_benchmarks
+
+MODEL_PATH = Path(__file__).resolve().parents[2] / "models" / "model_tree.pkl"
+
+
+def test_random_preferences_are_reproducible():
+    assert random_preferences(50, seed=3) == random_preferences(50, seed=3)
+    assert random_preferences(50, seed=3) != random_preferences(50, seed=4)
+
+
+def test_run_benchmarks_reports_all_metrics():
+    results = run_benchmarks(MODEL_PATH, sizes=[1, 100], n_single=50, min_time=0.001, repeat=2,
+                             memory_size=100, import_runs=1, log=lambda *args: None)
+
+    for key in ("import.agent_us", "load.agent_s", "decide.p50_us", "decide.p99_us", "decide_table.p99_us",
+                "batch.n=100.rows_per_s", "paths.n=1.us_per_row", "path_dicts.n=100.us_per_row",
+                "memory.batch.bytes_per_decision"):
+        assert results[key] > 0
+    assert results["decide.p50_us"] <= results["decide.p99_us"]
+    assert results["memory.batch_paths.bytes_per_decision"] > results["memory.batch.bytes_per_decision"]
+
+
+def test_compare_flags_regressions_in_both_directions():
+    baseline = {"decide.p50_us": 100.0, "batch.n=10.rows_per_s": 1000.0, "only_baseline_s": 1.0}
+    current = {"decide.p50_us": 130.0, "batch.n=10.rows_per_s": 1100.0, "only_current_s": 1.0}
+
+    rows = {row["metric"]: row for row in compare(current, baseline, threshold=0.2)}
+    assert set(rows) == {"decide.p50_us", "batch.n=10.rows_per_s"}
+    assert rows["decide.p50_us"]["regression"]
+    assert not rows["batch.n=10.rows_per_s"]["regression"]
+    assert rows["batch.n=10.rows_per_s"]["change"] < 0
+
+
+def test_compare_flags_regressions_from_zero_baseline():
+    baseline = {"import.heavy_modules_count": 0, "import.other_count": 0}
+    rows = {row["metric"]: row for row in compare({"import.heavy_modules_count": 2, "import.other_count": 0}, baseline)}
+    assert rows["import.heavy_modules_count"]["regression"]
+    assert not rows["import.other_count"]["regression"] and rows["import.other_count"]["change"] == 0
+
+
+def test_main_saves_and_compares_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    args = ["--sizes", "1", "10", "--single", "20", "--min-time", "0.001", "--repeat", "1", "--import-runs", "0",
+            "--baseline", str(baseline)]
+
+    assert main(args + ["--save-baseline"]) == 0
+    report = json.loads(baseline.read_text())
+    assert report["environment"]["model_hash"] and "load.agent_s" in report["results"]
+
+    # Baseline 1000x szybszy -> kazda metryka czasu jest regresja
+    report["results"] = {k: (v * 1000 if k.endswith("_per_s") else v / 1000) for k, v in report["results"].items()}
+    baseline.write_text(json.dumps(report))
+    assert main(args + ["--output", str(tmp_path / "run.json")]) == 1
+    assert (tmp_path / "run.json").exists()
+
+
+def test_agent_import_skips_heavy_dependencies():
+    imports = import_times(runs=1)
+    assert imports["heavy"] == []
+    assert imports["total_us"] > 0 and imports["modules"] > 0
@@ -0,0 +1,75 @@
+from pathlib import Path
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agent import TravelAgent, UserPreferences
+from counterfactuals import CounterfactualEngine, FEATURES
+from decision_table import LEVELS, all_preferences
+
+MODEL_PATH = Path(__file__).resolve().parents[2] / "models" / "model_tree.pkl"
+AGENT = TravelAgent(MODEL_PATH)
+
+
+def distance(a, b, weights, immutable=()):
+    cost = 0.0
+    for name in FEATURES:
+        x, y = getattr(a, name), getattr(b, name)
+        if name in ("user_budget", "trip_cost"):
+            x, y = LEVELS.index(x), LEVELS.index(y)
+        if x != y and name in immutable:
+            return np.inf
+        cost += weights[name] * abs(x - y)
+    return cost
+
+
+@pytest.mark.parametrize("immutable", [(), ("user_budget", "season_match")])
+def test_targets_are_accepted_and_minimal(immutable):
+    engine = CounterfactualEngine(AGENT, immutable=immutable)
+    prefs = all_preferences()
+    decisions = AGENT.decide_batch(prefs, include_paths=False)
+    accepted = [p for p, d in zip(prefs, decisions) if d.accepted]
+    rejected = [p for p, d in zip(prefs, decisions) if not d.accepted]
+
+    results = engine.query_batch(rejected)
+    targets = [r.target for r in results if r is not None]
+    assert all(d.accepted for d in AGENT.decide_batch(targets, include_paths=False))
+
+    rng = np.random.default_rng(0)
+    for i in rng.choice(len(rejected), 40, replace=False):
+        best = min(distance(rejected[i], a, engine.weights, immutable) for a in accepted)
+        result = results[i]
+        if np.isinf(best):
+            assert result is None
+            continue
+        assert result.cost == best == distance(rejected[i], result.target, engine.weights)
+        assert {c.feature for c in result.changes}.isdisjoint(immutable)
+        assert all(getattr(rejected[i], c.feature) == c.current for c in result.changes)
+
+
+def test_accepted_and_unknown_inputs_have_no_counterfactual():
+    engine = CounterfactualEngine(AGENT)
+    accepted = next(p for p in all_preferences() if AGENT.decide(p).accepted)
+    assert engine.query(accepted) is None
+    assert engine.query(UserPreferences(9, 1, 0, 0, "low", "low")) is None
+    with pytest.raises(ValueError):
+        CounterfactualEngine(AGENT, immutable=["budget"])
+
+
+def test_agent_uses_counterfactual_recommendations():
+    agent = TravelAgent(MODEL_PATH, counterfactuals=True)
+    table_agent = TravelAgent(MODEL_PATH, counterfactuals=True, use_table=True, save_table=False)
+    prefs = UserPreferences(2, 2, 0, 0, "low", "high")
+
+    decision = agent.decide(prefs)
+    assert not decision.accepted
+    assert decision.recommended_changes == decision.counterfactual.recommendations()
+    assert agent.decide(decision.counterfactual.target).accepted
+    assert table_agent.decide(prefs) == decision
+    assert agent.decide_batch([prefs])[0] == decision
+
+    plain = AGENT.decide(prefs)
+    assert plain.counterfactual is None and plain.recommended_changes != decision.recommended_changes
@@ -0,0 +1,111 @@
+from pathlib import Path
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agent import TravelAgent, UserPreferences
+from activity_catalog import ActivityCatalog
+from destinations import ALL_ACTIVITIES, PRESET_CITIES, PRESET_INDEX, DestinationIndex, calculate_activities_match
+
+MODEL_PATH = Path(__file__).parent.parent.parent / "models" / "model_tree.pkl"
+
+
+def set_match(city_offers, user_interests):
+    if not user_interests:
+        return 1
+    return min(len(set(city_offers) & set(user_interests)), 2)
+
+
+def test_bitmask_match_equals_set_match():
+    for interests in ([], ["culture"], ["beach", "food"], ["spa", "design", "music"], ["unknown"]):
+        expected = [set_match(city["offers"], interests) for city in PRESET_CITIES.values()]
+        assert PRESET_INDEX.matches(interests).tolist() == expected
+        assert [calculate_activities_match(city["offers"], interests) for city in PRESET_CITIES.values()] == expected
+
+
+def test_catalog_wider_than_one_word():
+    activities = [f"a{i}" for i in range(150)]
+    catalog = ActivityCatalog(activities)
+    rng = np.random.default_rng(0)
+    offers = [list(rng.choice(activities, size=rng.integers(0, 10), replace=False)) for _ in range(300)]
+    interests = ["a1", "a70", "a149", "a64"]
+    
+    masks = catalog.pack(offers)
+    
+    assert masks.shape == (300, 3)
+    assert [sorted(catalog.decode(mask)) for mask in masks] == [sorted(o) for o in offers]
+    assert catalog.match(masks, interests).tolist() == [set_match(o, interests) for o in offers]
+    
+    inverted = catalog.inverted_index(masks)
+    for activity in interests:
+        assert inverted.postings(activity).tolist() == [i for i, o in enumerate(offers) if activity in o]
+    expected = [i for i, o in enumerate(offers) if len(set(o) & set(interests)) >= 2]
+    assert inverted.candidates(interests, min_common=2).tolist() == expected
+
+
+def test_rank_destinations_matches_per_city_decide():
+    agent = TravelAgent(str(MODEL_PATH))
+    base = UserPreferences(4, 1, 1, 1, "medium", "medium")
+    interests = ["history", "food"]
+    
+    ranking = agent.rank_destinations(base, interests, PRESET_CITIES, k=None)
+    
+    assert sorted(item.name for item in ranking) == sorted(PRESET_CITIES)
+    for item in ranking:
+        city = PRESET_CITIES[item.name]
+        prefs = UserPreferences(4, city["quality"], calculate_activities_match(city["offers"], interests), 1, "medium", "medium")
+        decision = agent.decide(prefs)
+        assert (item.probability, item.accepted) == (decision.probability, decision.accepted)
+        assert set(item.common) == set(city["offers"]) & set(interests)
+    
+    keys = [(-item.probability, -item.total) for item in ranking]
+    assert keys == sorted(keys)
+    assert [item.name for item in agent.rank_destinations(base, interests, PRESET_INDEX, k=3)] == [item.name for item in ranking[:3]]
+
+
+def test_rank_destinations_large_catalog():
+    agent = TravelAgent(str(MODEL_PATH))
+    rng = np.random.default_rng(0)
+    n = 200_000
+    index = DestinationIndex(
+        [f"city-{i}" for i in range(n)],
+        rng.integers(0, 300, n),
+        rng.integers(1, 6, n),
+        rng.integers(0, 1 << len(ALL_ACTIVITIES), n, dtype=np.uint64)
+    )
+    
+    top = agent.rank_destinations(UserPreferences(3, 1, 1, 0, "low", "low"), ["culture", "beach"], index, k=20)
+    
+    assert len(top) == 20
+    full = agent.rank_destinations(UserPreferences(3, 1, 1, 0, "low", "low"), ["culture", "beach"], index, k=None)
+    assert [item.name for item in top] == [item.name for item in full[:20]]
+    
+    filtered = agent.rank_destinations(UserPreferences(3, 1, 1, 0, "low", "low"), ["culture", "beach"], index, k=None, min_match=2)
+    assert filtered and all(item.match == 2 for item in filtered)
+    assert len(filtered) == int((index.matches(["culture", "beach"]) == 2).sum())
+
+
+def test_top_k_breaks_probability_ties_by_attractions():
+    agent = TravelAgent(str(MODEL_PATH))
+    prefs = UserPreferences(3, 1, 1, 1, "medium", "medium")
+    full = agent.rank_destinations(prefs, ["culture", "food"], PRESET_INDEX, k=None)
+    
+    assert len({item.probability for item in full}) < len(full)
+    for k in range(1, len(full)):
+        top = agent.rank_destinations(prefs, ["culture", "food"], PRESET_INDEX, k=k)
+        assert [item.name for item in top] == [item.name for item in full[:k]]
+    
+    rng = np.random.default_rng(1)
+    n = 50_000
+    index = DestinationIndex(
+        [f"city-{i}" for i in range(n)],
+        rng.integers(0, 5, n),
+        rng.integers(1, 6, n),
+        rng.integers(0, 1 << len(ALL_ACTIVITIES), n, dtype=np.uint64)
+    )
+    full = agent.rank_destinations(prefs, ["culture", "food"], index, k=None)
+    for k in (1, 7, 100, 5000):
+        top = agent.rank_destinations(prefs, ["culture", "food"], index, k=k)
+        assert [item.name for item in top] == [item.name for item in full[:k]]
@@ -0,0 +1,63 @@
+from pathlib import Path
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "data"))
+
+from agent import UserPreferences
+from dataset import CSV_PATH, load_dataset
+from encoding import FeatureEncoder
+
+FEATURES_PATH = Path(__file__).parent.parent.parent / "models" / "feature_columns.pkl"
+
+
+def legacy_encode(df, feature_columns):
+    X = pd.get_dummies(df, columns=["user_budget", "trip_cost"])
+    for col in feature_columns:
+        if col not in X.columns:
+            X[col] = 0
+    return X[feature_columns].to_numpy(dtype=np.float32)
+
+
+def test_encoder_matches_get_dummies():
+    feature_columns = list(joblib.load(FEATURES_PATH))
+    raw = pd.read_csv(CSV_PATH).drop("satisfied", axis=1)
+    typed = load_dataset(CSV_PATH).drop("satisfied", axis=1)
+    encoder = FeatureEncoder.from_feature_names(feature_columns)
+    
+    expected = legacy_encode(raw, feature_columns)
+    
+    assert list(FeatureEncoder().get_feature_names_out()) == feature_columns
+    np.testing.assert_array_equal(encoder.transform(raw), expected)
+    np.testing.assert_array_equal(encoder.transform(typed), expected)
+    np.testing.assert_array_equal(encoder.transform(raw.drop("score", axis=1)), expected)
+    
+    out = np.full((len(raw), len(feature_columns)), 7, dtype=np.float32)
+    assert encoder.transform(raw, out=out) is out
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_encoder_handles_objects_unknown_levels_and_reordering():
+    prefs = [UserPreferences(5, 5, 2, 1, "high", "high"), UserPreferences(1, 2, 0, 0, "low", "luxury")]
+    encoder = FeatureEncoder.from_feature_names(["trip_cost_high", "score", "user_budget_low", "travel_comfort"])
+    
+    np.testing.assert_array_equal(encoder.transform(prefs), [[1, 9, 0, 5], [0, 0, 1, 1]])
+
+
+def test_encoder_round_trips_and_works_in_pipeline(tmp_path):
+    encoder = FeatureEncoder(dtype="float64")
+    encoder.save(tmp_path / "encoder.json")
+    restored = FeatureEncoder.load(tmp_path / "encoder.json")
+    assert restored.feature_names_ == encoder.feature_names_ and restored.dtype == "float64"
+    
+    df = load_dataset(CSV_PATH)
+    pipeline = Pipeline([("encode", FeatureEncoder()), ("tree", DecisionTreeClassifier(max_depth=3, random_state=0))])
+    fitted = clone(pipeline).fit(df.drop("satisfied", axis=1), df["satisfied"])
+    assert fitted.predict(df.drop("satisfied", axis=1)).shape == (len(df),)
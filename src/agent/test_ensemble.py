@@ -0,0 +1,97 @@
+from pathlib import Path
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(BASE_DIR / "src" / "data"))
+
+from decision_table import all_preferences
+from encoding import FeatureEncoder
+from ensemble import TreeEnsemble
+from generate import generate_dataset
+from model_artifact import export_model
+
+MODEL_PATH = BASE_DIR / "models" / "model_tree.pkl"
+
+
+@pytest.fixture(scope="module")
+def models(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("ensemble")
+    df = generate_dataset(3000, seed=7)
+    encoder = FeatureEncoder()
+    X = pd.DataFrame(encoder.transform(df.drop(columns="satisfied")), columns=encoder.get_feature_names_out())
+    y = df["satisfied"]
+
+    fitted, paths = [], [MODEL_PATH]
+    for i, (depth, columns) in enumerate([(2, list(X.columns)), (None, list(X.columns)[::-1])]):
+        model = DecisionTreeClassifier(max_depth=depth, min_samples_leaf=5, random_state=i).fit(X[columns], y)
+        path = tmp_path / f"model_{i}.pkl"
+        joblib.dump(model, path)
+        fitted.append(model)
+        paths.append(path)
+    paths[-1] = export_model(paths[-1], tmp_path / "model_1.tree")
+    return [joblib.load(MODEL_PATH)] + fitted, paths
+
+
+def test_per_model_probabilities_match_sklearn(models):
+    estimators, paths = models
+    ensemble = TreeEnsemble.from_paths(paths)
+    prefs = all_preferences()
+    X = ensemble.encode_batch(prefs)
+    frame = pd.DataFrame(X, columns=ensemble.feature_names)
+
+    result = ensemble.evaluate(X)
+    assert result.probabilities.shape == (len(prefs), 3)
+    for i, model in enumerate(estimators):
+        expected = model.predict_proba(frame[model.feature_names_in_])[:, 1]
+        np.testing.assert_allclose(result.probabilities[:, i], expected)
+        np.testing.assert_array_equal(result.leaves[:, i], model.apply(frame[model.feature_names_in_]))
+
+    accepted = np.column_stack([m.predict(frame[m.feature_names_in_]) for m in estimators]) == 1
+    np.testing.assert_array_equal(result.votes, accepted.sum(axis=1))
+    np.testing.assert_array_equal(result.accepted_vote, accepted.sum(axis=1) >= 2)
+    np.testing.assert_allclose(result.mean, result.probabilities.mean(axis=1))
+    assert ((result.agreement >= 2 / 3) & (result.agreement <= 1)).all()
+
+
+def test_single_model_ensemble_matches_agent():
+    from agent import TravelAgent
+
+    agent = TravelAgent(MODEL_PATH)
+    prefs = all_preferences()[::7]
+    result = TreeEnsemble.from_paths([MODEL_PATH]).evaluate_batch(prefs)
+    decisions = agent.decide_batch(prefs, include_paths=False)
+
+    np.testing.assert_array_equal(result.probabilities[:, 0], [d.probability for d in decisions])
+    np.testing.assert_array_equal(result.accepted_vote, [d.accepted for d in decisions])
+
+
+def test_agent_scores_shadow_models_alongside_primary(models):
+    from agent import TravelAgent
+
+    _, paths = models
+    prefs = all_preferences()[::5]
+    plain = TravelAgent(MODEL_PATH).decide_batch(prefs, include_paths=False)
+    agent = TravelAgent(MODEL_PATH, shadow_models=paths[1:])
+    decisions = agent.decide_batch(prefs, include_paths=False)
+    result = TreeEnsemble.from_paths(paths).evaluate_batch(prefs)
+
+    assert [(d.accepted, d.probability) for d in decisions] == [(d.accepted, d.probability) for d in plain]
+    assert all(d.shadow is None for d in plain)
+    names = [str(path) for path in paths]
+    for i, decision in enumerate(decisions):
+        assert list(decision.shadow['probabilities']) == names
+        np.testing.assert_allclose(list(decision.shadow['probabilities'].values()), result.probabilities[i])
+        assert decision.shadow['votes'] == result.votes[i] and decision.shadow['n_models'] == 3
+    assert agent.decide(prefs[0]).shadow == decisions[0].shadow
+
+
+def test_empty_ensemble_is_rejected():
+    with pytest.raises(ValueError):
+        TreeEnsemble([], [])
@@ -0,0 +1,78 @@
+from pathlib import Path
+import json
+import re
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agent import TravelAgent, UserPreferences
+from instrumentation import AgentMetrics, Histogram, Instrumentation
+
+MODEL_PATH = Path(__file__).resolve().parents[2] / "models" / "model_tree.pkl"
+PREFS = [
+    UserPreferences(5, 5, 2, 1, "high", "medium"),
+    UserPreferences(1, 1, 0, 0, "low", "high"),
+    UserPreferences(3, 4, 1, 1, "medium", "medium"),
+]
+
+
+def test_stages_and_counters_are_recorded_without_changing_decisions():
+    plain = TravelAgent(MODEL_PATH)
+    metrics = AgentMetrics()
+    agent = TravelAgent(MODEL_PATH, instrumentation=metrics)
+
+    assert agent.decide_batch(PREFS) == plain.decide_batch(PREFS)
+    assert agent.decide(PREFS[0]) == plain.decide(PREFS[0])
+    agent.decide_batch(PREFS, include_paths=False)
+
+    summary = metrics.summary()
+    assert set(summary) == {"score", "encode", "traverse", "predict", "paths", "build", "total"}
+    assert summary["total"]["count"] == 3 and summary["paths"]["count"] == 2
+    assert metrics.counters == {"batches": 3, "decisions": 7}
+
+
+def test_table_hits_and_misses_are_counted():
+    metrics = AgentMetrics()
+    agent = TravelAgent(MODEL_PATH, use_table=True, save_table=False, instrumentation=metrics)
+    agent.decide(PREFS[0])
+    agent.decide(UserPreferences(9, 9, 0, 0, "low", "low"))
+
+    assert metrics.counters["table_hits"] == 1 and metrics.counters["table_misses"] == 1
+    assert metrics.counters["decisions"] == 2
+    assert metrics.summary()["table_lookup"]["count"] == 2
+
+
+def test_custom_instrumentation_receives_stages():
+    class Recorder(Instrumentation):
+        def __init__(self):
+            self.stages = []
+
+        def observe(self, stage, seconds):
+            self.stages.append(stage)
+
+    recorder = Recorder()
+    TravelAgent(MODEL_PATH, instrumentation=recorder).decide(PREFS[1])
+    assert recorder.stages == ["score", "encode", "traverse", "predict", "paths", "build", "total"]
+
+
+def test_histogram_quantiles_and_exports():
+    ticks = iter([0.0, 0.003, 0.003, 0.0031])
+    metrics = AgentMetrics(buckets=(0.001, 0.01), clock=lambda: next(ticks))
+    start = metrics.clock()
+    metrics.lap("encode", metrics.lap("score", start))
+    metrics.observe("score", 5.0)
+    metrics.inc("decisions", 2)
+
+    h = metrics.histograms["score"]
+    assert h.counts == [0, 1, 1] and h.quantile(0.5) == 0.01 and h.quantile(1.0) == float("inf")
+    assert Histogram().quantile(0.5) == 0.0
+
+    data = json.loads(metrics.to_json())
+    assert data["stages"]["encode"]["buckets"] == {"0.001": 1, "0.01": 0, "+Inf": 0}
+    assert data["counters"] == {"decisions": 2}
+
+    text = metrics.to_prometheus()
+    buckets = re.findall(r'stage_seconds_bucket\{stage="score",le="([^"]+)"\} (\d+)', text)
+    assert buckets == [("0.001", "0"), ("0.01", "1"), ("+Inf", "2")]
+    assert 'travel_agent_stage_seconds_count{stage="score"} 2' in text
+    assert "travel_agent_decisions_total 2" in text
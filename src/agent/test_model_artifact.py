@@ -0,0 +1,62 @@
+from pathlib import Path
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agent import TravelAgent
+from decision_table import all_preferences
+from model_artifact import ALIGNMENT, export_model, is_artifact, load_artifact, read_header
+
+MODEL_PATH = Path(__file__).resolve().parents[2] / "models" / "model_tree.pkl"
+
+
+def test_round_trip_is_aligned_and_memory_mapped(tmp_path):
+    path = export_model(MODEL_PATH, tmp_path / "model.tree")
+    artifact = load_artifact(path)
+    expected = TravelAgent(MODEL_PATH)
+
+    assert is_artifact(path) and not is_artifact(MODEL_PATH)
+    assert artifact.feature_names == expected.feature_names
+    assert artifact.metadata["params"]["max_depth"] == expected.model.max_depth
+    for name, array in artifact.tree.to_arrays().items():
+        np.testing.assert_array_equal(array, getattr(expected.engine, name))
+        assert isinstance(array.base, np.memmap) or isinstance(array, np.memmap)
+        assert array.ctypes.data % ALIGNMENT == 0
+        assert not array.flags.writeable
+    assert artifact.tree.max_depth == expected.engine.max_depth
+
+    in_memory = load_artifact(path, mmap=False)
+    np.testing.assert_array_equal(in_memory.tree.proba, artifact.tree.proba)
+
+
+def test_agent_from_artifact_matches_pickle(tmp_path):
+    path = export_model(MODEL_PATH, tmp_path / "model.tree")
+    prefs = all_preferences()
+
+    from_artifact = TravelAgent(path)
+    assert from_artifact.model is None
+    assert from_artifact.decide_batch(prefs) == TravelAgent(MODEL_PATH).decide_batch(prefs)
+
+
+def test_loading_artifact_does_not_import_sklearn_or_pandas(tmp_path):
+    path = export_model(MODEL_PATH, tmp_path / "model.tree")
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from agent import TravelAgent, UserPreferences;"
+        "agent = TravelAgent(sys.argv[2]); agent.decide(UserPreferences(3, 3, 1, 1, 'low', 'low'));"
+        "print(sorted(m for m in ('sklearn', 'pandas', 'scipy') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code, str(Path(__file__).parent), str(path)],
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_invalid_file_is_rejected(tmp_path):
+    bad = tmp_path / "bad.tree"
+    bad.write_bytes(b"not a model artifact")
+    with pytest.raises(ValueError):
+        read_header(bad)
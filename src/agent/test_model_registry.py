@@ -0,0 +1,176 @@
+from pathlib import Path
+import json
+import sys
+import threading
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(BASE_DIR / "src" / "data"))
+
+from agent import TravelAgent
+from decision_table import all_preferences
+from encoding import FeatureEncoder
+from generate import generate_dataset
+from model_artifact import export_model
+from model_registry import HotSwapAgent, ModelRegistry, RegistryError
+
+MODEL_PATH = BASE_DIR / "models" / "model_tree.pkl"
+
+
+@pytest.fixture(scope="module")
+def stump_path(tmp_path_factory):
+    # Drugi, wyraznie inny model: drzewo o glebokosci 1
+    df = generate_dataset(2000, seed=3)
+    encoder = FeatureEncoder()
+    X = pd.DataFrame(encoder.transform(df.drop(columns="satisfied")), columns=encoder.get_feature_names_out())
+    path = tmp_path_factory.mktemp("stump") / "model_tree.pkl"
+    joblib.dump(DecisionTreeClassifier(max_depth=1, random_state=0).fit(X, df["satisfied"]), path)
+    return export_model(path)
+
+
+def probabilities(agent, prefs):
+    return [d.probability for d in agent.decide_batch(prefs, include_paths=False)]
+
+
+def test_publish_is_versioned_and_hashed(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    assert registry.current() is None
+    with pytest.raises(RegistryError):
+        registry.model_path()
+
+    first = registry.publish({"model_tree.pkl": MODEL_PATH}, {"params": {"max_depth": 5}, "metrics": {"f1": 0.9}})
+    second = registry.publish({"model_tree.pkl": MODEL_PATH}, activate=False)
+
+    assert registry.versions() == [first, second]
+    assert first.startswith("0001-") and second.startswith("0002-")
+    # Ta sama zawartosc - ten sam hash, inny numer wersji
+    assert first.split("-")[1] == second.split("-")[1]
+    assert registry.current() == first
+    assert registry.model_path() == tmp_path / "registry" / first / "model_tree.pkl"
+
+    metadata = registry.metadata(first)
+    assert metadata["params"] == {"max_depth": 5}
+    assert metadata["metrics"] == {"f1": 0.9}
+    assert registry.verify(first)
+
+    (tmp_path / "registry" / first / "model_tree.pkl").write_bytes(b"uszkodzony")
+    assert not registry.verify(first)
+
+
+def test_concurrent_publishes_get_distinct_numbers(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    sources = []
+    for i in range(8):
+        source = tmp_path / f"model_{i}.pkl"
+        source.write_bytes(MODEL_PATH.read_bytes() + bytes([i]))
+        sources.append(source)
+    barrier = threading.Barrier(len(sources))
+    published = []
+
+    def publish(source):
+        barrier.wait()
+        published.append(registry.publish({"model_tree.pkl": source}, activate=False))
+
+    threads = [threading.Thread(target=publish, args=(source,)) for source in sources]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    numbers = sorted(int(version.split("-")[0]) for version in published)
+    assert numbers == list(range(1, len(sources) + 1))
+    assert sorted(published) == registry.versions()
+    assert sorted(p.name for p in registry.root.iterdir()) == registry.versions()
+
+
+def test_failed_publish_leaves_no_version(tmp_path):
+    registry = ModelRegistry(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        registry.publish({"model_tree.pkl": tmp_path / "brak.pkl"})
+    assert registry.versions() == []
+    assert registry.current() is None
+    assert not any(p.name.startswith(".staging") for p in tmp_path.iterdir())
+
+
+def test_hot_swap_switches_to_new_version(tmp_path, stump_path):
+    registry = ModelRegistry(tmp_path)
+    registry.publish({"model_tree.pkl": MODEL_PATH})
+    agent = HotSwapAgent(registry, poll_interval=0.01)
+    prefs = all_preferences()[::5]
+    old = probabilities(TravelAgent(MODEL_PATH), prefs)
+    new = probabilities(TravelAgent(stump_path), prefs)
+    assert old != new
+
+    assert probabilities(agent, prefs) == old
+    assert not agent.reload()
+
+    version = registry.publish({"model_tree.tree": stump_path})
+    assert agent.reload()
+    assert agent.version == version
+    assert agent.model_path.suffix == ".tree"
+    assert probabilities(agent, prefs) == new
+
+    # Wycofanie do poprzedniej wersji przez watek w tle
+    registry.activate(registry.versions()[0])
+    agent.start()
+    try:
+        for _ in range(500):
+            if agent.version == registry.versions()[0]:
+                break
+            threading.Event().wait(0.01)
+    finally:
+        agent.stop()
+    assert agent.swaps == 2
+    assert probabilities(agent, prefs) == old
+
+
+def test_swap_does_not_disturb_in_flight_decisions(tmp_path, stump_path):
+    registry = ModelRegistry(tmp_path)
+    registry.publish({"model_tree.pkl": MODEL_PATH})
+    agent = HotSwapAgent(registry)
+    prefs = all_preferences()[::3]
+    allowed = [probabilities(TravelAgent(MODEL_PATH), prefs), probabilities(TravelAgent(stump_path), prefs)]
+
+    results, errors, done = [], [], threading.Event()
+
+    def serve():
+        try:
+            while not done.is_set():
+                results.append(probabilities(agent, prefs))
+        except Exception as error:
+            errors.append(error)
+
+    worker = threading.Thread(target=serve)
+    worker.start()
+    try:
+        for source in [stump_path, MODEL_PATH, stump_path]:
+            registry.publish({source.name: source})
+            assert agent.reload()
+    finally:
+        done.set()
+        worker.join()
+
+    assert not errors
+    # Kazda paczka policzona w calosci jednym modelem
+    assert results and all(result in allowed for result in results)
+
+
+def test_broken_version_keeps_serving_previous_model(tmp_path):
+    registry = ModelRegistry(tmp_path)
+    good = registry.publish({"model_tree.pkl": MODEL_PATH})
+    agent = HotSwapAgent(registry)
+
+    broken = tmp_path / "model_tree.pkl"
+    broken.write_bytes(b"to nie jest pickle")
+    registry.publish({"model_tree.pkl": broken})
+
+    assert not agent.reload()
+    assert agent.version == good
+    assert agent.last_error is not None
+    assert json.loads((tmp_path / good / "metadata.json").read_text())["version"] == good
+    assert agent.decide(all_preferences()[0]) is not None
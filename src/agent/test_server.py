@@ -0,0 +1,159 @@
+from pathlib import Path
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+from tornado.testing import AsyncHTTPTestCase, gen_test
+from tornado.httpclient import AsyncHTTPClient
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agent import TravelAgent, UserPreferences
+from instrumentation import AgentMetrics
+from server import MicroBatcher, decision_to_json, make_app
+
+MODEL_PATH = Path(__file__).resolve().parents[2] / "models" / "model_tree.pkl"
+PREFS = [
+    {"travel_comfort": 5, "attractions_quality": 5, "activities_match": 2, "season_match": 1,
+     "user_budget": "high", "trip_cost": "medium"},
+    {"travel_comfort": 1, "attractions_quality": 2, "activities_match": 0, "season_match": 0,
+     "user_budget": "low", "trip_cost": "high"},
+    {"travel_comfort": 3, "attractions_quality": 4, "activities_match": 1, "season_match": 1,
+     "user_budget": "medium", "trip_cost": "medium"},
+]
+
+
+class CountingAgent(TravelAgent):
+    def decide_batch(self, prefs_list, include_paths=True):
+        self.calls.append(len(prefs_list))
+        return super().decide_batch(prefs_list, include_paths)
+
+
+def expected(item, include_paths=True):
+    decision, = TravelAgent(MODEL_PATH).decide_batch([UserPreferences(**item)], include_paths)
+    return decision_to_json(decision)
+
+
+class ServerTest(AsyncHTTPTestCase):
+    def get_app(self):
+        self.agent = CountingAgent(MODEL_PATH, instrumentation=AgentMetrics())
+        self.agent.calls = []
+        return make_app(self.agent, window=0.02, max_batch=64)
+
+    def post(self, path, body):
+        return self.fetch(path, method="POST", body=json.dumps(body), raise_error=False)
+
+    def test_decide_and_batch_match_agent(self):
+        response = self.post("/decide", PREFS[0])
+        assert response.code == 200
+        assert json.loads(response.body) == expected(PREFS[0])
+
+        response = self.post("/decide_batch", {"items": PREFS, "include_paths": False})
+        decisions = json.loads(response.body)["decisions"]
+        assert decisions == [expected(item, include_paths=False) for item in PREFS]
+
+    def test_invalid_requests_return_400(self):
+        assert self.post("/decide", {"travel_comfort": 3}).code == 400
+        assert self.post("/decide", {**PREFS[0], "user_budget": "huge"}).code == 400
+        assert self.post("/decide", {**PREFS[0], "season_match": "1"}).code == 400
+        for field, value in [("travel_comfort", 100), ("travel_comfort", 0), ("attractions_quality", 6),
+                             ("activities_match", 3), ("season_match", -7), ("season_match", 2)]:
+            response = self.post("/decide", {**PREFS[0], field: value})
+            assert response.code == 400 and field in json.loads(response.body)["error"]
+        assert self.post("/decide_batch", {"items": [PREFS[0], {**PREFS[1], "travel_comfort": 9}]}).code == 400
+        assert self.post("/decide_batch", {"items": "x"}).code == 400
+        response = self.fetch("/decide", method="POST", body="{", raise_error=False)
+        assert response.code == 400 and json.loads(response.body) == {"error": "Niepoprawny JSON"}
+        assert json.loads(self.post("/decide_batch", {"items": []}).body) == {"decisions": []}
+
+    @gen_test
+    async def test_concurrent_requests_are_coalesced(self):
+        client = AsyncHTTPClient()
+        url = self.get_url("/decide")
+        items = PREFS * 10
+        responses = await asyncio.gather(*(
+            client.fetch(url, method="POST", body=json.dumps({**item, "include_paths": i % 2 == 0}))
+            for i, item in enumerate(items)
+        ))
+
+        for i, (item, response) in enumerate(zip(items, responses)):
+            assert json.loads(response.body) == expected(item, include_paths=i % 2 == 0)
+        assert sum(self.agent.calls) == len(items)
+        assert len(self.agent.calls) < len(items)
+
+    def test_health_and_metrics(self):
+        self.post("/decide", PREFS[1])
+        health = json.loads(self.fetch("/health").body)
+        assert health["status"] == "ok" and health["items"] == 1
+        assert "travel_agent_decisions_total 1" in self.fetch("/metrics").body.decode()
+
+
+def test_full_batch_is_flushed_without_waiting():
+    async def run():
+        agent = CountingAgent(MODEL_PATH)
+        agent.calls = []
+        batcher = MicroBatcher(agent, window=10.0, max_batch=3)
+        prefs = [UserPreferences(**item) for item in PREFS]
+        results = await asyncio.wait_for(asyncio.gather(*(batcher.submit([p]) for p in prefs)), timeout=2)
+        return agent.calls, results
+
+    calls, results = asyncio.run(run())
+    assert calls == [3] and [len(r) for r in results] == [1, 1, 1]
+
+
+def test_scoring_does_not_block_the_event_loop():
+    release = threading.Event()
+
+    class BlockingAgent(TravelAgent):
+        def decide_batch(self, prefs_list, include_paths=True):
+            # Bez zwolnienia z petli zdarzen (niemozliwego, gdy petla jest zablokowana) paczka sie nie liczy
+            self.released = release.wait(timeout=5)
+            return super().decide_batch(prefs_list, include_paths)
+
+    async def run():
+        agent = BlockingAgent(MODEL_PATH)
+        batcher = MicroBatcher(agent, window=0.001, max_batch=1)
+        big = asyncio.ensure_future(batcher.submit([UserPreferences(**PREFS[0])] * 10))
+        await asyncio.sleep(0.05)
+        assert not big.done()
+        release.set()
+        decisions = await big
+        return agent.released, decisions
+
+    released, decisions = asyncio.run(run())
+    assert released and len(decisions) == 10
+
+
+def test_multiple_worker_processes(tmp_path):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    process = subprocess.Popen(
+        [sys.executable, str(Path(__file__).parent / "server.py"), "--port", str(port), "--workers", "2"],
+        start_new_session=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        pids = set()
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline and len(pids) < 2:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    pids.add(json.loads(response.read())["pid"])
+            except OSError:
+                time.sleep(0.1)
+
+        assert pids and process.pid not in pids
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/decide", data=json.dumps(PREFS[0]).encode())
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert json.loads(response.read()) == expected(PREFS[0])
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=10)
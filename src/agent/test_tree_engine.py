@@ -0,0 +1,51 @@
+from pathlib import Path
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tree_engine import CompiledTree
+
+MODEL_PATH = Path(__file__).parent.parent.parent / "models" / "model_tree.pkl"
+
+
+def test_compiled_tree_matches_sklearn():
+    model = joblib.load(MODEL_PATH)
+    engine = CompiledTree.from_sklearn(model)
+    
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 11, size=(5000, model.n_features_in_)).astype(np.float32)
+    X[:100] += rng.uniform(-0.5, 0.5, size=(100, model.n_features_in_)).astype(np.float32)
+    
+    np.testing.assert_array_equal(engine.apply(X), model.tree_.apply(X))
+    df = pd.DataFrame(X, columns=model.feature_names_in_)
+    np.testing.assert_array_equal(engine.predict_proba(X), model.predict_proba(df))
+    np.testing.assert_array_equal(engine.predict(X), model.predict(df))
+
+
+def test_compiled_tree_empty_batch():
+    engine = CompiledTree.from_sklearn(joblib.load(MODEL_PATH))
+    
+    assert engine.predict_proba(np.zeros((0, 11), dtype=np.float32)).shape == (0, 2)
+
+
+def test_decision_paths_match_sklearn_indicator():
+    model = joblib.load(MODEL_PATH)
+    engine = CompiledTree.from_sklearn(model)
+    
+    rng = np.random.default_rng(1)
+    X = rng.integers(0, 11, size=(500, model.n_features_in_)).astype(np.float32)
+    
+    paths = engine.decision_paths(X)
+    indicator = model.decision_path(pd.DataFrame(X, columns=model.feature_names_in_))
+    
+    for i in range(len(X)):
+        nodes, directions = paths.row(i)
+        expected = indicator.indices[indicator.indptr[i]:indicator.indptr[i + 1]]
+        np.testing.assert_array_equal(np.append(nodes, paths.leaves[i]), np.sort(expected))
+        
+        children = np.where(directions == 1, engine.children_right[nodes], engine.children_left[nodes])
+        np.testing.assert_array_equal(children, np.append(nodes[1:], paths.leaves[i]))
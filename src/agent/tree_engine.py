@@ -0,0 +1,134 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+TREE_LEAF = -1
+LEFT = 0
+RIGHT = 1
+
+
+@dataclass
+class DecisionPaths:
+    leaves: np.ndarray
+    nodes: np.ndarray
+    directions: np.ndarray
+    lengths: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.leaves)
+
+    def row(self, i: int):
+        length = self.lengths[i]
+        return self.nodes[i, :length], self.directions[i, :length]
+
+
+class CompiledTree:
+    def __init__(self, children_left, children_right, feature, threshold, value, classes):
+        self.children_left = np.ascontiguousarray(children_left, dtype=np.intp)
+        self.children_right = np.ascontiguousarray(children_right, dtype=np.intp)
+        is_leaf = self.children_left == TREE_LEAF
+
+        # Liscie dostaja ceche 0, zeby indeksowanie X nigdy nie wyszlo poza zakres
+        self.feature = np.where(is_leaf, 0, feature).astype(np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.classes = np.asarray(classes)
+
+        value = np.asarray(value, dtype=np.float64)
+        if value.ndim == 3:
+            value = value[:, 0, :]
+        value = value[:, :len(self.classes)]
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        self.proba = value / normalizer
+
+        self.node_count = len(self.children_left)
+        self.n_features = int(self.feature.max()) + 1 if self.node_count else 0
+        self._compile_paths()
+
+    def _compile_paths(self):
+        # Sciezka od korzenia do kazdego wezla jest stala, wiec liczymy ja raz
+        depth = np.zeros(self.node_count, dtype=np.intp)
+        parent = np.full(self.node_count, -1, dtype=np.intp)
+        direction = np.full(self.node_count, -1, dtype=np.int8)
+
+        for node in range(self.node_count):
+            for child, side in ((self.children_left[node], LEFT), (self.children_right[node], RIGHT)):
+                if child != TREE_LEAF:
+                    parent[child] = node
+                    direction[child] = side
+                    depth[child] = depth[node] + 1
+
+        self.max_depth = int(depth.max()) if self.node_count else 0
+        self.node_depth = depth
+        self.path_nodes = np.full((self.node_count, self.max_depth), -1, dtype=np.int32)
+        self.path_directions = np.full((self.node_count, self.max_depth), -1, dtype=np.int8)
+
+        for node in np.argsort(depth, kind="stable"):
+            if parent[node] >= 0:
+                d = depth[node] - 1
+                self.path_nodes[node, :d] = self.path_nodes[parent[node], :d]
+                self.path_directions[node, :d] = self.path_directions[parent[node], :d]
+                self.path_nodes[node, d] = parent[node]
+                self.path_directions[node, d] = direction[node]
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledTree":
+        tree = model.tree_
+        return cls(
+            tree.children_left,
+            tree.children_right,
+            tree.feature,
+            tree.threshold,
+            tree.value,
+            model.classes_
+        )
+
+    # Pelny stan skompilowanego drzewa - pozwala odtworzyc je z plikow bez ponownego liczenia sciezek
+    ARRAYS = ('children_left', 'children_right', 'feature', 'threshold', 'classes', 'proba',
+              'node_depth', 'path_nodes', 'path_directions')
+
+    def to_arrays(self) -> dict:
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict) -> "CompiledTree":
+        # Bez kopiowania: tablice (np. widoki np.memmap) sa uzywane bezposrednio
+        tree = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(tree, name, arrays[name])
+        tree.node_count = len(tree.children_left)
+        tree.n_features = int(tree.feature.max()) + 1 if tree.node_count else 0
+        tree.max_depth = tree.path_nodes.shape[1]
+        return tree
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        node = np.zeros(X.shape[0], dtype=np.intp)
+        active = np.arange(X.shape[0])
+
+        while active.size:
+            current = node[active]
+            left = self.children_left[current]
+            internal = left != TREE_LEAF
+            active, current, left = active[internal], current[internal], left[internal]
+
+            go_right = X[active, self.feature[current]] > self.threshold[current]
+            node[active] = np.where(go_right, self.children_right[current], left)
+
+        return node
+
+    def decision_paths(self, X: np.ndarray = None, leaves: np.ndarray = None) -> DecisionPaths:
+        if leaves is None:
+            leaves = self.apply(X)
+        return DecisionPaths(
+            leaves=leaves,
+            nodes=self.path_nodes[leaves],
+            directions=self.path_directions[leaves],
+            lengths=self.node_depth[leaves]
+        )
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self.proba[self.apply(X)]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes[self.predict_proba(X).argmax(axis=1)]
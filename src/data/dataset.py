@@ -0,0 +1,148 @@
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data" / "raw"
+CSV_PATH = DATA_DIR / "dane_v2.csv"
+PARQUET_PATH = DATA_DIR / "dane_v2.parquet"
+
+# Kategorie w kolejnosci alfabetycznej - tak jak kolumny z pd.get_dummies na tekstach
+CATEGORIES = ["high", "low", "medium"]
+CATEGORY_DTYPE = pd.CategoricalDtype(CATEGORIES)
+CATEGORICAL_COLS = ["user_budget", "trip_cost"]
+INT_COLS = [
+    "travel_comfort",
+    "attractions_quality",
+    "activities_match",
+    "season_match",
+    "score",
+    "satisfied",
+]
+COLUMNS = [
+    "travel_comfort",
+    "attractions_quality",
+    "activities_match",
+    "season_match",
+    "user_budget",
+    "trip_cost",
+    "score",
+    "satisfied",
+]
+
+SCHEMA = pa.schema([
+    pa.field(name, pa.dictionary(pa.int8(), pa.string()) if name in CATEGORICAL_COLS else pa.int8())
+    for name in COLUMNS
+])
+CSV_DTYPES = {**{name: np.int8 for name in INT_COLS}, **{name: CATEGORY_DTYPE for name in CATEGORICAL_COLS}}
+
+ROW_GROUP_SIZE = 1_000_000
+BATCH_SIZE = 1_000_000
+
+
+def resolve_dataset_path(path=None, csv_path=CSV_PATH, parquet_path=PARQUET_PATH) -> Path:
+    if path is not None:
+        return Path(path)
+    if not parquet_path.exists():
+        return csv_path
+    if csv_path.exists() and csv_path.stat().st_mtime > parquet_path.stat().st_mtime:
+        # CSV wygenerowany ponownie po konwersji - Parquet jest nieaktualny, czytamy nowszy plik
+        warnings.warn(
+            f"{parquet_path.name} jest starszy niz {csv_path.name}; uzywam CSV "
+            f"(odswiez Parquet: python src/data/dataset.py)",
+            stacklevel=2,
+        )
+        return csv_path
+    return parquet_path
+
+
+def is_parquet(path) -> bool:
+    return Path(path).suffix in (".parquet", ".pq")
+
+
+def typed(df: pd.DataFrame) -> pd.DataFrame:
+    for name in df.columns:
+        if name in CATEGORICAL_COLS:
+            df[name] = df[name].astype(CATEGORY_DTYPE)
+        elif name in INT_COLS:
+            df[name] = df[name].astype(np.int8)
+    return df
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    df = typed(df[COLUMNS].copy())
+    return pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+
+
+def write_parquet(chunks: Iterable[pd.DataFrame], path, row_group_size: int = ROW_GROUP_SIZE) -> int:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    rows = 0
+
+    with pq.ParquetWriter(tmp_path, SCHEMA, compression="zstd") as writer:
+        for chunk in chunks:
+            writer.write_table(to_table(chunk), row_group_size=row_group_size)
+            rows += len(chunk)
+
+    tmp_path.replace(path)
+    return rows
+
+
+def load_dataset(path=None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    path = resolve_dataset_path(path)
+    if is_parquet(path):
+        return typed(pq.read_table(path, columns=columns).to_pandas())
+    return pd.read_csv(path, usecols=columns, dtype=CSV_DTYPES)[columns or slice(None)]
+
+
+def iter_batches(path=None, columns: Optional[List[str]] = None, batch_size: int = BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    path = resolve_dataset_path(path)
+    if is_parquet(path):
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield typed(batch.to_pandas())
+    else:
+        for chunk in pd.read_csv(path, usecols=columns, dtype=CSV_DTYPES, chunksize=batch_size):
+            yield chunk[columns or slice(None)]
+
+
+def count_rows(path=None) -> int:
+    path = resolve_dataset_path(path)
+    if is_parquet(path):
+        return pq.ParquetFile(path).metadata.num_rows
+    return sum(len(chunk) for chunk in iter_batches(path, columns=[COLUMNS[0]]))
+
+
+def convert(source, target, batch_size: int = BATCH_SIZE, row_group_size: int = ROW_GROUP_SIZE) -> int:
+    batches = iter_batches(source, batch_size=batch_size)
+    if is_parquet(target):
+        return write_parquet(batches, target, row_group_size)
+
+    target = Path(target)
+    rows = 0
+    with open(target, "w", newline="") as f:
+        for i, batch in enumerate(batches):
+            batch.to_csv(f, index=False, header=(i == 0))
+            rows += len(batch)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Konwersja zbioru danych CSV <-> Parquet")
+    parser.add_argument("source", type=Path, nargs="?", default=CSV_PATH)
+    parser.add_argument("target", type=Path, nargs="?", default=PARQUET_PATH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE)
+    args = parser.parse_args(argv)
+
+    rows = convert(args.source, args.target, args.batch_size, args.row_group_size)
+    print(f"Zapisano {rows} wierszy: {args.source} -> {args.target}")
+
+
+if __name__ == "__main__":
+    main()
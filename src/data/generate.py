@@ -1,80 +1,186 @@
+import argparse
+import time
 import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from dataset import is_parquet, write_parquet
+
 N_SAMPLES = 1000
 RANDOM_STATE = 42
-np.random.seed(RANDOM_STATE)
+CHUNK_SIZE = 1_000_000
+
+LEVELS = np.array(["low", "medium", "high"])
+LEVEL_PROBS = [0.4, 0.4, 0.2]
+SEASON_PROBS = [0.3, 0.7]
+
+COLUMNS = [
+    "travel_comfort",
+    "attractions_quality",
+    "activities_match",
+    "season_match",
+    "user_budget",
+    "trip_cost",
+    "score",
+    "satisfied",
+]
+NUMERIC_COLS = [
+    "travel_comfort",
+    "attractions_quality",
+    "activities_match",
+    "season_match",
+    "score",
+    "satisfied",
+]
+MAX_SCORE = 10
 
 OUTPUT_PATH = Path(__file__).resolve().parents[2] / "data" / "raw" / "dane_v2.csv"
 
-def generate_row() -> dict:
-    return {
-        "travel_comfort": np.random.randint(1, 6),
-        "attractions_quality": np.random.randint(1, 6),
-        "activities_match": np.random.randint(0, 3),
-        "season_match": np.random.choice([0, 1], p=[0.3, 0.7]),
-        "user_budget": np.random.choice(["low", "medium", "high"], p=[0.4, 0.4, 0.2]),
-        "trip_cost": np.random.choice(["low", "medium", "high"], p=[0.4, 0.4, 0.2]),
-    }
-def generate_dataset(n_samples: int) -> pd.DataFrame:
-    data = [generate_row() for _ in range(n_samples)]
-    return pd.DataFrame(data)
-
-def compute_score(row):
-    score = 0
-    if row["travel_comfort"] >= 4:
-        score += 2
-    elif row["travel_comfort"] >= 3:
-        score += 1
-    if row["attractions_quality"] >= 4:
-        score += 2
-    elif row["attractions_quality"] >= 3: 
-        score += 1
-    score += row["activities_match"]
-    if row["season_match"] == 1:
-        score += 1
-    if row["user_budget"] == row["trip_cost"]:
-        score += 2
-    elif row["user_budget"] == "high" and row["trip_cost"] != "high": 
-        score += 1
-    return score
-
-def compute_satisfied(row):
-    base_prob = 0.08 + 0.09 * row["score"] 
-    noise = np.random.uniform(-0.03, 0.03)
-    prob = np.clip(base_prob + noise, 0.05, 0.92) 
-    return int(np.random.rand() < prob)
-
-if __name__ == "__main__": 
-    df = generate_dataset(N_SAMPLES)
-    df["score"] = df.apply(compute_score, axis=1) 
-    df["satisfied"] = df.apply(compute_satisfied, axis=1)
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True) 
-    df.to_csv(OUTPUT_PATH, index=False)
-
-    print("Dataset wygenerowany:") 
-    print(df.head())
-    print("\nRozkład satisfied:") 
-    print(df["satisfied"].value_counts(normalize=True))
-    print("\nŚredni score:") 
-    print(df.groupby("satisfied")["score"].mean())
-    print("\nRozkład score:")
-    print(df["score"].describe())
-    print( 
-        df.groupby("score")["satisfied"] 
-        .mean()
-        .reset_index() 
-        .rename(columns={"satisfied": "satisfied=1"})
-    )
-    numeric_cols = [
-        "travel_comfort", 
-        "attractions_quality", 
-        "activities_match",
-        "season_match", 
-        "score",
-        "satisfied" 
-    ]
-
-print(df[numeric_cols].corr()) 
-print(df.groupby("score")["satisfied"].mean())
\ No newline at end of file
+
+def generate_features(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "travel_comfort": rng.integers(1, 6, size=n, dtype=np.int8),
+        "attractions_quality": rng.integers(1, 6, size=n, dtype=np.int8),
+        "activities_match": rng.integers(0, 3, size=n, dtype=np.int8),
+        "season_match": rng.choice(np.array([0, 1], dtype=np.int8), size=n, p=SEASON_PROBS),
+        "user_budget": LEVELS[rng.choice(3, size=n, p=LEVEL_PROBS)],
+        "trip_cost": LEVELS[rng.choice(3, size=n, p=LEVEL_PROBS)],
+    })
+
+
+def compute_score(df: pd.DataFrame) -> np.ndarray:
+    comfort = df["travel_comfort"].to_numpy()
+    quality = df["attractions_quality"].to_numpy()
+    budget = df["user_budget"].to_numpy()
+    cost = df["trip_cost"].to_numpy()
+
+    score = np.where(comfort >= 4, 2, np.where(comfort >= 3, 1, 0))
+    score += np.where(quality >= 4, 2, np.where(quality >= 3, 1, 0))
+    score += df["activities_match"].to_numpy()
+    score += df["season_match"].to_numpy() == 1
+    score += np.where(budget == cost, 2, np.where((budget == "high") & (cost != "high"), 1, 0))
+    return score.astype(np.int8)
+
+
+def compute_satisfied(score: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    base_prob = 0.08 + 0.09 * score
+    noise = rng.uniform(-0.03, 0.03, size=len(score))
+    prob = np.clip(base_prob + noise, 0.05, 0.92)
+    return (rng.random(len(score)) < prob).astype(np.int8)
+
+
+def generate_chunk(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    df = generate_features(rng, n)
+    df["score"] = compute_score(df)
+    df["satisfied"] = compute_satisfied(df["score"].to_numpy(), rng)
+    return df[COLUMNS]
+
+
+def iter_chunks(n_samples: int, chunk_size: int = CHUNK_SIZE, seed: int = RANDOM_STATE):
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_samples, chunk_size):
+        yield generate_chunk(rng, min(chunk_size, n_samples - start))
+
+
+def generate_dataset(n_samples: int, seed: int = RANDOM_STATE) -> pd.DataFrame:
+    return generate_chunk(np.random.default_rng(seed), n_samples)
+
+
+class DatasetSummary:
+    def __init__(self):
+        self.n = 0
+        self.score_counts = np.zeros(MAX_SCORE + 1, dtype=np.int64)
+        self.satisfied_by_score = np.zeros(MAX_SCORE + 1, dtype=np.int64)
+        self.sums = np.zeros(len(NUMERIC_COLS))
+        self.products = np.zeros((len(NUMERIC_COLS), len(NUMERIC_COLS)))
+
+    def update(self, df: pd.DataFrame):
+        score = df["score"].to_numpy()
+        self.n += len(df)
+        self.score_counts += np.bincount(score, minlength=MAX_SCORE + 1)
+        self.satisfied_by_score += np.bincount(score, weights=df["satisfied"].to_numpy(), minlength=MAX_SCORE + 1).astype(np.int64)
+
+        values = df[NUMERIC_COLS].to_numpy(dtype=np.float64)
+        self.sums += values.sum(axis=0)
+        self.products += values.T @ values
+
+    def report(self):
+        satisfied = self.satisfied_by_score.sum()
+        scores = np.arange(MAX_SCORE + 1)
+        observed = self.score_counts > 0
+
+        print("\nRozkład satisfied:")
+        print(pd.Series({1: satisfied / self.n, 0: 1 - satisfied / self.n}, name="proportion"))
+        print("\nŚredni score:")
+        print(pd.Series({
+            0: (scores * (self.score_counts - self.satisfied_by_score)).sum() / max(self.n - satisfied, 1),
+            1: (scores * self.satisfied_by_score).sum() / max(satisfied, 1),
+        }, name="score"))
+        print("\nRozkład score:")
+        mean = (scores * self.score_counts).sum() / self.n
+        std = np.sqrt((((scores - mean) ** 2) * self.score_counts).sum() / max(self.n - 1, 1))
+        print(pd.Series({"count": self.n, "mean": mean, "std": std,
+                         "min": scores[observed].min(), "max": scores[observed].max()}, name="score"))
+        print(pd.DataFrame({
+            "score": scores[observed],
+            "satisfied=1": self.satisfied_by_score[observed] / self.score_counts[observed],
+        }))
+
+        mean_vec = self.sums / self.n
+        cov = self.products / self.n - np.outer(mean_vec, mean_vec)
+        std_vec = np.sqrt(np.diag(cov))
+        print(pd.DataFrame(cov / np.outer(std_vec, std_vec), index=NUMERIC_COLS, columns=NUMERIC_COLS))
+
+
+def summarized(chunks, summary: DatasetSummary):
+    for i, chunk in enumerate(chunks):
+        summary.update(chunk)
+        if i == 0:
+            print("Dataset wygenerowany:")
+            print(chunk.head())
+        yield chunk
+
+
+def write_csv(chunks, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with open(tmp_path, "w", newline="") as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, index=False, header=(i == 0))
+
+    tmp_path.replace(path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generator syntetycznego zbioru danych")
+    parser.add_argument("--samples", "-n", type=int, default=N_SAMPLES, help="liczba wierszy")
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE, help="ziarno generatora")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="liczba wierszy w paczce zapisu")
+    parser.add_argument("--output", "-o", type=Path, default=OUTPUT_PATH, help="plik wyjściowy (.csv lub .parquet)")
+    args = parser.parse_args(argv)
+    # Walidacja przed zapisem - inaczej powstaje pusty plik, a raport nie ma z czego liczyć
+    for name in ("samples", "chunk_size"):
+        if getattr(args, name) <= 0:
+            parser.error(f"--{name.replace('_', '-')} musi być większe od 0")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+
+    summary = DatasetSummary()
+    chunks = summarized(iter_chunks(args.samples, args.chunk_size, args.seed), summary)
+    if is_parquet(args.output):
+        write_parquet(chunks, args.output, row_group_size=args.chunk_size)
+    else:
+        write_csv(chunks, args.output)
+
+    summary.report()
+    elapsed = time.perf_counter() - start
+    print(f"\nZapisano {summary.n} wierszy do {args.output} w {elapsed:.1f} s ({summary.n / elapsed:,.0f} wierszy/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from pathlib import Path
+import sys
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from dataset import (CATEGORY_DTYPE, CSV_PATH, SCHEMA, convert, count_rows, iter_batches, load_dataset,
+                     resolve_dataset_path, write_parquet)
+from generate import iter_chunks
+
+
+def test_parquet_round_trip_is_typed(tmp_path):
+    target = tmp_path / "dane.parquet"
+    
+    assert convert(CSV_PATH, target, batch_size=300, row_group_size=300) == 1000
+    
+    assert pq.ParquetFile(target).schema_arrow == SCHEMA
+    assert pq.ParquetFile(target).num_row_groups == 4
+    from_csv = load_dataset(CSV_PATH)
+    from_parquet = load_dataset(target)
+    pd.testing.assert_frame_equal(from_parquet, from_csv)
+    assert from_parquet["travel_comfort"].dtype == np.int8
+    assert from_parquet["user_budget"].dtype == CATEGORY_DTYPE
+    assert list(pd.get_dummies(from_parquet.drop("satisfied", axis=1)).columns) == \
+        list(pd.get_dummies(pd.read_csv(CSV_PATH).drop("satisfied", axis=1)).columns)
+
+
+def test_projection_and_streaming(tmp_path):
+    target = tmp_path / "dane.parquet"
+    convert(CSV_PATH, target, row_group_size=250)
+    expected = pd.read_csv(CSV_PATH)
+    
+    projected = load_dataset(target, columns=["score", "trip_cost"])
+    assert list(projected.columns) == ["score", "trip_cost"]
+    
+    for path in (CSV_PATH, target):
+        batches = list(iter_batches(path, columns=["trip_cost", "satisfied"], batch_size=400))
+        assert all(0 < len(b) <= 400 for b in batches) and len(batches) >= 3
+        streamed = pd.concat(batches, ignore_index=True)
+        assert list(streamed.columns) == ["trip_cost", "satisfied"]
+        assert streamed["trip_cost"].astype(str).tolist() == expected["trip_cost"].tolist()
+        assert count_rows(path) == 1000
+
+
+def test_generated_chunks_write_as_row_groups(tmp_path):
+    target = tmp_path / "gen.parquet"
+    assert write_parquet(iter_chunks(5000, 2000, seed=1), target, row_group_size=2000) == 5000
+    assert pq.ParquetFile(target).num_row_groups == 3
+
+
+def test_resolve_prefers_fresh_parquet_over_stale(tmp_path):
+    csv_path, parquet_path = tmp_path / "dane.csv", tmp_path / "dane.parquet"
+    csv_path.write_text("x\n")
+    assert resolve_dataset_path(csv_path=csv_path, parquet_path=parquet_path) == csv_path
+
+    parquet_path.write_bytes(b"")
+    os.utime(csv_path, (1000, 1000))
+    os.utime(parquet_path, (2000, 2000))
+    assert resolve_dataset_path(csv_path=csv_path, parquet_path=parquet_path) == parquet_path
+
+    # CSV wygenerowany ponownie po konwersji
+    os.utime(csv_path, (3000, 3000))
+    with pytest.warns(UserWarning, match="starszy"):
+        assert resolve_dataset_path(csv_path=csv_path, parquet_path=parquet_path) == csv_path
+    assert resolve_dataset_path(parquet_path, csv_path=csv_path, parquet_path=parquet_path) == parquet_path
@@ -0,0 +1,85 @@
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from generate import LEVEL_PROBS, LEVELS, SEASON_PROBS, generate_dataset, iter_chunks, main
+
+ALPHA = 1e-4
+
+
+def legacy_score(row):
+    score = 0
+    if row["travel_comfort"] >= 4:
+        score += 2
+    elif row["travel_comfort"] >= 3:
+        score += 1
+    if row["attractions_quality"] >= 4:
+        score += 2
+    elif row["attractions_quality"] >= 3:
+        score += 1
+    score += row["activities_match"]
+    if row["season_match"] == 1:
+        score += 1
+    if row["user_budget"] == row["trip_cost"]:
+        score += 2
+    elif row["user_budget"] == "high" and row["trip_cost"] != "high":
+        score += 1
+    return score
+
+
+def assert_marginal(values, categories, probs):
+    observed = np.array([(values == c).sum() for c in categories])
+    assert observed.sum() == len(values)
+    assert stats.chisquare(observed, np.array(probs) * len(values)).pvalue > ALPHA
+
+
+def test_marginals_match_legacy_distribution():
+    df = generate_dataset(200_000, seed=7)
+    
+    for col in ("travel_comfort", "attractions_quality"):
+        assert_marginal(df[col].to_numpy(), range(1, 6), [0.2] * 5)
+    assert_marginal(df["activities_match"].to_numpy(), range(3), [1 / 3] * 3)
+    assert_marginal(df["season_match"].to_numpy(), [0, 1], SEASON_PROBS)
+    for col in ("user_budget", "trip_cost"):
+        assert_marginal(df[col].to_numpy(), LEVELS, LEVEL_PROBS)
+    
+    table = pd.crosstab(df["user_budget"], df["trip_cost"])
+    assert stats.chi2_contingency(table).pvalue > ALPHA
+
+
+def test_score_and_satisfied_follow_legacy_rules():
+    df = generate_dataset(200_000, seed=11)
+    
+    sample = df.sample(2000, random_state=0)
+    assert (sample.apply(legacy_score, axis=1) == sample["score"]).all()
+    
+    for score, group in df.groupby("score"):
+        # Szum jest symetryczny, wiec oczekiwane p to srodek przedzialu (z obcieciem do 0.92)
+        expected = min(0.08 + 0.09 * score, 0.92)
+        assert stats.binomtest(int(group["satisfied"].sum()), len(group), expected).pvalue > ALPHA
+
+
+def test_chunked_output_is_seed_deterministic(tmp_path):
+    out = tmp_path / "data.csv"
+    main(["--samples", "2500", "--chunk-size", "1000", "--seed", "3", "--output", str(out)])
+    
+    written = pd.read_csv(out)
+    expected = pd.concat(iter_chunks(2500, 1000, seed=3), ignore_index=True)
+    
+    assert len(written) == 2500
+    pd.testing.assert_frame_equal(written, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("args", [["--samples", "0"], ["--chunk-size", "0"], ["-n", "-5"]])
+def test_non_positive_sizes_are_rejected_before_writing(tmp_path, args):
+    output = tmp_path / "data.csv"
+    with pytest.raises(SystemExit) as error:
+        main(args + ["--output", str(output)])
+    assert error.value.code == 2
+    assert not output.exists()
@@ -0,0 +1,4 @@
+from .cache import GeoCache
+from .client import GeoClient, attractions_quality, normalize_city
+
+__all__ = ['GeoCache', 'GeoClient', 'attractions_quality', 'normalize_city']
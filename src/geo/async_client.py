@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import replace
+from typing import List, Optional
+from urllib.parse import urlencode, urlparse
+
+from .cache import MISSING
+from .client import (
+    NOMINATIM_URL, OVERPASS_URL, USER_AGENT, DEFAULT_RADIUS, NOMINATIM_TIMEOUT, OVERPASS_TIMEOUT,
+    attractions_key, geocode_key, overpass_count_query, parse_attractions, parse_geocode
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504, 599}
+DEFAULT_MAX_CONNECTIONS = 8
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+class HostRateLimiter:
+    def __init__(self, min_interval: float = 1.0, per_host: Optional[dict] = None, clock=time.monotonic):
+        self.min_interval = min_interval
+        self.per_host = per_host or {}
+        self.clock = clock
+        self._next_slot = {}
+
+    async def wait(self, url: str):
+        host = urlparse(url).netloc
+        interval = self.per_host.get(host, self.min_interval)
+        # Rezerwacja slotu jest synchroniczna, wiec w petli asyncio nie potrzeba blokady
+        now = self.clock()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncGeoClient:
+    def __init__(self, cache=None, http=None, nominatim_url: str = NOMINATIM_URL,
+                 overpass_url: str = OVERPASS_URL, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 rate_limiter: Optional[HostRateLimiter] = None, retries: int = DEFAULT_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF):
+        self.cache = cache
+        self._http = http
+        self.nominatim_url = nominatim_url
+        self.overpass_url = overpass_url
+        self.max_connections = max_connections
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.retries = retries
+        self.backoff = backoff
+        self.requests_sent = 0
+        self._owns_http = False
+
+    @property
+    def http(self):
+        if self._http is None:
+            from tornado.httpclient import AsyncHTTPClient
+            # Wlasna instancja z limitem rownoleglych polaczen dzielonym przez wszystkie miasta
+            self._http = AsyncHTTPClient(force_instance=True, max_clients=self.max_connections)
+            self._owns_http = True
+        return self._http
+
+    def close(self):
+        if self._owns_http and self._http is not None:
+            self._http.close()
+            self._http = None
+            self._owns_http = False
+
+    async def fetch_json(self, url: str, method: str = "GET", params: Optional[dict] = None,
+                         form: Optional[dict] = None, timeout: float = NOMINATIM_TIMEOUT):
+        from tornado.httpclient import HTTPClientError, HTTPRequest
+
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        body = urlencode(form) if form is not None else None
+
+        for attempt in range(self.retries + 1):
+            await self.rate_limiter.wait(url)
+            request = HTTPRequest(
+                url, method=method, body=body, headers={'User-Agent': USER_AGENT},
+                connect_timeout=timeout, request_timeout=timeout
+            )
+            self.requests_sent += 1
+            try:
+                response = await self.http.fetch(request)
+                return json.loads(response.body)
+            except (HTTPClientError, OSError) as e:
+                code = getattr(e, 'code', 599)
+                if code not in RETRY_STATUSES or attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                retry_after = e.response.headers.get('Retry-After') if getattr(e, 'response', None) else None
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                logger.info("Ponawiam %s po bledzie %s (proba %d, %.1fs)", url, code, attempt + 1, delay)
+                await asyncio.sleep(delay)
+
+    async def city_coordinates(self, city_name: str) -> Optional[dict]:
+        async def fetch():
+            data = await self.fetch_json(
+                self.nominatim_url, params={'q': city_name, 'format': 'json', 'limit': 1},
+                timeout=NOMINATIM_TIMEOUT
+            )
+            return parse_geocode(data, city_name)
+
+        return await self._cached(geocode_key(city_name), fetch, f"geokodowanie '{city_name}'")
+
+    async def attractions(self, lat: float, lon: float, radius: int = DEFAULT_RADIUS) -> Optional[dict]:
+        async def fetch():
+            data = await self.fetch_json(
+                self.overpass_url, method="POST", form={'data': overpass_count_query(lat, lon, radius)},
+                timeout=OVERPASS_TIMEOUT
+            )
+            return parse_attractions(data)
+
+        return await self._cached(
+            attractions_key(lat, lon, radius), fetch, f"atrakcje ({lat:.4f}, {lon:.4f}, r={radius})"
+        )
+
+    async def _cached(self, key: str, fetch, label: str):
+        if self.cache is not None:
+            value = self.cache.get(key)
+            if value is not MISSING:
+                return value
+
+        try:
+            value = await fetch()
+        except Exception as e:
+            # Bledy transportu i limity (po wyczerpaniu ponowien) nie sa negatywnym wynikiem
+            logger.warning("Blad zapytania: %s: %s", label, e)
+            return None
+
+        if self.cache is not None:
+            self.cache.set(key, value)
+        return value
+
+    async def resolve_city(self, city_name: str) -> dict:
+        coords = await self.city_coordinates(city_name)
+        if not coords:
+            return {'query': city_name, 'error': 'not_found'}
+
+        attractions = await self.attractions(coords['lat'], coords['lon'])
+        if not attractions:
+            return {'query': city_name, 'error': 'attractions', **coords}
+
+        return {'query': city_name, 'error': None, **coords, **attractions}
+
+    async def resolve_cities(self, city_names: List[str]) -> List[dict]:
+        return list(await asyncio.gather(*(self.resolve_city(name) for name in city_names)))
+
+
+def resolve_cities(city_names: List[str], **client_options) -> List[dict]:
+    async def run():
+        client = AsyncGeoClient(**client_options)
+        try:
+            return await client.resolve_cities(city_names)
+        finally:
+            client.close()
+
+    return asyncio.run(run())
+
+
+def decide_cities(agent, resolved: List[dict], base_prefs) -> List[tuple]:
+    found = [city for city in resolved if city['error'] is None]
+    prefs_list = [replace(base_prefs, attractions_quality=city['quality']) for city in found]
+    return list(zip(found, agent.decide_batch(prefs_list)))
@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+import unicodedata
+from typing import Optional
+from urllib.parse import urlparse
+
+from .cache import MISSING
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+USER_AGENT = "TravelAgent/1.0"
+DEFAULT_RADIUS = 5000
+NOMINATIM_TIMEOUT = 10
+OVERPASS_TIMEOUT = 30
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_city(city_name: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", city_name).casefold().split())
+
+
+def geocode_key(city_name: str) -> str:
+    return f"geocode:{normalize_city(city_name)}"
+
+
+def attractions_key(lat: float, lon: float, radius: int) -> str:
+    return f"attractions:{lat:.5f},{lon:.5f},{int(radius)}"
+
+
+def attractions_quality(total: int) -> int:
+    if total >= 200:
+        return 5
+    elif total >= 100:
+        return 4
+    elif total >= 50:
+        return 3
+    elif total >= 20:
+        return 2
+    return 1
+
+
+def overpass_count_query(lat: float, lon: float, radius: int = DEFAULT_RADIUS) -> str:
+    return f"""
+    [out:json][timeout:25];
+    (
+      node["tourism"](around:{radius},{lat},{lon});
+      way["tourism"](around:{radius},{lat},{lon});
+    );
+    out count;
+    """
+
+
+def parse_geocode(data, city_name: str) -> Optional[dict]:
+    if not data:
+        return None
+    return {
+        'name': data[0].get('name', city_name),
+        'lat': float(data[0]['lat']),
+        'lon': float(data[0]['lon'])
+    }
+
+
+def parse_attractions(data) -> Optional[dict]:
+    if 'elements' in data and data['elements']:
+        tags = data['elements'][0].get('tags', {})
+        total = int(tags.get('total', 0))
+        return {'total': total, 'quality': attractions_quality(total)}
+    return None
+
+
+class GeoClient:
+    def __init__(self, cache=None, http=None, nominatim_url: str = NOMINATIM_URL,
+                 overpass_url: str = OVERPASS_URL, min_interval: float = 1.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.cache = cache
+        self._http = http
+        self.nominatim_url = nominatim_url
+        self.overpass_url = overpass_url
+        self.min_interval = min_interval
+        self.clock = clock
+        self.sleep = sleep
+        self._last_request = {}
+        self._throttle_lock = threading.Lock()
+
+    @property
+    def http(self):
+        if self._http is None:
+            import requests
+            self._http = requests.Session()
+            self._http.headers['User-Agent'] = USER_AGENT
+        return self._http
+
+    def city_coordinates(self, city_name: str) -> Optional[dict]:
+        return self._cached(
+            geocode_key(city_name),
+            lambda: self._fetch_coordinates(city_name),
+            f"geokodowanie '{city_name}'"
+        )
+
+    def attractions(self, lat: float, lon: float, radius: int = DEFAULT_RADIUS) -> Optional[dict]:
+        return self._cached(
+            attractions_key(lat, lon, radius),
+            lambda: self._fetch_attractions(lat, lon, radius),
+            f"atrakcje ({lat:.4f}, {lon:.4f}, r={radius})"
+        )
+
+    def _cached(self, key: str, fetch, label: str):
+        if self.cache is not None:
+            value = self.cache.get(key)
+            if value is not MISSING:
+                return value
+
+        try:
+            value = fetch()
+        except Exception as e:
+            # Blad sieci, timeout, 429/5xx - nie wiemy, czy miasto istnieje, wiec nic nie zapisujemy
+            logger.warning("Blad zapytania: %s: %s", label, e)
+            return None
+
+        if self.cache is not None:
+            # Potwierdzony brak wyniku (None) trafia do cache z krotszym TTL (negative caching)
+            self.cache.set(key, value)
+        return value
+
+    def _fetch_coordinates(self, city_name: str) -> Optional[dict]:
+        self._throttle(self.nominatim_url)
+        response = self.http.get(
+            self.nominatim_url,
+            params={'q': city_name, 'format': 'json', 'limit': 1},
+            headers={'User-Agent': USER_AGENT},
+            timeout=NOMINATIM_TIMEOUT
+        )
+        response.raise_for_status()
+        return parse_geocode(response.json(), city_name)
+
+    def _fetch_attractions(self, lat: float, lon: float, radius: int) -> Optional[dict]:
+        self._throttle(self.overpass_url)
+        response = self.http.post(
+            self.overpass_url,
+            data={'data': overpass_count_query(lat, lon, radius)},
+            headers={'User-Agent': USER_AGENT},
+            timeout=OVERPASS_TIMEOUT
+        )
+        response.raise_for_status()
+        return parse_attractions(response.json())
+
+    def _throttle(self, url: str):
+        host = urlparse(url).netloc
+        with self._throttle_lock:
+            now = self.clock()
+            wait = self._last_request.get(host, -float('inf')) + self.min_interval - now
+            self._last_request[host] = now + max(wait, 0.0)
+        if wait > 0:
+            self.sleep(wait)
@@ -0,0 +1,142 @@
+from pathlib import Path
+from urllib.parse import parse_qs
+import asyncio
+import json
+import re
+import sys
+
+import tornado.httpserver
+import tornado.netutil
+import tornado.web
+
+from src.geo import GeoCache
+from src.geo.async_client import AsyncGeoClient, HostRateLimiter, decide_cities
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+
+from agent import TravelAgent, UserPreferences
+
+MODEL_PATH = Path(__file__).parent.parent.parent / "models" / "model_tree.pkl"
+CITIES = {
+    "paris": ("48.85", "2.35", 232),
+    "rome": ("41.90", "12.49", 120),
+    "krakow": ("50.06", "19.94", 30),
+}
+
+
+class TrackingHandler(tornado.web.RequestHandler):
+    async def prepare(self):
+        # Liczba zapytan obslugiwanych jednoczesnie - dowod wspolbieznosci niezalezny od zegara
+        app = self.application
+        app.in_flight += 1
+        app.max_in_flight = max(app.max_in_flight, app.in_flight)
+
+    def on_finish(self):
+        self.application.in_flight -= 1
+
+
+class SearchHandler(TrackingHandler):
+    async def get(self):
+        self.application.calls.append("search")
+        city = CITIES.get(self.get_argument("q").lower())
+        await asyncio.sleep(0.05)
+        self.write(json.dumps([{"name": self.get_argument("q"), "lat": city[0], "lon": city[1]}] if city else []))
+
+
+class InterpreterHandler(TrackingHandler):
+    async def post(self):
+        self.application.calls.append("interpreter")
+        if self.application.failures > 0:
+            self.application.failures -= 1
+            raise tornado.web.HTTPError(503)
+        query = parse_qs(self.request.body.decode())["data"][0]
+        lat = float(re.search(r"around:\d+,([-\d.]+),", query).group(1))
+        total = next(total for city_lat, _, total in CITIES.values() if float(city_lat) == lat)
+        await asyncio.sleep(0.05)
+        self.write(json.dumps({"elements": [{"tags": {"total": str(total)}}]}))
+
+
+def make_app(failures=0):
+    app = tornado.web.Application([(r"/search", SearchHandler), (r"/interpreter", InterpreterHandler)])
+    app.calls = []
+    app.failures = failures
+    app.in_flight = app.max_in_flight = 0
+    return app
+
+
+async def resolve(names, failures=0, cache=None):
+    app = make_app(failures)
+    sockets = tornado.netutil.bind_sockets(0, address="127.0.0.1")
+    server = tornado.httpserver.HTTPServer(app)
+    server.add_sockets(sockets)
+    port = sockets[0].getsockname()[1]
+    client = AsyncGeoClient(
+        cache=cache,
+        nominatim_url=f"http://127.0.0.1:{port}/search",
+        overpass_url=f"http://127.0.0.1:{port}/interpreter",
+        rate_limiter=HostRateLimiter(min_interval=0),
+        backoff=0.01
+    )
+    try:
+        results = await client.resolve_cities(names)
+        return results, app.calls, app.max_in_flight
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_cities_resolve_concurrently_with_retry(tmp_path):
+    cache = GeoCache(tmp_path / "geo.sqlite")
+    results, calls, max_in_flight = asyncio.run(
+        resolve(["Paris", "Rome", "Krakow", "Atlantis"], failures=2, cache=cache)
+    )
+    
+    assert [r["error"] for r in results] == [None, None, None, "not_found"]
+    assert [r.get("quality") for r in results] == [5, 4, 2, None]
+    assert calls.count("interpreter") == 5
+    assert max_in_flight >= 3
+    
+    results, calls, _ = asyncio.run(resolve(["paris", "rome"], cache=cache))
+    assert [r["total"] for r in results] == [232, 120]
+    assert calls == []
+
+
+def test_rate_limiter_spaces_requests_per_host(monkeypatch):
+    # Zegar stoi w miejscu, a asyncio.sleep tylko zapisuje czas oczekiwania - bez zaleznosci od obciazenia maszyny
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(round(delay, 6))
+
+    async def run():
+        limiter = HostRateLimiter(min_interval=0.05, per_host={"b.test": 1.0}, clock=lambda: 100.0)
+        for host in ["a", "a", "b", "a", "b"]:
+            await limiter.wait(f"http://{host}.test/x")
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    asyncio.run(run())
+    assert delays == [0.05, 0.1, 1.0]
+
+
+def test_resolved_cities_feed_batched_decision():
+    results, _, _ = asyncio.run(resolve(["Paris", "Krakow", "Atlantis"]))
+    agent = TravelAgent(str(MODEL_PATH))
+    base = UserPreferences(4, 1, 1, 1, "medium", "medium")
+    
+    decided = decide_cities(agent, results, base)
+    
+    assert [info["query"] for info, _ in decided] == ["Paris", "Krakow"]
+    for info, decision in decided:
+        assert decision == agent.decide(UserPreferences(4, info["quality"], 1, 1, "medium", "medium"))
+
+
+def test_exhausted_retries_are_not_cached(tmp_path):
+    cache = GeoCache(tmp_path / "geo.sqlite")
+    results, calls, _ = asyncio.run(resolve(["Paris"], failures=10, cache=cache))
+    assert results[0]["error"] == "attractions"
+    assert calls.count("interpreter") == 4
+
+    # Kolejne zapytanie trafia do serwera zamiast do negatywnego wpisu w cache
+    results, calls, _ = asyncio.run(resolve(["Paris"], cache=cache))
+    assert results[0]["error"] is None and results[0]["total"] == 232
+    assert calls == ["interpreter"]
@@ -0,0 +1,115 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import json
+import threading
+
+import pytest
+import requests
+
+from src.geo import GeoCache, GeoClient
+from src.geo.cache import MISSING
+
+CITIES = {"paris": {"name": "Paris", "lat": "48.8566", "lon": "2.3522"}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    calls = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        self.calls.append(("GET", query["q"][0]))
+        city = CITIES.get(query["q"][0].lower())
+        self._reply(200, [city] if city else [])
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        self.calls.append(("POST", body))
+        if "around:1" in parse_qs(body)["data"][0]:
+            self._reply(500, {})
+        else:
+            self._reply(200, {"elements": [{"tags": {"total": "150"}}]})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubHandler.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def make_client(base_url, cache):
+    return GeoClient(
+        cache=cache,
+        http=requests.Session(),
+        nominatim_url=f"{base_url}/search",
+        overpass_url=f"{base_url}/interpreter",
+        min_interval=0
+    )
+
+
+def test_geocoding_is_cached_across_instances(stub_server, tmp_path):
+    client = make_client(stub_server, GeoCache(tmp_path / "geo.sqlite"))
+
+    assert client.city_coordinates("Paris") == {"name": "Paris", "lat": 48.8566, "lon": 2.3522}
+    assert client.city_coordinates("  PARIS ") == {"name": "Paris", "lat": 48.8566, "lon": 2.3522}
+    assert client.attractions(48.8566, 2.3522) == {"total": 150, "quality": 4}
+    assert client.attractions(48.8566, 2.3522) == {"total": 150, "quality": 4}
+
+    other = make_client(stub_server, GeoCache(tmp_path / "geo.sqlite"))
+    assert other.city_coordinates("paris")["name"] == "Paris"
+    assert len(StubHandler.calls) == 2
+
+
+def test_not_found_is_negatively_cached(stub_server, tmp_path):
+    now = [1000.0]
+    cache = GeoCache(tmp_path / "geo.sqlite", negative_ttl=60, clock=lambda: now[0])
+    client = make_client(stub_server, cache)
+
+    assert client.city_coordinates("Atlantis") is None
+    assert client.city_coordinates("Atlantis") is None
+    assert len(StubHandler.calls) == 1
+
+    now[0] += 61
+    assert client.city_coordinates("Atlantis") is None
+    assert len(StubHandler.calls) == 2
+
+
+def test_server_errors_are_not_cached(stub_server, tmp_path):
+    cache = GeoCache(tmp_path / "geo.sqlite", negative_ttl=60)
+    client = make_client(stub_server, cache)
+
+    assert client.attractions(0.0, 0.0, radius=1) is None
+    assert client.attractions(0.0, 0.0, radius=1) is None
+    assert len(StubHandler.calls) == 2
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    now = [0.0]
+    cache = GeoCache(tmp_path / "geo.sqlite", max_entries=2, clock=lambda: now[0])
+
+    for key in ("a", "b"):
+        now[0] += 1
+        cache.set(key, {"key": key})
+    now[0] += 1
+    cache.get("a")
+    now[0] += 1
+    cache.set("c", {"key": "c"})
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == {"key": "a"}
+    assert len(cache) == 2
@@ -1,51 +1,236 @@
-import pandas as pd
-import numpy as np
-import joblib
-
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing import shared_memory
 from pathlib import Path
-from sklearn.model_selection import StratifiedKFold, cross_validate
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import RepeatedStratifiedKFold
 from sklearn.tree import DecisionTreeClassifier
 
 # ŚCIEŻKI
 BASE_DIR = Path(__file__).resolve().parents[2]
-DATA_PATH = BASE_DIR / "data" / "raw" / "dane_v2.csv"
+sys.path.insert(0, str(BASE_DIR / "src" / "data"))
+sys.path.insert(0, str(BASE_DIR / "src" / "agent"))
+sys.path.insert(0, str(Path(__file__).parent))
+from dataset import load_dataset, resolve_dataset_path
+from encoding import FeatureEncoder
+from tune import METRICS, score_model
 
-# DANE
-df = pd.read_csv(DATA_PATH)
-X = pd.get_dummies(df.drop("satisfied", axis=1))
-y = df["satisfied"]
+DATA_PATH = resolve_dataset_path()
 
 # MODEL (TEN SAM CO W TRAIN)
-model = DecisionTreeClassifier(
-    max_depth=4,
-    min_samples_leaf=20,
-    random_state=42
-)
-
-# CROSS-VALIDATION
-cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-
-scoring = {
-    "accuracy": "accuracy",
-    "f1": "f1"
+MODEL_PARAMS = {
+    "max_depth": 4,
+    "min_samples_leaf": 20,
+    "random_state": 42,
 }
+N_SPLITS = 5
+N_REPEATS = 3
+RANDOM_STATE = 42
+N_BOOT = 2000
+CONFIDENCE = 0.95
+
+
+class SharedArrays:
+    # Tablice w jednym bloku pamięci współdzielonej; workery dostają tylko opis (nazwa, dtype, kształt, offset)
+    def __init__(self, arrays: dict):
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            layout[name] = (array.dtype.str, array.shape, offset)
+            offset += -(-array.nbytes // 64) * 64
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.spec = (self.shm.name, layout)
+        for name, array in self.views(self.shm, layout).items():
+            array[...] = arrays[name]
+
+    @staticmethod
+    def views(shm, layout) -> dict:
+        return {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, (dtype, shape, offset) in layout.items()
+        }
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+_WORKER = {}
+
+
+def _attach(spec):
+    name, layout = spec
+    shm = shared_memory.SharedMemory(name=name)
+    # Referencja do bloku trzymana w procesie, inaczej widoki wskazywałyby na zwolnioną pamięć
+    _WORKER["shm"] = shm
+    _WORKER["arrays"] = SharedArrays.views(shm, layout)
+
+
+def fold_assignments(y, n_splits=N_SPLITS, n_repeats=N_REPEATS, seed=RANDOM_STATE) -> np.ndarray:
+    # (n_repeats, n) - numer foldu testowego każdego wiersza; te same podziały co RepeatedStratifiedKFold
+    folds = np.empty((n_repeats, len(y)), dtype=np.int8)
+    cv = RepeatedStratifiedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=seed)
+    for i, (_, test_idx) in enumerate(cv.split(np.zeros(len(y)), y)):
+        folds[i // n_splits, test_idx] = i % n_splits
+    return folds
+
+
+def evaluate_fold(arrays: dict, params: dict, repeat: int, fold: int, train_score: bool = True) -> dict:
+    X, y = arrays["X"], arrays["y"]
+    is_test = arrays["folds"][repeat] == fold
+    start = time.perf_counter()
+    model = DecisionTreeClassifier(**params).fit(X[~is_test], y[~is_test])
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = {f"test_{k}": v for k, v in score_model(model, X[is_test], y[is_test]).items()}
+    if train_score:
+        result.update({f"train_{k}": v for k, v in score_model(model, X[~is_test], y[~is_test]).items()})
+    score_time = time.perf_counter() - start
+
+    return {"repeat": repeat, "fold": fold, "n_test": int(is_test.sum()), **result,
+            "fit_time": fit_time, "score_time": score_time, "pid": os.getpid()}
+
+
+def _evaluate_shared(params, repeat, fold, train_score):
+    return evaluate_fold(_WORKER["arrays"], params, repeat, fold, train_score)
+
+
+def bootstrap_ci(values, n_boot=N_BOOT, confidence=CONFIDENCE, seed=RANDOM_STATE):
+    # Przedział percentylowy dla średniej z foldów; losowania wektorowo (n_boot x n_foldów)
+    values = np.asarray(values, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    means = values[rng.integers(0, len(values), size=(n_boot, len(values)))].mean(axis=1)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+@dataclass
+class CVResult:
+    folds: pd.DataFrame
+    summary: pd.DataFrame
+    wall_time: float
+    n_jobs: int
+    confidence: float
+
+    @property
+    def fold_time(self) -> float:
+        return float((self.folds["fit_time"] + self.folds["score_time"]).sum())
+
+    def to_dict(self) -> dict:
+        return {
+            "summary": self.summary.to_dict(orient="records"),
+            "folds": self.folds.to_dict(orient="records"),
+            "wall_time": self.wall_time,
+            "fold_time": self.fold_time,
+            "n_jobs": self.n_jobs,
+            "confidence": self.confidence,
+        }
+
+    def report(self) -> str:
+        lines = ["=== CROSS-VALIDATION RESULTS ===\n"]
+        level = f"{self.confidence:.0%} CI"
+        for metric, rows in self.summary.groupby("metric", sort=False):
+            lines.append(f"{metric.upper()}:")
+            for row in rows.itertuples():
+                lines.append(f"  {row.split.upper():5} mean: {row.mean:.3f} ± {row.std:.3f}  "
+                             f"{level}: [{row.ci_low:.3f}, {row.ci_high:.3f}]")
+            lines.append("")
+        n_repeats, n_splits = self.folds["repeat"].nunique(), self.folds["fold"].nunique()
+        lines.append(f"Foldy: {n_repeats} x {n_splits}, procesy: {self.n_jobs}")
+        lines.append(f"Fit na fold: {self.folds['fit_time'].mean() * 1000:.1f} ms "
+                     f"(max {self.folds['fit_time'].max() * 1000:.1f} ms), "
+                     f"ocena: {self.folds['score_time'].mean() * 1000:.1f} ms")
+        lines.append(f"Czas: {self.wall_time:.2f} s (suma foldów {self.fold_time:.2f} s, "
+                     f"przyspieszenie x{self.fold_time / max(self.wall_time, 1e-9):.1f})")
+        return "\n".join(lines)
+
+
+def summarize(folds: pd.DataFrame, n_boot=N_BOOT, confidence=CONFIDENCE, seed=RANDOM_STATE) -> pd.DataFrame:
+    rows = []
+    for metric in METRICS:
+        for split in ("train", "test"):
+            column = f"{split}_{metric}"
+            if column not in folds:
+                continue
+            values = folds[column].to_numpy()
+            low, high = bootstrap_ci(values, n_boot, confidence, seed)
+            rows.append({"metric": metric, "split": split, "mean": values.mean(), "std": values.std(),
+                         "ci_low": low, "ci_high": high})
+    return pd.DataFrame(rows)
+
+
+def run_cv(X, y, params=MODEL_PARAMS, n_splits=N_SPLITS, n_repeats=N_REPEATS, seed=RANDOM_STATE, n_jobs=-1,
+           n_boot=N_BOOT, confidence=CONFIDENCE, train_score=True) -> CVResult:
+    start = time.perf_counter()
+    arrays = {
+        "X": np.asarray(X, dtype=np.float32),
+        "y": np.asarray(y),
+        "folds": fold_assignments(y, n_splits, n_repeats, seed),
+    }
+    tasks = [(repeat, fold) for repeat in range(n_repeats) for fold in range(n_splits)]
+    if n_jobs in (None, -1):
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(tasks))
+
+    if n_jobs <= 1:
+        results = [evaluate_fold(arrays, params, repeat, fold, train_score) for repeat, fold in tasks]
+    else:
+        # Dane kodowane raz i kopiowane raz do pamięci współdzielonej; zadanie to tylko (powtórzenie, fold)
+        shared = SharedArrays(arrays)
+        try:
+            with ProcessPoolExecutor(n_jobs, initializer=_attach, initargs=(shared.spec,)) as pool:
+                futures = [pool.submit(_evaluate_shared, params, repeat, fold, train_score) for repeat, fold in tasks]
+                results = [future.result() for future in as_completed(futures)]
+        finally:
+            shared.close()
+
+    folds = pd.DataFrame(results).sort_values(["repeat", "fold"]).reset_index(drop=True)
+    summary = summarize(folds, n_boot, confidence, seed)
+    return CVResult(folds, summary, time.perf_counter() - start, n_jobs, confidence)
+
+
+def load_encoded(data_path=DATA_PATH):
+    # Koder ma stałe kategorie (nic nie uczy się z danych), więc kodowanie raz przed podziałem = pipeline w foldzie
+    df = load_dataset(data_path)
+    X = FeatureEncoder().transform(df.drop("satisfied", axis=1))
+    return X, df["satisfied"].to_numpy()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Powtarzana walidacja krzyżowa drzewa decyzyjnego")
+    parser.add_argument("--data", type=Path, default=DATA_PATH, help="plik CSV/Parquet")
+    parser.add_argument("--n-splits", type=int, default=N_SPLITS)
+    parser.add_argument("--n-repeats", type=int, default=N_REPEATS)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="liczba procesów (-1 = liczba rdzeni)")
+    parser.add_argument("--n-boot", type=int, default=N_BOOT, help="liczba losowań bootstrap")
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    parser.add_argument("--output", type=Path, default=None, help="zapis wyników do JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    X, y = load_encoded(args.data)
+    result = run_cv(X, y, MODEL_PARAMS, args.n_splits, args.n_repeats, args.seed, args.n_jobs,
+                    args.n_boot, args.confidence)
+
+    # RAPORT
+    print(result.report())
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result.to_dict(), indent=2))
+    return result
+
 
-results = cross_validate(
-    model,
-    X,
-    y,
-    cv=cv,
-    scoring=scoring,
-    return_train_score=True
-)
-
-# RAPORT
-print("=== CROSS-VALIDATION RESULTS ===\n")
-
-for metric in scoring.keys():
-    train_scores = results[f"train_{metric}"]
-    test_scores = results[f"test_{metric}"]
-
-    print(f"{metric.upper()}:")
-    print(f"  TRAIN mean: {train_scores.mean():.3f} ± {train_scores.std():.3f}")
-    print(f"  TEST  mean: {test_scores.mean():.3f} ± {test_scores.std():.3f}\n")
+if __name__ == "__main__":
+    main()
@@ -1,104 +1,258 @@
 import joblib
 import pandas as pd
+import numpy as np
+import argparse
+import base64
+import hashlib
+import html
+import json
+import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix, ConfusionMatrixDisplay, roc_curve, auc
 from sklearn.tree import plot_tree
-import matplotlib.pyplot as plt
 
 #ŚCIEŻKI
 BASE_DIR = Path(__file__).resolve().parents[2]
-DATA_PATH = BASE_DIR / "data" / "raw" / "dane_v2.csv"
+sys.path.insert(0, str(BASE_DIR / "src" / "data"))
+sys.path.insert(0, str(BASE_DIR / "src" / "agent"))
+from dataset import load_dataset, resolve_dataset_path
+from encoding import FeatureEncoder
+
+DATA_PATH = resolve_dataset_path()
 MODEL_PATH = BASE_DIR / "models" / "model_tree.pkl"
-FEATURES_PATH = BASE_DIR / "models" / "feature_columns.pkl"
-
-#DANE
-df = pd.read_csv(DATA_PATH)
-X = df.drop("satisfied", axis=1)
-y = df["satisfied"]
-
-# Wczytanie wcześniej zapisanych kolumn (feature_columns)
-feature_columns = joblib.load(FEATURES_PATH)
-
-# One-hot encoding dla kolumn kategorycznych
-X = pd.get_dummies(X, columns=["user_budget", "trip_cost"])
-
-# Dodanie brakujących kolumn (np. jeśli w danych testowych ich brakuje)
-for col in feature_columns:
-    if col not in X.columns:
-        X[col] = 0
-
-# Usunięcie nadmiarowych kolumn
-X = X[feature_columns]
-
-# Lista nazw cech do wykresów
-feature_names = feature_columns
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-
-model = joblib.load(MODEL_PATH)
-
-#TRENING i PREDYKCJE
-y_train_pred = model.predict(X_train)
-y_test_pred = model.predict(X_test)
-
-print("TRAIN RESULTS")
-print(classification_report(y_train, y_train_pred))
-
-print("TEST RESULTS")
-print(classification_report(y_test, y_test_pred))
-
-#MACIERZE POMYŁEK
-cm_train = confusion_matrix(y_train, y_train_pred)
-disp_train = ConfusionMatrixDisplay(cm_train)
-disp_train.plot()
-plt.title("Confusion Matrix - TRAIN (max_depth=5)")
-plt.show()
-
-cm_test = confusion_matrix(y_test, y_test_pred)
-disp_test = ConfusionMatrixDisplay(cm_test)
-disp_test.plot()
-plt.title("Confusion Matrix - TEST (max_depth=5)")
-plt.show()
-
-#KRZYWA ROC
-y_train_proba = model.predict_proba(X_train)[:, 1]
-y_test_proba = model.predict_proba(X_test)[:, 1]
-
-fpr_train, tpr_train, _ = roc_curve(y_train, y_train_proba)
-fpr_test, tpr_test, _ = roc_curve(y_test, y_test_proba)
-
-plt.plot(fpr_train, tpr_train, label="TRAIN")
-plt.plot(fpr_test, tpr_test, label="TEST")
-plt.plot([0,1], [0,1], linestyle="--", color="gray")
-plt.xlabel("False Positive Rate")
-plt.ylabel("True Positive Rate")
-plt.title("ROC Curve (max_depth=5)")
-plt.legend()
-plt.show()
-
-#WIZUALIZACJA DRZEWA
-plt.figure(figsize=(20,10))
-plot_tree(
-    model,
-    feature_names=feature_names,
-    class_names=["0", "1"],
-    filled=True,
-    max_depth=3
-)
-plt.title("Decision Tree (depth <= 3) (max_depth=5)")
-plt.show()
-
-#FEATURE IMPORTANCE
-importances = model.feature_importances_
-df_importance = pd.DataFrame({
-    "feature": feature_names,
-    "importance": importances
-}).sort_values(by="importance", ascending=False)
-
-df_importance.plot(kind="bar", x="feature", y="importance", legend=False)
-plt.title("Feature Importance")
-plt.ylabel("Importance")
-plt.show()
+REPORTS_DIR = BASE_DIR / "reports"
+FIGURES = ["confusion_train", "confusion_test", "roc", "tree", "feature_importance"]
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def __call__(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = time.perf_counter() - start
+
+
+def model_version(model_path) -> str:
+    return hashlib.sha256(Path(model_path).read_bytes()).hexdigest()[:12]
+
+
+def load_inputs(data_path, model_path):
+    #DANE
+    df = load_dataset(data_path)
+    X = df.drop("satisfied", axis=1)
+    y = df["satisfied"]
+
+    # Enkoder z kolumn ocenianego modelu (--model może wskazywać inny model niż models/model_tree.pkl)
+    model = joblib.load(model_path)
+    encoder = FeatureEncoder.from_feature_names(list(model.feature_names_in_))
+
+    # One-hot encoding w stałym układzie kolumn modelu
+    X = pd.DataFrame(encoder.transform(X), columns=encoder.get_feature_names_out())
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    return model, list(encoder.feature_names_), X_train, X_test, y_train, y_test
+
+
+def compute_metrics(model, feature_names, X_train, X_test, y_train, y_test, timer: StageTimer) -> dict:
+    #PREDYKCJE
+    with timer("predict"):
+        splits = {"train": (X_train, y_train), "test": (X_test, y_test)}
+        proba = {name: model.predict_proba(X)[:, 1] for name, (X, _) in splits.items()}
+        pred = {name: model.predict(X) for name, (X, _) in splits.items()}
+
+    with timer("metrics"):
+        metrics = {"max_depth": model.get_params()["max_depth"], "feature_names": feature_names}
+        for name, (_, y) in splits.items():
+            fpr, tpr, _ = roc_curve(y, proba[name])
+            metrics[name] = {
+                "report": classification_report(y, pred[name], output_dict=True),
+                "report_text": classification_report(y, pred[name]),
+                "confusion_matrix": confusion_matrix(y, pred[name]).tolist(),
+                "roc": {"fpr": fpr.tolist(), "tpr": tpr.tolist()},
+                "auc": auc(fpr, tpr),
+            }
+        metrics["feature_importance"] = dict(sorted(
+            zip(feature_names, model.feature_importances_.tolist()), key=lambda item: -item[1]
+        ))
+    return metrics
+
+
+#WYKRESY - każda funkcja rysuje jedną figurę z danych, które da się przesłać do procesu roboczego
+def plot_confusion(metrics, split):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots()
+    ConfusionMatrixDisplay(np.array(metrics[split]["confusion_matrix"])).plot(ax=ax)
+    ax.set_title(f"Confusion Matrix - {split.upper()} (max_depth={metrics['max_depth']})")
+    return fig
+
+
+def plot_roc(metrics):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots()
+    for split in ("train", "test"):
+        roc = metrics[split]["roc"]
+        ax.plot(roc["fpr"], roc["tpr"], label=f"{split.upper()} (AUC={metrics[split]['auc']:.3f})")
+    ax.plot([0, 1], [0, 1], linestyle="--", color="gray")
+    ax.set_xlabel("False Positive Rate")
+    ax.set_ylabel("True Positive Rate")
+    ax.set_title(f"ROC Curve (max_depth={metrics['max_depth']})")
+    ax.legend()
+    return fig
+
+
+def plot_decision_tree(metrics, model):
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=(20, 10))
+    plot_tree(
+        model,
+        feature_names=metrics["feature_names"],
+        class_names=["0", "1"],
+        filled=True,
+        max_depth=3
+    )
+    plt.title(f"Decision Tree (depth <= 3) (max_depth={metrics['max_depth']})")
+    return fig
+
+
+def plot_importance(metrics):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots()
+    df_importance = pd.Series(metrics["feature_importance"], name="importance")
+    df_importance.plot(kind="bar", ax=ax)
+    ax.set_title("Feature Importance")
+    ax.set_ylabel("Importance")
+    fig.tight_layout()
+    return fig
+
+
+def figure_specs(metrics, model):
+    return [
+        ("confusion_train", plot_confusion, (metrics, "train")),
+        ("confusion_test", plot_confusion, (metrics, "test")),
+        ("roc", plot_roc, (metrics,)),
+        ("tree", plot_decision_tree, (metrics, model)),
+        ("feature_importance", plot_importance, (metrics,)),
+    ]
+
+
+def render_figure(name, plot, args, path):
+    # Proces roboczy bez ekranu - backend Agg ustawiany przed pierwszym użyciem pyplot
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    fig = plot(*args)
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+    return name, time.perf_counter() - start
+
+
+def render_figures(specs, output_dir: Path, n_jobs: int = -1) -> dict:
+    from joblib import Parallel, delayed
+
+    results = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(render_figure)(name, plot, args, output_dir / f"{name}.png") for name, plot, args in specs
+    )
+    return dict(results)
+
+
+def write_report(metrics, figure_times, timer: StageTimer, output_dir: Path, info: dict):
+    report = {**info, "timings": timer.stages, "figure_timings": figure_times, "metrics": metrics}
+    (output_dir / "report.json").write_text(json.dumps(report, indent=2, default=float))
+
+    # HTML samowystarczalny: obrazki osadzone jako data URI
+    images = "\n".join(
+        f"<h3>{name}</h3><img src=\"data:image/png;base64,"
+        f"{base64.b64encode((output_dir / f'{name}.png').read_bytes()).decode()}\">"
+        for name in figure_times
+    )
+    timings = "".join(f"<tr><td>{name}</td><td>{seconds:.3f} s</td></tr>" for name, seconds in timer.stages.items())
+    reports = "".join(
+        f"<h3>{split.upper()} (AUC={metrics[split]['auc']:.3f})</h3><pre>{html.escape(metrics[split]['report_text'])}</pre>"
+        for split in ("train", "test")
+    )
+    (output_dir / "report.html").write_text(
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Model {info['model_version']}</title></head><body>"
+        f"<h1>Ewaluacja modelu {info['model_version']}</h1>"
+        f"<p>Model: {html.escape(info['model_path'])}<br>Dane: {html.escape(info['data_path'])}</p>"
+        f"<h2>Metryki</h2>{reports}<h2>Czasy etapów</h2><table>{timings}</table>"
+        f"<h2>Wykresy</h2>{images}</body></html>",
+        encoding="utf-8",
+    )
+
+
+def run_headless(data_path=DATA_PATH, model_path=MODEL_PATH, output_dir=REPORTS_DIR, n_jobs=-1) -> Path:
+    timer = StageTimer()
+    total_start = time.perf_counter()
+
+    with timer("load"):
+        model, feature_names, X_train, X_test, y_train, y_test = load_inputs(data_path, model_path)
+    metrics = compute_metrics(model, feature_names, X_train, X_test, y_train, y_test, timer)
+
+    version = model_version(model_path)
+    output_dir = Path(output_dir) / version
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    with timer("render"):
+        figure_times = render_figures(figure_specs(metrics, model), output_dir, n_jobs)
+
+    timer.stages["total"] = time.perf_counter() - total_start
+    info = {"model_version": version, "model_path": str(model_path), "data_path": str(data_path)}
+    write_report(metrics, figure_times, timer, output_dir, info)
+    return output_dir
+
+
+def run_interactive(data_path=DATA_PATH, model_path=MODEL_PATH):
+    import matplotlib.pyplot as plt
+
+    timer = StageTimer()
+    model, feature_names, X_train, X_test, y_train, y_test = load_inputs(data_path, model_path)
+    metrics = compute_metrics(model, feature_names, X_train, X_test, y_train, y_test, timer)
+
+    print("TRAIN RESULTS")
+    print(metrics["train"]["report_text"])
+
+    print("TEST RESULTS")
+    print(metrics["test"]["report_text"])
+
+    for _, plot, args in figure_specs(metrics, model):
+        plot(*args)
+        plt.show()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ewaluacja drzewa decyzyjnego")
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--headless", action="store_true", help="bez okien: wykresy do plików i raport HTML/JSON")
+    parser.add_argument("--output", type=Path, default=REPORTS_DIR, help="katalog raportów (podkatalog na wersję modelu)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="liczba procesów renderujących wykresy")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.headless:
+        run_interactive(args.data, args.model)
+        return
+
+    output_dir = run_headless(args.data, args.model, args.output, args.n_jobs)
+    report = json.loads((output_dir / "report.json").read_text())
+    print(f"Raport: {output_dir / 'report.html'}")
+    for name, seconds in report["timings"].items():
+        print(f"  {name:<10} {seconds:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier
+
+# Parametry, ktorych nie da sie wiernie przeniesc na dane zagregowane (licza wiersze, nie wagi)
+UNSUPPORTED_PARAMS = {"min_samples_split": 2, "class_weight": None, "max_features": None}
+
+
+class BinnedCounts:
+    def __init__(self, feature_names: Optional[Iterable[str]] = None, dtype=np.float32):
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.dtype = dtype
+        # Unikalne wiersze [cechy..., etykieta] i ile razy wystapily
+        self.rows: Optional[np.ndarray] = None
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @property
+    def n_samples(self) -> int:
+        return int(self.counts.sum())
+
+    def update(self, X: np.ndarray, y: np.ndarray, weights: Optional[np.ndarray] = None) -> "BinnedCounts":
+        block = np.column_stack([np.asarray(X, dtype=self.dtype), np.asarray(y, dtype=self.dtype)])
+        if weights is None:
+            weights = np.ones(len(block), dtype=np.int64)
+
+        if self.rows is not None:
+            block = np.concatenate([self.rows, block])
+            weights = np.concatenate([self.counts, weights])
+
+        # Scalanie: pamiec zalezy od liczby unikalnych kombinacji cech, nie od liczby wierszy
+        self.rows, inverse = np.unique(block, axis=0, return_inverse=True)
+        self.counts = np.bincount(inverse.ravel(), weights=weights, minlength=len(self.rows)).astype(np.int64)
+        return self
+
+    def merge(self, other: "BinnedCounts") -> "BinnedCounts":
+        if other.rows is None:
+            return self
+        return self.update(other.X, other.y, other.counts)
+
+    @property
+    def X(self) -> np.ndarray:
+        return self.rows[:, :-1]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.rows[:, -1].astype(np.int64)
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.X, columns=self.feature_names)
+
+
+def fit_from_counts(counts: BinnedCounts, **params) -> DecisionTreeClassifier:
+    for name, default in UNSUPPORTED_PARAMS.items():
+        if params.get(name, default) != default:
+            raise ValueError(f"Parametr {name} nie jest obslugiwany przy treningu z histogramu")
+    if counts.rows is None:
+        raise ValueError("Brak danych treningowych")
+
+    # min_samples_leaf liczy wiersze; po agregacji to samo ograniczenie wyrazamy wagami.
+    # Wagi sa calkowite, wiec prog (n - 0.5) / N jest odporny na bledy zaokraglen.
+    min_samples_leaf = params.pop("min_samples_leaf", 1)
+    min_fraction = params.pop("min_weight_fraction_leaf", 0.0)
+    params["min_weight_fraction_leaf"] = max(min_fraction, (min_samples_leaf - 0.5) / counts.n_samples)
+
+    model = DecisionTreeClassifier(**params)
+    X = counts.frame() if counts.feature_names is not None else counts.X
+    model.fit(X, counts.y, sample_weight=counts.counts)
+    return model
@@ -0,0 +1,83 @@
+from multiprocessing import shared_memory
+from pathlib import Path
+import sys
+
+import numpy as np
+import pytest
+from sklearn.model_selection import RepeatedStratifiedKFold, cross_validate
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from cross_validation import SharedArrays, bootstrap_ci, fold_assignments, main, run_cv
+
+PARAMS = {"max_depth": 3, "min_samples_leaf": 5, "random_state": 0}
+
+
+def make_data(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 5, size=(n, 4)).astype(np.float32)
+    y = ((X[:, 0] + X[:, 1] + rng.integers(0, 3, size=n)) > 5).astype(np.int8)
+    return X, y
+
+
+def test_parallel_cv_matches_sklearn():
+    X, y = make_data()
+    result = run_cv(X, y, PARAMS, n_splits=4, n_repeats=2, seed=3, n_jobs=2, n_boot=200)
+    assert result.n_jobs == 2
+    assert len(result.folds) == 8 and result.folds["pid"].nunique() >= 1
+
+    cv = RepeatedStratifiedKFold(n_splits=4, n_repeats=2, random_state=3)
+    expected = cross_validate(DecisionTreeClassifier(**PARAMS), X, y, cv=cv,
+                              scoring=["accuracy", "f1", "roc_auc"], return_train_score=True)
+    for metric in ["accuracy", "f1", "roc_auc"]:
+        np.testing.assert_allclose(result.folds[f"test_{metric}"], expected[f"test_{metric}"])
+        np.testing.assert_allclose(result.folds[f"train_{metric}"], expected[f"train_{metric}"])
+
+    serial = run_cv(X, y, PARAMS, n_splits=4, n_repeats=2, seed=3, n_jobs=1, n_boot=200)
+    np.testing.assert_array_equal(serial.folds["test_f1"], result.folds["test_f1"])
+    assert serial.summary.equals(result.summary)
+
+    summary = result.summary.set_index(["metric", "split"])
+    assert (summary["ci_low"] <= summary["mean"]).all() and (summary["mean"] <= summary["ci_high"]).all()
+    assert result.wall_time > 0 and result.fold_time > 0
+    assert "95% CI" in result.report()
+
+
+def test_fold_assignments_partition_each_repeat():
+    _, y = make_data(101)
+    folds = fold_assignments(y, n_splits=5, n_repeats=3, seed=0)
+    assert folds.shape == (3, 101)
+    for repeat in folds:
+        counts = np.bincount(repeat, minlength=5)
+        assert counts.sum() == 101 and counts.max() - counts.min() <= 1
+    assert not np.array_equal(folds[0], folds[1])
+
+
+def test_bootstrap_ci():
+    assert bootstrap_ci([0.7] * 10) == pytest.approx((0.7, 0.7))
+    values = np.random.default_rng(0).normal(0.8, 0.05, size=30)
+    low, high = bootstrap_ci(values, n_boot=1000, confidence=0.95)
+    narrow_low, narrow_high = bootstrap_ci(values, n_boot=1000, confidence=0.5)
+    assert low < narrow_low < values.mean() < narrow_high < high
+
+
+def test_shared_arrays_roundtrip():
+    X, y = make_data(50)
+    shared = SharedArrays({"X": X, "y": y})
+    name, layout = shared.spec
+    views = SharedArrays.views(shared.shm, layout)
+    np.testing.assert_array_equal(views["X"], X)
+    np.testing.assert_array_equal(views["y"], y)
+    del views
+    shared.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_main_writes_json(tmp_path, capsys):
+    result = main(["--n-splits", "3", "--n-repeats", "2", "--n-jobs", "1", "--n-boot", "100",
+                   "--output", str(tmp_path / "cv.json")])
+    assert (tmp_path / "cv.json").exists()
+    assert len(result.folds) == 6
+    assert "CROSS-VALIDATION" in capsys.readouterr().out
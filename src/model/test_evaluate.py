@@ -0,0 +1,43 @@
+from pathlib import Path
+import json
+import sys
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from evaluate import FIGURES, MODEL_PATH, load_inputs, main, model_version
+
+
+def test_headless_report_is_written_per_model_version(tmp_path):
+    main(["--headless", "--output", str(tmp_path), "--n-jobs", "2"])
+
+    report_dir = tmp_path / model_version(MODEL_PATH)
+    report = json.loads((report_dir / "report.json").read_text())
+    assert report["model_version"] == report_dir.name
+    assert {"load", "predict", "metrics", "render", "total"} <= set(report["timings"])
+    assert set(report["figure_timings"]) == set(FIGURES)
+
+    for name in FIGURES:
+        assert (report_dir / f"{name}.png").read_bytes()[:8] == b"\x89PNG\r\n\x1a\n"
+    page = (report_dir / "report.html").read_text(encoding="utf-8")
+    assert page.count("data:image/png;base64,") == len(FIGURES)
+
+    model, _, _, X_test, _, y_test = load_inputs(report["data_path"], MODEL_PATH)
+    assert np.isclose(report["metrics"]["test"]["auc"], roc_auc_score(y_test, model.predict_proba(X_test)[:, 1]))
+    assert np.isclose(sum(report["metrics"]["feature_importance"].values()), 1.0)
+
+
+def test_inputs_follow_the_evaluated_model_columns(tmp_path):
+    import joblib
+    from sklearn.tree import DecisionTreeClassifier
+
+    _, feature_names, X_train, _, y_train, _ = load_inputs(None, MODEL_PATH)
+    columns = [name for name in feature_names if name != "score"][::-1]
+    path = tmp_path / "other.pkl"
+    joblib.dump(DecisionTreeClassifier(max_depth=2, random_state=0).fit(X_train[columns], y_train), path)
+
+    model, names, X_train, X_test, _, _ = load_inputs(None, path)
+    assert names == columns and list(X_test.columns) == columns
+    model.predict(X_train)
@@ -0,0 +1,69 @@
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(BASE_DIR / "src" / "data"))
+sys.path.insert(0, str(BASE_DIR / "src" / "agent"))
+
+from encoding import FeatureEncoder
+from generate import iter_chunks
+from histogram_tree import BinnedCounts, fit_from_counts
+
+
+def encoded_chunks(n, chunk_size, seed=3):
+    encoder = FeatureEncoder()
+    for chunk in iter_chunks(n, chunk_size, seed):
+        yield encoder.transform(chunk.drop(columns="satisfied")), chunk["satisfied"].to_numpy()
+
+
+@pytest.mark.parametrize("params", [
+    {"max_depth": 5, "min_samples_leaf": 20, "random_state": 42},
+    {"max_depth": None, "min_samples_leaf": 1, "criterion": "entropy", "random_state": 0},
+    {"max_depth": 4, "min_samples_leaf": 7, "criterion": "log_loss", "random_state": 1},
+])
+def test_streamed_counts_match_in_memory_tree(params):
+    chunks = list(encoded_chunks(5000, 700))
+    X = np.concatenate([c[0] for c in chunks])
+    y = np.concatenate([c[1] for c in chunks])
+    names = FeatureEncoder().get_feature_names_out()
+
+    counts = BinnedCounts(names)
+    for X_chunk, y_chunk in chunks:
+        counts.update(X_chunk, y_chunk)
+    assert counts.n_samples == len(X) and len(counts) < len(X)
+
+    expected = DecisionTreeClassifier(**params).fit(pd.DataFrame(X, columns=names), y)
+    model = fit_from_counts(counts, **params)
+
+    for name in ("feature", "threshold", "children_left", "children_right", "weighted_n_node_samples"):
+        np.testing.assert_array_equal(getattr(model.tree_, name), getattr(expected.tree_, name))
+    np.testing.assert_allclose(model.tree_.value, expected.tree_.value)
+    np.testing.assert_array_equal(model.predict_proba(pd.DataFrame(X, columns=names)),
+                                  expected.predict_proba(pd.DataFrame(X, columns=names)))
+
+
+def test_merge_is_order_independent():
+    chunks = list(encoded_chunks(3000, 1000))
+    left, right, single = BinnedCounts(), BinnedCounts(), BinnedCounts()
+    left.update(*chunks[0])
+    right.update(*chunks[1]).update(*chunks[2])
+    for chunk in reversed(chunks):
+        single.update(*chunk)
+
+    merged = left.merge(right)
+    np.testing.assert_array_equal(merged.rows, single.rows)
+    np.testing.assert_array_equal(merged.counts, single.counts)
+
+
+def test_unsupported_params_are_rejected():
+    counts = BinnedCounts().update(*next(encoded_chunks(100, 100)))
+    with pytest.raises(ValueError):
+        fit_from_counts(counts, min_samples_split=10)
+    with pytest.raises(ValueError):
+        fit_from_counts(counts, class_weight="balanced")
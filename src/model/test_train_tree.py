@@ -0,0 +1,52 @@
+from pathlib import Path
+import sys
+
+import joblib
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(BASE_DIR / "src" / "data"))
+sys.path.insert(0, str(BASE_DIR / "src" / "agent"))
+
+import train_tree
+from generate import generate_dataset
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def outputs(tmp_path, monkeypatch):
+    # Wyniki do katalogu tymczasowego - modele w repozytorium zostaja nietkniete
+    data_path = tmp_path / "travel_data.csv"
+    generate_dataset(3000, seed=5).to_csv(data_path, index=False)
+    models = tmp_path / "models"
+    monkeypatch.setattr(train_tree, "MODEL_PATH", models / "model_tree.pkl")
+    monkeypatch.setattr(train_tree, "ENCODER_PATH", models / "feature_encoder.json")
+    monkeypatch.setattr(train_tree, "FEATURE_COLUMNS_PATH", models / "feature_columns.pkl")
+    return data_path, models
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_main_trains_and_writes_artifacts(outputs, streaming):
+    data_path, models = outputs
+    train_tree.main(["--data", str(data_path), "--no-publish", "--chunk-size", "700"]
+                    + (["--streaming"] if streaming else []))
+
+    model = joblib.load(models / "model_tree.pkl")
+    columns = joblib.load(models / "feature_columns.pkl")
+    assert list(model.feature_names_in_) == list(columns)
+    assert model.get_depth() <= train_tree.MODEL_PARAMS["max_depth"]
+    assert (models / "model_tree.tree").exists() and (models / "feature_encoder.json").exists()
+
+
+def test_main_publishes_to_registry(outputs):
+    data_path, models = outputs
+    registry = ModelRegistry(data_path.parent / "registry")
+    train_tree.main(["--data", str(data_path), "--registry", str(registry.root)])
+
+    metadata = registry.metadata()
+    assert registry.verify()
+    assert metadata["params"] == train_tree.MODEL_PARAMS
+    assert metadata["dataset"]["path"] == str(data_path)
+    assert set(metadata["files"]) == {"model_tree.pkl", "model_tree.tree", "feature_columns.pkl",
+                                      "feature_encoder.json"}
@@ -0,0 +1,60 @@
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import cross_validate, StratifiedKFold
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tune import candidate_params, main, run_search, PARAM_GRID
+
+
+def make_data(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 5, size=(n, 4)).astype(np.float32)
+    y = ((X[:, 0] + X[:, 1] + rng.integers(0, 3, size=n)) > 5).astype(np.int8)
+    return X, y
+
+
+def test_candidates_cover_grid_and_sample():
+    grid = candidate_params("grid", 0, 42)
+    assert len(grid) == np.prod([len(v) for v in PARAM_GRID.values()])
+    sampled = candidate_params("random", 7, 42)
+    assert len(sampled) == 7 and all(p in grid for p in sampled)
+
+
+def test_search_matches_sklearn_and_uses_cache(tmp_path):
+    X, y = make_data()
+    candidates = [
+        {"max_depth": 2, "min_samples_leaf": 5, "criterion": "gini", "class_weight": None},
+        {"max_depth": 4, "min_samples_leaf": 10, "criterion": "entropy", "class_weight": "balanced"},
+    ]
+    board, computed = run_search(X, y, candidates, n_splits=3, seed=1, n_jobs=2, cache_dir=tmp_path)
+    assert computed == 6
+
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=1)
+    for row, params in zip(board.itertuples(), candidates):
+        expected = cross_validate(DecisionTreeClassifier(random_state=1, **params), X, y, cv=cv, scoring="accuracy")
+        assert np.isclose(row.mean_accuracy, expected["test_score"].mean())
+
+    cached_board, computed = run_search(X, y, candidates, n_splits=3, seed=1, n_jobs=2, cache_dir=tmp_path)
+    assert computed == 0
+    pd.testing.assert_frame_equal(cached_board.drop(columns=["mean_fit_time", "std_fit_time"]),
+                                  board.drop(columns=["mean_fit_time", "std_fit_time"]))
+
+    # Inne dane -> inny klucz cache
+    _, computed = run_search(X[:300], y[:300], candidates[:1], n_splits=3, seed=1, n_jobs=1, cache_dir=tmp_path)
+    assert computed == 3
+
+
+def test_main_writes_model_and_leaderboard(tmp_path):
+    main(["--search", "random", "--n-iter", "3", "--n-splits", "3", "--n-jobs", "1",
+          "--output", str(tmp_path), "--cache", str(tmp_path / "cache")])
+
+    board = pd.read_csv(tmp_path / "leaderboard.csv")
+    assert len(board) == 3 and list(board["rank"]) == [1, 2, 3]
+    assert board["mean_f1"].is_monotonic_decreasing
+    assert (tmp_path / "model_tree_best.pkl").exists()
+    assert (tmp_path / "best.json").exists()
@@ -1,55 +1,153 @@
 import pandas as pd
+import numpy as np
 import joblib
 
+import argparse
+import sys
+import time
 from pathlib import Path
 
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, f1_score
 
 # ŚCIEŻKI
 BASE_DIR = Path(__file__).resolve().parents[2]
-DATA_PATH = BASE_DIR / "data" / "raw" / "dane_v2.csv"
-BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "src" / "data"))
+sys.path.insert(0, str(BASE_DIR / "src" / "agent"))
+from dataset import BATCH_SIZE, iter_batches, load_dataset, resolve_dataset_path
+from encoding import FeatureEncoder
+from hashing import file_hash
+from histogram_tree import BinnedCounts, fit_from_counts
+from model_artifact import export_model
+from model_registry import DEFAULT_ROOT, ModelRegistry
+
+DATA_PATH = resolve_dataset_path()
 MODEL_PATH = BASE_DIR / "models" / "model_tree.pkl"
+ENCODER_PATH = BASE_DIR / "models" / "feature_encoder.json"
+FEATURE_COLUMNS_PATH = BASE_DIR / "models" / "feature_columns.pkl"
 
-# WCZYTANIE DANYCH
-df = pd.read_csv(DATA_PATH)
+MODEL_PARAMS = {
+    "max_depth": 5,
+    "min_samples_leaf": 20,
+    "random_state": 42,
+}
+TEST_SIZE = 0.2
 
-X = df.drop("satisfied", axis=1)
-y = df["satisfied"]
 
-# ONE-HOT
-X = pd.get_dummies(X)
-FEATURE_COLUMNS = X.columns
-joblib.dump(FEATURE_COLUMNS, BASE_DIR / "models" / "feature_columns.pkl")
+def train_in_memory(data_path, encoder: FeatureEncoder):
+    # WCZYTANIE DANYCH
+    df = load_dataset(data_path)
 
+    X = df.drop("satisfied", axis=1)
+    y = df["satisfied"]
 
-# PODZIAŁ
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
+    # ONE-HOT
+    X = pd.DataFrame(encoder.transform(X), columns=encoder.get_feature_names_out())
 
-# MODEL
-model = DecisionTreeClassifier(
-    max_depth=5,
-    min_samples_leaf=20,
-    random_state=42
+    # PODZIAŁ
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y,
+        test_size=TEST_SIZE,
+        random_state=42,
+        stratify=y
     )
 
-# TRENING
-model.fit(X_train, y_train)
+    # TRENING
+    model = DecisionTreeClassifier(**MODEL_PARAMS)
+    model.fit(X_train, y_train)
+
+    return model, y_test, model.predict(X_test), None
+
+
+def train_streaming(data_path, encoder: FeatureEncoder, chunk_size: int = BATCH_SIZE, seed: int = 42):
+    # Dane czytane paczkami i zliczane w histogramie unikalnych wierszy - pamięć nie rośnie z liczbą wierszy
+    feature_names = encoder.get_feature_names_out()
+    train_counts = BinnedCounts(feature_names)
+    test_counts = BinnedCounts(feature_names)
+    rng = np.random.default_rng(seed)
+
+    for chunk in iter_batches(data_path, batch_size=chunk_size):
+        X = encoder.transform(chunk.drop("satisfied", axis=1))
+        y = chunk["satisfied"].to_numpy()
+        is_test = rng.random(len(chunk)) < TEST_SIZE
+        train_counts.update(X[~is_test], y[~is_test])
+        test_counts.update(X[is_test], y[is_test])
+
+    print(f"Histogram: {train_counts.n_samples} wierszy treningowych -> {len(train_counts)} unikalnych kombinacji")
+
+    model = fit_from_counts(train_counts, **MODEL_PARAMS)
+    return model, test_counts.y, model.predict(test_counts.frame()), test_counts.counts
+
+
+def dump_atomic(value, path: Path):
+    # Zapis obok i rename - proces czytajacy plik nigdy nie trafi na polowe pickla
+    tmp_path = path.with_name(path.name + ".tmp")
+    joblib.dump(value, tmp_path)
+    tmp_path.replace(path)
+
+
+def publish(registry: ModelRegistry, data_path, params: dict, metrics: dict) -> str:
+    files = {
+        MODEL_PATH.name: MODEL_PATH,
+        MODEL_PATH.with_suffix(".tree").name: MODEL_PATH.with_suffix(".tree"),
+        FEATURE_COLUMNS_PATH.name: FEATURE_COLUMNS_PATH,
+        ENCODER_PATH.name: ENCODER_PATH,
+    }
+    return registry.publish(files, {
+        "params": params,
+        "dataset": {"path": str(data_path), "sha256": file_hash(data_path)},
+        "metrics": metrics,
+    })
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Trening drzewa decyzyjnego")
+    parser.add_argument("--data", type=Path, default=DATA_PATH, help="plik CSV/Parquet")
+    parser.add_argument("--streaming", action="store_true", help="trening paczkami z histogramu (dane większe niż RAM)")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_SIZE, help="liczba wierszy w paczce")
+    parser.add_argument("--registry", type=Path, default=DEFAULT_ROOT, help="katalog rejestru wersji modelu")
+    parser.add_argument("--no-publish", action="store_true", help="nie publikuj wersji w rejestrze")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+
+    encoder = FeatureEncoder()
+    if args.streaming:
+        model, y_test, y_pred, weights = train_streaming(args.data, encoder, args.chunk_size)
+    else:
+        model, y_test, y_pred, weights = train_in_memory(args.data, encoder)
+
+    # ZAPIS
+    MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    dump_atomic(model, MODEL_PATH)
+    # Płaski artefakt (np.memmap) dla serwera - ładowanie bez sklearn
+    export_model(MODEL_PATH)
+    dump_atomic(pd.Index(encoder.get_feature_names_out()), FEATURE_COLUMNS_PATH)
+    encoder.save(ENCODER_PATH)
+
+    # EWALUACJA
+    print("CONFUSION MATRIX:")
+    print(confusion_matrix(y_test, y_pred, sample_weight=weights))
+
+    print("\nCLASSIFICATION REPORT:")
+    print(classification_report(y_test, y_pred, sample_weight=weights))
+    print(f"Czas treningu: {time.perf_counter() - start:.1f} s")
 
-# EWALUACJA
-y_pred = model.predict(X_test)
-MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
-joblib.dump(model, MODEL_PATH)
+    # REJESTR - nowa wersja widoczna dla działających agentów (HotSwapAgent) po atomowym rename
+    if not args.no_publish:
+        metrics = {
+            "accuracy": float(accuracy_score(y_test, y_pred, sample_weight=weights)),
+            "f1": float(f1_score(y_test, y_pred, sample_weight=weights)),
+            "n_test": int(np.sum(weights) if weights is not None else len(y_test)),
+            "streaming": args.streaming,
+        }
+        version = publish(ModelRegistry(args.registry), args.data, MODEL_PARAMS, metrics)
+        print(f"Opublikowano wersję {version} w {args.registry}")
 
-print("CONFUSION MATRIX:")
-print(confusion_matrix(y_test, y_pred))
 
-print("\nCLASSIFICATION REPORT:")
-print(classification_report(y_test, y_pred))
+if __name__ == "__main__":
+    main()
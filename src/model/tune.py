@@ -0,0 +1,204 @@
+import argparse
+import hashlib
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import ParameterSampler, StratifiedKFold, train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+# ŚCIEŻKI
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "src" / "data"))
+sys.path.insert(0, str(BASE_DIR / "src" / "agent"))
+from dataset import load_dataset, resolve_dataset_path
+from encoding import FeatureEncoder
+
+OUTPUT_DIR = BASE_DIR / "models" / "tuning"
+CACHE_DIR = OUTPUT_DIR / "cache"
+
+PARAM_GRID = {
+    "max_depth": [3, 4, 5, 6, 8, None],
+    "min_samples_leaf": [5, 10, 20, 40],
+    "criterion": ["gini", "entropy"],  # log_loss to w sklearn ten sam podzial co entropy
+    "class_weight": [None, "balanced"],
+}
+N_SPLITS = 5
+RANDOM_STATE = 42
+METRICS = ["accuracy", "f1", "roc_auc"]
+
+
+def dataset_hash(X: np.ndarray, y: np.ndarray) -> str:
+    digest = hashlib.sha256()
+    digest.update(str(X.shape).encode())
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    return digest.hexdigest()
+
+
+def params_key(params: dict, n_splits: int, seed: int) -> str:
+    payload = json.dumps({"params": params, "n_splits": n_splits, "seed": seed}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def candidate_params(search: str, n_iter: int, seed: int):
+    if search == "grid":
+        keys = list(PARAM_GRID)
+        return [dict(zip(keys, values)) for values in itertools.product(*PARAM_GRID.values())]
+    return list(ParameterSampler(PARAM_GRID, n_iter=n_iter, random_state=seed))
+
+
+def score_model(model, X, y) -> dict:
+    proba = model.predict_proba(X)[:, 1]
+    pred = model.classes_[(proba > 0.5).astype(int)]
+    return {
+        "accuracy": accuracy_score(y, pred),
+        "f1": f1_score(y, pred),
+        "roc_auc": roc_auc_score(y, proba),
+    }
+
+
+def evaluate_fold(X, y, train_idx, test_idx, params: dict, seed: int) -> dict:
+    model = DecisionTreeClassifier(random_state=seed, **params)
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_time = time.perf_counter() - start
+    return {**score_model(model, X[test_idx], y[test_idx]), "fit_time": fit_time}
+
+
+class FoldCache:
+    def __init__(self, root: Path, data_hash: str):
+        self.dir = root / data_hash[:16]
+
+    def path(self, key: str, fold: int) -> Path:
+        return self.dir / f"{key}_f{fold}.json"
+
+    def get(self, key: str, fold: int):
+        path = self.path(key, fold)
+        if path.exists():
+            return json.loads(path.read_text())
+        return None
+
+    def put(self, key: str, fold: int, result: dict):
+        path = self.path(key, fold)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(result))
+        tmp_path.replace(path)
+
+
+def run_search(X, y, candidates, n_splits=N_SPLITS, seed=RANDOM_STATE, n_jobs=-1, cache_dir=CACHE_DIR, verbose=0):
+    folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(X, y))
+    cache = FoldCache(Path(cache_dir), dataset_hash(X, y))
+
+    keys = [params_key(params, n_splits, seed) for params in candidates]
+    results = {}
+    pending = []
+    for key, params in zip(keys, candidates):
+        for fold in range(n_splits):
+            cached = cache.get(key, fold)
+            if cached is not None:
+                results[key, fold] = cached
+            else:
+                pending.append((key, params, fold))
+
+    # Oceny foldów są niezależne - równolegle w procesach loky, X trafia do workerów jako memmap
+    computed = Parallel(n_jobs=n_jobs, backend="loky", verbose=verbose)(
+        delayed(evaluate_fold)(X, y, folds[fold][0], folds[fold][1], params, seed)
+        for _, params, fold in pending
+    )
+    for (key, _, fold), result in zip(pending, computed):
+        cache.put(key, fold, result)
+        results[key, fold] = result
+
+    rows = []
+    for key, params in zip(keys, candidates):
+        fold_results = [results[key, fold] for fold in range(n_splits)]
+        row = {"key": key, **{f"param_{name}": value for name, value in params.items()}}
+        for metric in METRICS + ["fit_time"]:
+            values = np.array([r[metric] for r in fold_results])
+            row[f"mean_{metric}"] = values.mean()
+            row[f"std_{metric}"] = values.std()
+        rows.append(row)
+
+    return pd.DataFrame(rows), len(pending)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Strojenie hiperparametrów drzewa decyzyjnego")
+    parser.add_argument("--data", type=Path, default=None, help="plik CSV/Parquet (domyślnie dane_v2)")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--n-iter", type=int, default=30, help="liczba konfiguracji dla --search random")
+    parser.add_argument("--scoring", choices=METRICS, default="f1")
+    parser.add_argument("--n-splits", type=int, default=N_SPLITS)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    parser.add_argument("--output", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--cache", type=Path, default=CACHE_DIR)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+
+    # DANE - kodowanie raz, ten sam podział co w train_tree.py
+    df = load_dataset(resolve_dataset_path(args.data))
+    encoder = FeatureEncoder()
+    X = encoder.transform(df.drop("satisfied", axis=1))
+    y = df["satisfied"].to_numpy()
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=args.seed, stratify=y
+    )
+
+    # SZUKANIE
+    candidates = candidate_params(args.search, args.n_iter, args.seed)
+    leaderboard, computed = run_search(
+        X_train, y_train, candidates, args.n_splits, args.seed, args.n_jobs, args.cache
+    )
+    leaderboard = leaderboard.sort_values(
+        [f"mean_{args.scoring}", f"std_{args.scoring}"], ascending=[False, True]
+    ).reset_index(drop=True)
+    leaderboard.insert(0, "rank", np.arange(1, len(leaderboard) + 1))
+
+    # ZWYCIĘZCA - trening na całym zbiorze treningowym, ocena na teście
+    best = {name[len("param_"):]: value for name, value in leaderboard.iloc[0].items() if name.startswith("param_")}
+    best = {name: (None if isinstance(value, float) and np.isnan(value) else value) for name, value in best.items()}
+    if best.get("max_depth") is not None:
+        best["max_depth"] = int(best["max_depth"])
+    best["min_samples_leaf"] = int(best["min_samples_leaf"])
+
+    feature_names = encoder.get_feature_names_out()
+    model = DecisionTreeClassifier(random_state=args.seed, **best)
+    model.fit(pd.DataFrame(X_train, columns=feature_names), y_train)
+    holdout = score_model(model, pd.DataFrame(X_test, columns=feature_names), y_test)
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    leaderboard.to_csv(args.output / "leaderboard.csv", index=False)
+    joblib.dump(model, args.output / "model_tree_best.pkl")
+    encoder.save(args.output / "feature_encoder.json")
+    (args.output / "best.json").write_text(json.dumps({
+        "params": best,
+        "scoring": args.scoring,
+        "cv": {k: float(v) for k, v in leaderboard.iloc[0].items() if k.startswith(("mean_", "std_"))},
+        "holdout": holdout,
+        "dataset_hash": dataset_hash(X_train, y_train),
+    }, indent=2, default=str))
+
+    # RAPORT
+    print(f"Konfiguracje: {len(candidates)}, foldy policzone: {computed}, z cache: {len(candidates) * args.n_splits - computed}")
+    print(leaderboard.head(10).to_string(index=False))
+    print(f"\nNajlepsze parametry: {best}")
+    print("Test (holdout): " + ", ".join(f"{k}={v:.3f}" for k, v in holdout.items()))
+    print(f"Czas: {time.perf_counter() - start:.1f} s, wyniki w {args.output}")
+
+
+if __name__ == "__main__":
+    main()